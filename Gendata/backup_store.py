@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Deduplicated backup store for the CSV data files.
+
+Files are split into line-aligned, content-defined chunks; each chunk is
+stored once, zlib-compressed, under its SHA-256 hash. A backup is a snapshot
+manifest listing each file's chunks, so a backup only costs the chunks that
+changed since the last one, and files whose size and mtime are unchanged are
+not even re-read.
+
+Usage:
+    python backup_store.py backup incidents.csv data_files/references.csv --label daily
+    python backup_store.py list
+    python backup_store.py restore <snapshot_id> [--dest restored/] [--file incidents.csv]
+    python backup_store.py prune --keep-last 10 --keep-daily 14 --keep-weekly 8
+"""
+
+import hashlib
+import json
+import logging
+import os
+import zlib
+from datetime import datetime
+
+DEFAULT_STORE_DIR = 'data_files/backups/store'
+
+# Chunk boundaries fall on line ends: after MIN_CHUNK_SIZE bytes, at the first
+# line whose CRC matches BOUNDARY_MASK (about one line in 64), or at MAX_CHUNK_SIZE.
+# Inserting or editing a row therefore only changes the chunk around it.
+MIN_CHUNK_SIZE = 16 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+BOUNDARY_MASK = 0x3f
+
+
+def iter_chunks(f, min_size=MIN_CHUNK_SIZE, max_size=MAX_CHUNK_SIZE, mask=BOUNDARY_MASK):
+    """Split a binary file into line-aligned, content-defined chunks"""
+    lines = []
+    size = 0
+
+    for line in f:
+        lines.append(line)
+        size += len(line)
+        if size >= max_size or (size >= min_size and zlib.crc32(line) & mask == 0):
+            yield b''.join(lines)
+            lines = []
+            size = 0
+
+    if lines:
+        yield b''.join(lines)
+
+
+def restore_path(dest_dir, key):
+    """
+    Where a snapshot key is restored under dest_dir. Keys are the paths given
+    to backup, so they may be absolute or climb out with "..": the drive, root
+    and parent components are dropped, keeping every file inside dest_dir.
+    """
+    _, path = os.path.splitdrive(os.path.normpath(key))
+    parts = [part for part in path.split(os.sep) if part not in ('', os.curdir, os.pardir)]
+    if not parts:
+        raise ValueError(f"Cannot restore {key!r} under {dest_dir}")
+    return os.path.join(dest_dir, *parts)
+
+
+class BackupStore:
+    """Content-addressed chunk store with snapshot manifests"""
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        self.objects_dir = os.path.join(store_dir, 'objects')
+        self.snapshots_dir = os.path.join(store_dir, 'snapshots')
+        self.logger = logging.getLogger(__name__)
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _store_chunk(self, chunk):
+        """Store a chunk unless it is already present; returns (digest, bytes written)"""
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(chunk, 6)
+        self._write_atomic(path, data)
+        return digest, len(data)
+
+    def _read_chunk(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            chunk = zlib.decompress(f.read())
+        if hashlib.sha256(chunk).hexdigest() != digest:
+            raise ValueError(f"Backup object {digest} is corrupt")
+        return chunk
+
+    def list_snapshots(self, label=None):
+        """Snapshot manifests, oldest first (optionally only those with a label)"""
+        snapshots = []
+        for filename in sorted(os.listdir(self.snapshots_dir)):
+            if not filename.endswith('.json'):
+                continue
+            with open(os.path.join(self.snapshots_dir, filename), 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if label is None or snapshot.get('label') == label:
+                snapshots.append(snapshot)
+        return snapshots
+
+    def get_snapshot(self, snapshot_id):
+        with open(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _latest_entries(self):
+        """Newest recorded entry for every backed-up path"""
+        entries = {}
+        for snapshot in self.list_snapshots():
+            entries.update(snapshot['files'])
+        return entries
+
+    def backup(self, paths, label=''):
+        """Snapshot the given files; returns the snapshot manifest"""
+        previous = self._latest_entries()
+        files = {}
+        stored_bytes = 0
+        reused = 0
+
+        for path in paths:
+            if not os.path.exists(path):
+                self.logger.warning(f"Skipping missing file {path}")
+                continue
+
+            key = os.path.normpath(path)
+            stat = os.stat(path)
+            entry = previous.get(key)
+
+            # Unchanged since the last backup: reuse its chunk list without reading the file
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                files[key] = entry
+                reused += 1
+                continue
+
+            chunks = []
+            file_hash = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter_chunks(f):
+                    digest, written = self._store_chunk(chunk)
+                    chunks.append(digest)
+                    file_hash.update(chunk)
+                    stored_bytes += written
+
+            files[key] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': file_hash.hexdigest(),
+                'chunks': chunks
+            }
+
+        now = datetime.now()
+        snapshot = {
+            'id': now.strftime('%Y%m%dT%H%M%S%f'),
+            'created': now.isoformat(),
+            'label': label,
+            'files': files
+        }
+        self._write_atomic(os.path.join(self.snapshots_dir, f"{snapshot['id']}.json"),
+                           json.dumps(snapshot, indent=2).encode('utf-8'))
+
+        self.logger.info(f"Backup {snapshot['id']}: {len(files)} files ({reused} unchanged), "
+                         f"{stored_bytes} new bytes stored")
+        return snapshot
+
+    def restore(self, snapshot_id, dest_dir=None, paths=None):
+        """Write a snapshot's files back (to their original paths, or under dest_dir)"""
+        snapshot = self.get_snapshot(snapshot_id)
+        restored = []
+
+        for key, entry in snapshot['files'].items():
+            if paths and key not in {os.path.normpath(path) for path in paths}:
+                continue
+
+            target = restore_path(dest_dir, key) if dest_dir else key
+            os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+
+            file_hash = hashlib.sha256()
+            tmp_path = f"{target}.restore"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    for digest in entry['chunks']:
+                        chunk = self._read_chunk(digest)
+                        file_hash.update(chunk)
+                        f.write(chunk)
+
+                if file_hash.hexdigest() != entry['sha256']:
+                    raise ValueError(f"Restored {key} does not match its recorded hash")
+            except Exception:
+                # Missing or corrupt objects: leave the target untouched and no partial file behind
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            os.replace(tmp_path, target)
+            restored.append(target)
+            self.logger.info(f"Restored {key} -> {target}")
+
+        return restored
+
+    def prune(self, keep_last=10, keep_daily=14, keep_weekly=8):
+        """
+        Apply retention per label: keep the newest keep_last snapshots plus the
+        newest snapshot of each of the last keep_daily days and keep_weekly
+        ISO weeks. Deletes the other manifests, then chunks nobody references.
+        """
+        by_label = {}
+        for snapshot in self.list_snapshots():
+            by_label.setdefault(snapshot.get('label', ''), []).append(snapshot)
+
+        removed = 0
+        for snapshots in by_label.values():
+            newest_first = sorted(snapshots, key=lambda snapshot: snapshot['id'], reverse=True)
+            keep = {snapshot['id'] for snapshot in newest_first[:keep_last]}
+
+            for limit, period in ((keep_daily, lambda created: created.date()),
+                                  (keep_weekly, lambda created: created.isocalendar()[:2])):
+                seen_periods = []
+                for snapshot in newest_first:
+                    key = period(datetime.fromisoformat(snapshot['created']))
+                    if key not in seen_periods:
+                        if len(seen_periods) >= limit:
+                            break
+                        seen_periods.append(key)
+                        keep.add(snapshot['id'])
+
+            for snapshot in newest_first:
+                if snapshot['id'] not in keep:
+                    os.remove(os.path.join(self.snapshots_dir, f"{snapshot['id']}.json"))
+                    removed += 1
+
+        collected = self.collect_garbage()
+        self.logger.info(f"Pruned {removed} snapshots and {collected} unreferenced chunks")
+        return removed, collected
+
+    def collect_garbage(self):
+        """Delete chunks not referenced by any snapshot"""
+        referenced = set()
+        for snapshot in self.list_snapshots():
+            for entry in snapshot['files'].values():
+                referenced.update(entry['chunks'])
+
+        collected = 0
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for digest in os.listdir(prefix_dir):
+                if digest not in referenced:
+                    os.remove(os.path.join(prefix_dir, digest))
+                    collected += 1
+        return collected
+
+
+def main():
+    """Command line interface for backups, listing, restores and pruning"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Deduplicated backups of Gaza crisis data files')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help='Backup store directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backup_parser = subparsers.add_parser('backup', help='Back up files')
+    backup_parser.add_argument('files', nargs='+', help='Files to back up')
+    backup_parser.add_argument('--label', default='manual', help='Snapshot label (retention is applied per label)')
+
+    list_parser = subparsers.add_parser('list', help='List snapshots')
+    list_parser.add_argument('--label', help='Only snapshots with this label')
+
+    restore_parser = subparsers.add_parser('restore', help='Restore files from a snapshot')
+    restore_parser.add_argument('snapshot_id', help='Snapshot to restore')
+    restore_parser.add_argument('--dest', help='Restore under this directory instead of the original paths')
+    restore_parser.add_argument('--file', action='append', help='Only restore this file (repeatable)')
+
+    prune_parser = subparsers.add_parser('prune', help='Apply retention and delete unreferenced chunks')
+    prune_parser.add_argument('--keep-last', type=int, default=10)
+    prune_parser.add_argument('--keep-daily', type=int, default=14)
+    prune_parser.add_argument('--keep-weekly', type=int, default=8)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = BackupStore(args.store)
+
+    if args.command == 'backup':
+        snapshot = store.backup(args.files, label=args.label)
+        print(f"Created snapshot {snapshot['id']} with {len(snapshot['files'])} files")
+
+    elif args.command == 'list':
+        for snapshot in store.list_snapshots(args.label):
+            size = sum(entry['size'] for entry in snapshot['files'].values())
+            print(f"{snapshot['id']}  {snapshot['label'] or '-':<10} {len(snapshot['files'])} files, {size} bytes")
+            for path in snapshot['files']:
+                print(f"    {path}")
+
+    elif args.command == 'restore':
+        restored = store.restore(args.snapshot_id, dest_dir=args.dest, paths=args.file)
+        print(f"Restored {len(restored)} files")
+
+    elif args.command == 'prune':
+        removed, collected = store.prune(args.keep_last, args.keep_daily, args.keep_weekly)
+        print(f"Removed {removed} snapshots and {collected} chunks")
+
+
+if __name__ == "__main__":
+    main()
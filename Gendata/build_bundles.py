@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Build step for the Pages front-ends: precompiles each page's CSV set into one
+minified, pre-typed JSON bundle.
+
+Page sets are discovered under Pages/ as <page>-main.csv, <page>-timeline.csv,
+<page>-resources.csv and <page>-images.csv; the Hunger Crisis pages, whose
+CSVs use other names, are listed in EXTRA_BUNDLES. Each bundle is written as
+<page>.<hash>.json with pre-compressed .gz (and .br when the brotli package is
+installed) siblings, and manifest.json maps page names to the current file so
+pages can load one cache-busted file instead of parsing several CSVs.
+
+Usage:
+    python build_bundles.py [--pages-dir ../Pages] [--output-dir ../Pages/bundles]
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_PAGES_DIR = os.path.join(REPO_ROOT, 'Pages')
+
+BUNDLE_FORMAT_VERSION = 1
+
+# Sections of a discovered page set, by CSV filename suffix
+SECTIONS = ('main', 'timeline', 'resources', 'images')
+
+# Pages whose CSVs don't follow the <page>-<section>.csv naming (paths relative to Pages/)
+EXTRA_BUNDLES = {
+    'hunger-total-starvation': {
+        'statistics': 'Hunger_Crisis/total-population/total-population-statistics.csv',
+        'references': 'Hunger_Crisis/children-starvation/references.csv',
+        'cases': 'Hunger_Crisis/total-population/total-population-cases.csv',
+        'quotes': 'Hunger_Crisis/children-starvation/un-quotes.csv',
+        'resources': 'Hunger_Crisis/children-starvation/resources.csv'
+    },
+    'hunger-starved-children': {
+        'statistics': 'Hunger_Crisis/children-starvation/crisis-statistics.csv',
+        'references': 'Hunger_Crisis/children-starvation/references.csv',
+        'cases': 'Hunger_Crisis/children-starvation/individual-cases-verified.csv',
+        'quotes': 'Hunger_Crisis/children-starvation/un-quotes.csv',
+        'resources': 'Hunger_Crisis/children-starvation/resources.csv'
+    }
+}
+
+INT_PATTERN = re.compile(r'^-?(0|[1-9]\d*)$')
+FLOAT_PATTERN = re.compile(r'^-?\d+\.\d+$')
+BOOLEANS = {'true': True, 'false': False}
+
+
+def discover_pages(pages_dir):
+    """Map page name -> {section: csv path} for every <page>-<section>.csv set"""
+    pages = {}
+    section_pattern = re.compile(rf"^(.+)-({'|'.join(SECTIONS)})\.csv$")
+
+    for directory, _, filenames in os.walk(pages_dir):
+        for filename in sorted(filenames):
+            match = section_pattern.match(filename)
+            if match:
+                pages.setdefault(match.group(1), {})[match.group(2)] = os.path.join(directory, filename)
+
+    for page, sources in EXTRA_BUNDLES.items():
+        paths = {section: os.path.join(pages_dir, path) for section, path in sources.items()}
+        if all(os.path.exists(path) for path in paths.values()):
+            pages[page] = paths
+
+    return dict(sorted(pages.items()))
+
+
+def infer_type(values):
+    """Column type from its non-empty values: int, float, bool, json or string"""
+    values = [value for value in values if value != '']
+    if not values:
+        return 'string'
+    if all(INT_PATTERN.match(value) for value in values):
+        return 'int'
+    if all(INT_PATTERN.match(value) or FLOAT_PATTERN.match(value) for value in values):
+        return 'float'
+    if all(value.lower() in BOOLEANS for value in values):
+        return 'bool'
+    return 'string'
+
+
+def convert(value, column_type):
+    if value == '':
+        return None
+    if column_type == 'int':
+        return int(value)
+    if column_type == 'float':
+        return float(value)
+    if column_type == 'bool':
+        return BOOLEANS[value.lower()]
+    if column_type == 'json':
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def load_section(path):
+    """A CSV as {'columns', 'types', 'rows'} with values converted to their column type"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        columns = [column.strip() for column in next(reader, [])]
+        rows = [row + [''] * (len(columns) - len(row)) for row in reader if any(cell.strip() for cell in row)]
+
+    rows = [[cell.strip() for cell in row[:len(columns)]] for row in rows]
+    types = []
+    for index, column in enumerate(columns):
+        # Columns named *_json hold embedded JSON (e.g. timeline_json in cases-data.csv)
+        types.append('json' if column.endswith('_json') else infer_type(row[index] for row in rows))
+
+    return {
+        'columns': columns,
+        'types': types,
+        'rows': [[convert(value, column_type) for value, column_type in zip(row, types)] for row in rows]
+    }
+
+
+def build_bundle(page, sources):
+    """Minified bundle bytes for one page"""
+    bundle = {
+        'version': BUNDLE_FORMAT_VERSION,
+        'page': page,
+        'sections': {section: load_section(path) for section, path in sorted(sources.items())}
+    }
+    return json.dumps(bundle, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_bundle(page, data, output_dir, use_brotli=True):
+    """Write <page>.<hash>.json plus compressed copies; returns its manifest entry"""
+    content_hash = hashlib.sha256(data).hexdigest()[:12]
+    filename = f"{page}.{content_hash}.json"
+    path = os.path.join(output_dir, filename)
+    entry = {'file': filename, 'hash': content_hash, 'bytes': len(data)}
+
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+    # mtime=0 keeps the gzip output identical between builds of the same content
+    gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(f"{path}.gz", 'wb') as f:
+        f.write(gzipped)
+    entry['gzip_bytes'] = len(gzipped)
+
+    if use_brotli and brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        with open(f"{path}.br", 'wb') as f:
+            f.write(compressed)
+        entry['br_bytes'] = len(compressed)
+
+    # Drop bundles of this page from previous builds
+    for old in os.listdir(output_dir):
+        if old.startswith(f"{page}.") and not old.startswith(filename) and re.match(
+                rf"^{re.escape(page)}\.[0-9a-f]{{12}}\.json", old):
+            os.remove(os.path.join(output_dir, old))
+
+    return entry
+
+
+def build_all(pages_dir=DEFAULT_PAGES_DIR, output_dir=None, use_brotli=True):
+    """Build every page bundle and the manifest; returns the manifest"""
+    output_dir = output_dir or os.path.join(pages_dir, 'bundles')
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = {'version': BUNDLE_FORMAT_VERSION, 'generated': datetime.now().isoformat(), 'pages': {}}
+
+    for page, sources in discover_pages(pages_dir).items():
+        try:
+            data = build_bundle(page, sources)
+        except Exception as e:
+            logging.error(f"Failed to build bundle for {page}: {e}")
+            continue
+
+        entry = write_bundle(page, data, output_dir, use_brotli)
+        entry['sources'] = {section: os.path.relpath(path, pages_dir).replace(os.sep, '/')
+                            for section, path in sorted(sources.items())}
+        source_bytes = sum(os.path.getsize(path) for path in sources.values())
+        manifest['pages'][page] = entry
+        logging.info(f"{page}: {len(sources)} CSVs ({source_bytes} bytes) -> {entry['file']} "
+                     f"({entry['bytes']} bytes, {entry['gzip_bytes']} gzipped)")
+
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    return manifest
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Precompile Pages CSV sets into JSON bundles')
+    parser.add_argument('--pages-dir', default=DEFAULT_PAGES_DIR, help='Pages directory to scan')
+    parser.add_argument('--output-dir', help='Where bundles are written (default: <pages-dir>/bundles)')
+    parser.add_argument('--no-brotli', action='store_true', help='Skip .br output even if brotli is installed')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if brotli is None and not args.no_brotli:
+        logging.info("brotli package not installed, writing .gz bundles only")
+
+    manifest = build_all(args.pages_dir, args.output_dir, use_brotli=not args.no_brotli)
+    print(f"Built {len(manifest['pages'])} page bundles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Journal of a long extraction run, so it can be resumed after a crash.
+
+Every URL of a run is appended to a JSONL journal as soon as it is processed
+(flushed and fsynced), with the extracted record when there is one:
+    {"at": "...", "url": "...", "status": "done", "record": {...}}
+    {"at": "...", "url": "...", "status": "failed"}
+
+The journal is named after a hash of the run's URL list, so resuming the
+same list finds it: URLs with a record are not fetched again, failed and
+unprocessed ones are. The journal is removed once the run's records are
+saved (see GazaCrisisExtractor.finish_checkpoint). A line cut short by a
+crash is cut off before the next append, and any line that doesn't parse is
+skipped, so one bad line never hides the entries after it.
+
+Usage:
+    python checkpoint.py list
+    python checkpoint.py show <journal file>
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+DEFAULT_CHECKPOINT_DIR = 'data_files/checkpoints'
+
+# Block size for scanning back from the end of a journal to its last complete line
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def run_key(urls):
+    """Stable name of a run: hash of its URL list"""
+    return hashlib.sha1('\n'.join(urls).encode('utf-8')).hexdigest()[:16]
+
+
+class ExtractionJournal:
+    """Append-only, fsynced record of the URLs a run has processed"""
+
+    def __init__(self, path):
+        self.path = path
+        self._repaired = False
+
+    @classmethod
+    def for_urls(cls, urls, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        return cls(os.path.join(checkpoint_dir, f"extraction-{run_key(urls)}.jsonl"))
+
+    def entries(self):
+        """Journal lines in order, skipping torn or unreadable ones"""
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(entry, dict) and 'url' in entry:
+                    entries.append(entry)
+        return entries
+
+    def repair(self):
+        """Cut off a last line left incomplete by a crash, so the next append starts on a line of its own"""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - TAIL_BLOCK_SIZE)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+
+            if position < end:
+                f.truncate(position)
+                f.flush()
+                os.fsync(f.fileno())
+        return end - position
+
+    def completed(self):
+        """{url: record} of the URLs already extracted by this run"""
+        return {entry['url']: entry['record'] for entry in self.entries() if entry.get('status') == 'done'}
+
+    def record(self, url, data):
+        """Durably note that url was processed, with its record (None when extraction failed)"""
+        entry = {'at': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'url': url}
+        if data:
+            entry.update(status='done', record=data)
+        else:
+            entry['status'] = 'failed'
+
+        if not self._repaired:
+            self.repair()
+            self._repaired = True
+
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Inspect extraction journals')
+    parser.add_argument('--dir', default=DEFAULT_CHECKPOINT_DIR, help='Checkpoint directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help='List unfinished runs')
+    show_parser = subparsers.add_parser('show', help='Show the progress of one run')
+    show_parser.add_argument('journal', help='Journal file')
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for path in sorted(glob.glob(os.path.join(args.dir, 'extraction-*.jsonl'))):
+            entries = ExtractionJournal(path).entries()
+            done = sum(1 for entry in entries if entry.get('status') == 'done')
+            last = entries[-1]['at'] if entries else '-'
+            print(f"{path}: {done} extracted, {len(entries) - done} failed, last entry {last}")
+
+    elif args.command == 'show':
+        for entry in ExtractionJournal(args.journal).entries():
+            print(f"{entry['at']}  {entry['status']:6}  {entry['url']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Columnar, memory-mapped storage for individual casualty records
+(Pages/War_Crimes_Stats/*/images/individual-records.csv and the full
+TechForPalestine datasets they are sampled from).
+
+A store is a directory of .npy column files plus meta.json:
+  - ids as int64, ages as int16 and dates as int32 days since 1970-01-01
+    (-1 marks a missing age or date; ages outside 0-120 count as missing)
+  - string columns dictionary-encoded: int32 codes per row plus the list of
+    distinct values in meta.json
+
+Columns are opened with mmap, so loading a store costs almost nothing and
+aggregations are vectorised NumPy operations instead of CSV scans.
+
+Usage:
+    python columnar_records.py build individual-records.csv --out records.columns
+    python columnar_records.py summary records.columns [--json summary.json]
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+from datetime import date
+
+import numpy as np
+
+STORE_FORMAT_VERSION = 2
+
+MISSING = -1
+
+EPOCH = date(1970, 1, 1)
+
+# Column name -> storage kind; any other column is dictionary-encoded text
+NUMERIC_COLUMNS = {'id': 'int64', 'age': 'int16'}
+DATE_COLUMNS = ('date',)
+
+# Numbers outside these bounds are stored as MISSING (other numeric columns: the bounds of their type)
+VALID_RANGES = {'age': (0, 120)}
+
+# Columns whose distinct values are small enough to summarise
+CATEGORY_COLUMNS = ('age_group', 'sex')
+
+
+def parse_int(value, low, high):
+    """Whole number within [low, high], or MISSING"""
+    try:
+        number = int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return MISSING
+    return number if low <= number <= high else MISSING
+
+
+def parse_day(value):
+    """Days since 1970-01-01 for an ISO date (time part ignored), or MISSING"""
+    try:
+        return (date.fromisoformat((value or '')[:10]) - EPOCH).days
+    except ValueError:
+        return MISSING
+
+
+def day_to_iso(day):
+    return date.fromordinal(EPOCH.toordinal() + int(day)).isoformat()
+
+
+def build_store(csv_path, store_dir):
+    """Convert an individual-records CSV into a columnar store; returns its metadata"""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        columns = [column.strip() for column in reader.fieldnames or []]
+        values = {column: [] for column in columns}
+        for row in reader:
+            for column, raw_column in zip(columns, reader.fieldnames):
+                values[column].append((row.get(raw_column) or '').strip())
+
+    os.makedirs(store_dir, exist_ok=True)
+    stat = os.stat(csv_path)
+    meta = {
+        'version': STORE_FORMAT_VERSION,
+        'rows': len(values[columns[0]]) if columns else 0,
+        'source': os.path.abspath(csv_path),
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'columns': {}
+    }
+
+    for column in columns:
+        if column in NUMERIC_COLUMNS:
+            limits = np.iinfo(NUMERIC_COLUMNS[column])
+            low, high = VALID_RANGES.get(column, (int(limits.min), int(limits.max)))
+            array = np.array([parse_int(value, low, high) for value in values[column]],
+                             dtype=NUMERIC_COLUMNS[column])
+            meta['columns'][column] = {'kind': 'int'}
+        elif column in DATE_COLUMNS:
+            array = np.array([parse_day(value) for value in values[column]], dtype=np.int32)
+            meta['columns'][column] = {'kind': 'date'}
+        else:
+            # Dictionary encoding: sorted distinct values, one int32 code per row
+            dictionary = sorted(set(values[column]))
+            codes = {value: code for code, value in enumerate(dictionary)}
+            array = np.array([codes[value] for value in values[column]], dtype=np.int32)
+            meta['columns'][column] = {'kind': 'dict', 'dictionary': dictionary}
+
+        np.save(os.path.join(store_dir, f"{column}.npy"), array)
+
+    with open(os.path.join(store_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    logging.info(f"Built columnar store {store_dir}: {meta['rows']} rows, {len(columns)} columns")
+    return meta
+
+
+class ColumnarRecords:
+    """Read-only view of a columnar store with vectorised aggregations"""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.rows = self.meta['rows']
+        self._arrays = {}
+
+    @classmethod
+    def from_csv(cls, csv_path, store_dir):
+        """Open the store for a CSV, (re)building it if the CSV changed since the last build"""
+        stat = os.stat(csv_path)
+        meta_path = os.path.join(store_dir, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if (meta.get('version') == STORE_FORMAT_VERSION and meta.get('source_size') == stat.st_size
+                    and meta.get('source_mtime_ns') == stat.st_mtime_ns):
+                return cls(store_dir)
+        build_store(csv_path, store_dir)
+        return cls(store_dir)
+
+    @property
+    def columns(self):
+        return list(self.meta['columns'])
+
+    def column(self, name):
+        """The stored array for a column (memory-mapped, loaded on first use)"""
+        if name not in self._arrays:
+            if name not in self.meta['columns']:
+                raise KeyError(f"No column {name!r} in {self.store_dir}")
+            self._arrays[name] = np.load(os.path.join(self.store_dir, f"{name}.npy"), mmap_mode='r')
+        return self._arrays[name]
+
+    def dictionary(self, name):
+        return self.meta['columns'][name].get('dictionary', [])
+
+    def mask(self, **equals):
+        """Boolean row mask for column == value filters (e.g. sex='f', age_group='child')"""
+        mask = np.ones(self.rows, dtype=bool)
+        for name, value in equals.items():
+            if self.meta['columns'][name]['kind'] == 'dict':
+                dictionary = self.dictionary(name)
+                if value not in dictionary:
+                    return np.zeros(self.rows, dtype=bool)
+                mask &= self.column(name) == dictionary.index(value)
+            else:
+                mask &= self.column(name) == value
+        return mask
+
+    def count_by(self, name, mask=None):
+        """Row count per distinct value of a dictionary-encoded column"""
+        codes = self.column(name) if mask is None else self.column(name)[mask]
+        counts = np.bincount(codes, minlength=len(self.dictionary(name)))
+        return {value: int(count) for value, count in zip(self.dictionary(name), counts) if count}
+
+    def crosstab(self, row_name, column_name, mask=None):
+        """Counts for every combination of two dictionary-encoded columns"""
+        row_codes, column_codes = self.column(row_name), self.column(column_name)
+        if mask is not None:
+            row_codes, column_codes = row_codes[mask], column_codes[mask]
+
+        rows, columns = self.dictionary(row_name), self.dictionary(column_name)
+        counts = np.bincount(row_codes.astype(np.int64) * len(columns) + column_codes,
+                             minlength=len(rows) * len(columns)).reshape(len(rows), len(columns))
+        return {row: {column: int(counts[i, j]) for j, column in enumerate(columns) if counts[i, j]}
+                for i, row in enumerate(rows) if counts[i].any()}
+
+    def count_by_date(self, period='day', mask=None):
+        """Rows per day or month (rows without a date are left out)"""
+        days = self.column('date') if mask is None else self.column('date')[mask]
+        days = days[days != MISSING]
+        if period == 'month':
+            months = days.astype('datetime64[D]').astype('datetime64[M]')
+            values, counts = np.unique(months, return_counts=True)
+            return {str(value): int(count) for value, count in zip(values, counts)}
+
+        values, counts = np.unique(days, return_counts=True)
+        return {day_to_iso(value): int(count) for value, count in zip(values, counts)}
+
+    def age_histogram(self, bin_width=5, max_age=100, mask=None):
+        """Counts per age band, as {'0-4': n, ...}; the last band is open-ended"""
+        ages = self.column('age') if mask is None else self.column('age')[mask]
+        ages = ages[ages != MISSING]
+        edges = np.arange(0, max_age + bin_width, bin_width)
+        counts = np.bincount(np.minimum(ages // bin_width, len(edges) - 1), minlength=len(edges))
+        labels = [f"{low}-{low + bin_width - 1}" for low in edges[:-1]] + [f"{edges[-1]}+"]
+        return dict(zip(labels, (int(count) for count in counts)))
+
+    def summary(self):
+        """Precomputed totals for the statistics pages"""
+        result = {'total': self.rows}
+
+        available = [name for name in CATEGORY_COLUMNS if name in self.meta['columns']]
+        for name in available:
+            result[f"by_{name}"] = self.count_by(name)
+        if len(available) == 2:
+            result[f"by_{available[0]}_and_{available[1]}"] = self.crosstab(*available)
+
+        if 'age' in self.meta['columns']:
+            ages = self.column('age')
+            known = ages[ages != MISSING]
+            result['age_histogram'] = self.age_histogram()
+            result['age_known'] = int(known.size)
+            result['mean_age'] = round(float(known.mean()), 1) if known.size else None
+
+        if 'date' in self.meta['columns']:
+            result['by_month'] = self.count_by_date('month')
+
+        return result
+
+
+def main():
+    """Build a columnar store from a CSV, or print its summary"""
+    parser = argparse.ArgumentParser(description='Columnar storage for individual casualty records')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Convert an individual-records CSV')
+    build_parser.add_argument('csv', help='individual-records CSV file')
+    build_parser.add_argument('--out', help='Store directory (default: <csv name>.columns next to the CSV)')
+
+    summary_parser = subparsers.add_parser('summary', help='Aggregate a store')
+    summary_parser.add_argument('store', help='Store directory')
+    summary_parser.add_argument('--json', help='Write the summary to this file instead of printing it')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == 'build':
+        store_dir = args.out or f"{os.path.splitext(args.csv)[0]}.columns"
+        meta = build_store(args.csv, store_dir)
+        print(f"Stored {meta['rows']} records in {store_dir}")
+
+    elif args.command == 'summary':
+        summary = ColumnarRecords(args.store).summary()
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2, ensure_ascii=False)
+            print(f"Summary written to {args.json}")
+        else:
+            print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
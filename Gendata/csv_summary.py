@@ -0,0 +1,203 @@
+"""
+Lightweight CSV row counting and summaries for reports.
+
+count_rows() counts records by scanning raw bytes in large chunks, tracking
+quote parity so newlines inside quoted fields (long descriptions) and blank
+lines are not counted. summarize_csv() makes one csv-module pass for row count, per-column
+null rates, date ranges and casualty totals. CsvSummaryCache keeps both keyed
+by file mtime and size, so unchanged files are never re-read.
+"""
+
+import csv
+import json
+import logging
+import os
+import re
+import threading
+
+CHUNK_SIZE = 1024 * 1024
+
+# Values starting with an ISO date count towards a column's date range
+DATE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})')
+
+DATE_COLUMNS = ('date', 'last_updated', 'extraction_date')
+
+CASUALTY_PREFIX = 'casualties_'
+
+
+def _count_line_ends(segment, pending):
+    """
+    Newlines in an unquoted segment that end a non-blank line, and whether the
+    segment's last line has content. `pending` says whether the line the
+    segment starts in already has content (e.g. a closing quote).
+    """
+    lines = segment.replace(b'\r', b'').split(b'\n')
+    ends = lines[:-1]
+    blank = ends.count(b'')
+    if pending and ends and ends[0] == b'':
+        blank -= 1
+    return len(ends) - blank, bool(lines[-1]) or (pending and not ends)
+
+
+def count_rows(path, header=True, chunk_size=CHUNK_SIZE):
+    """Number of CSV records in a file (excluding the header row); blank lines are skipped like csv.reader does"""
+    records = 0
+    in_quotes = False
+    pending = False         # The current line has content
+    previous_end = b'\n'    # Last bytes before the chunk; the file starts at the beginning of a line
+
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+
+            # A blank line ends in \n\n or \n\r\n (csv.reader skips those; quoted fields may contain them too)
+            window = previous_end + chunk[:2]
+            if (b'\n\n' in window or b'\n\r\n' in window or b'\n\n' in chunk
+                    or (b'\r' in chunk and b'\n\r\n' in chunk)):
+                # Blank lines possible: count line by line between quotes
+                # (segments between quote characters alternate between outside and inside a quoted field,
+                # and an escaped "" toggles twice, so it leaves the state unchanged)
+                parts = chunk.split(b'"')
+                for index, part in enumerate(parts):
+                    if not in_quotes:
+                        ends, pending = _count_line_ends(part, pending)
+                        records += ends
+                    if index < len(parts) - 1:
+                        in_quotes = not in_quotes
+                        pending = True
+            else:
+                # Every newline outside quotes ends a record
+                if b'"' not in chunk and not in_quotes:
+                    records += chunk.count(b'\n')
+                else:
+                    parts = chunk.split(b'"')
+                    for index, part in enumerate(parts):
+                        if not in_quotes:
+                            records += part.count(b'\n')
+                        if index < len(parts) - 1:
+                            in_quotes = not in_quotes
+                tail = chunk[chunk.rfind(b'\n') + 1:]
+                pending = bool(tail.replace(b'\r', b'')) or (pending and b'\n' not in chunk)
+
+            previous_end = (previous_end + chunk[-2:])[-2:]
+
+    # Last record without a trailing newline
+    if pending:
+        records += 1
+
+    return max(0, records - 1) if header else records
+
+
+def to_number(value):
+    """Parse a numeric cell, or None if it isn't one"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize_csv(path, encoding='utf-8'):
+    """One pass over a CSV: row count, null rates, date ranges and casualty sums"""
+    rows = 0
+    nulls = {}
+    date_ranges = {}
+    casualties = {}
+
+    with open(path, 'r', encoding=encoding, newline='') as csvfile:
+        reader = csv.DictReader(csvfile)
+        columns = reader.fieldnames or []
+        nulls = dict.fromkeys(columns, 0)
+        date_columns = [column for column in columns if column in DATE_COLUMNS or column.endswith('_date')]
+        casualty_columns = [column for column in columns if column.startswith(CASUALTY_PREFIX)]
+
+        for row in reader:
+            rows += 1
+
+            for column in columns:
+                value = row.get(column)
+                if value is None or not value.strip():
+                    nulls[column] += 1
+
+            for column in date_columns:
+                match = DATE_PATTERN.match(row.get(column) or '')
+                if match:
+                    day = match.group(1)
+                    current = date_ranges.get(column)
+                    if current is None:
+                        date_ranges[column] = [day, day]
+                    elif day < current[0]:
+                        current[0] = day
+                    elif day > current[1]:
+                        current[1] = day
+
+            for column in casualty_columns:
+                number = to_number(row.get(column))
+                if number is not None:
+                    casualties[column] = casualties.get(column, 0) + number
+
+    return {
+        'rows': rows,
+        'columns': columns,
+        'null_rates': {column: round(count / rows, 4) if rows else 0.0 for column, count in nulls.items()},
+        'date_ranges': {column: {'min': low, 'max': high} for column, (low, high) in date_ranges.items()},
+        'casualty_totals': {column: int(total) if total.is_integer() else total
+                            for column, total in casualties.items()}
+    }
+
+
+class CsvSummaryCache:
+    """Row counts and summaries cached in a JSON file, keyed by path, mtime and size"""
+
+    def __init__(self, cache_file='data_files/csv_summary_cache.json'):
+        self.cache_file = cache_file
+        self.entries = {}
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Could not read summary cache {cache_file}: {e}")
+
+    def _entry(self, path):
+        """Cache entry for the file's current version (stale entries are dropped)"""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        entry = self.entries.get(key)
+        if not entry or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+            entry = self.entries[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        return entry
+
+    def row_count(self, path):
+        """Data rows in a CSV, counted only if the file changed since last time"""
+        with self._lock:
+            entry = self._entry(path)
+            if 'rows' not in entry:
+                entry['rows'] = count_rows(path)
+                self.save()
+            return entry['rows']
+
+    def summary(self, path):
+        """summarize_csv() result, recomputed only if the file changed since last time"""
+        with self._lock:
+            entry = self._entry(path)
+            if 'summary' not in entry:
+                entry['summary'] = summarize_csv(path)
+                entry['rows'] = entry['summary']['rows']
+                self.save()
+            return entry['summary']
+
+    def save(self):
+        """Write the cache file (caller holds the lock)"""
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            self.logger.error(f"Could not write summary cache {self.cache_file}: {e}")
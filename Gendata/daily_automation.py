@@ -4,28 +4,43 @@ Daily automation script for Gaza Crisis Documentation
 Run this script daily to extract and update data
 """
 
-import schedule
-import time
-import subprocess
+import argparse
+import json
 import logging
 from datetime import datetime
 import os
-import shutil
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('daily_automation.log'),
-        logging.StreamHandler()
-    ]
-)
+import yaml
+from backup_store import BackupStore, DEFAULT_STORE_DIR
+from csv_summary import CsvSummaryCache
+from daily_extractor import GazaCrisisExtractor
+from crisis_shared.log_pipeline import setup_logging
+from crisis_shared.metrics import REGISTRY
+from scheduler import JobScheduler
+from tfp_sync import TfpMirror
+
+# Configure logging (queued, rotated and gzipped; see crisis_shared/log_pipeline.py)
+setup_logging(log_file='daily_automation.log', rotate_seconds=24 * 3600)
+
+# URLs to extract every day, one per line ('#' starts a comment)
+TARGET_URLS_FILE = 'target_urls.txt'
+
+def load_target_urls(path=TARGET_URLS_FILE):
+    """Read the daily target URLs, skipping blank lines and comments"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+def load_backup_config(config_path='config.yaml'):
+    """Backup settings from the extractor config (defaults if missing)"""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return (yaml.safe_load(f) or {}).get('backup', {})
+    except FileNotFoundError:
+        return {}
 
 def backup_existing_files():
     """Backup existing CSV files"""
-    backup_dir = f"backups/{datetime.now().strftime('%Y-%m-%d')}"
-    os.makedirs(backup_dir, exist_ok=True)
+    backup_config = load_backup_config()
+    store = BackupStore(backup_config.get('store_dir', DEFAULT_STORE_DIR))
     
     csv_files = [
         'total-population-statistics.csv',
@@ -36,10 +51,16 @@ def backup_existing_files():
         'resources.csv'
     ]
     
-    for file in csv_files:
-        if os.path.exists(file):
-            shutil.copy2(file, backup_dir)
-            logging.info(f"Backed up {file}")
+    # Only chunks that changed since the last backup are stored
+    snapshot = store.backup([file for file in csv_files if os.path.exists(file)], label='daily')
+    for file in snapshot['files']:
+        logging.info(f"Backed up {file}")
+
+    store.prune(
+        keep_last=backup_config.get('keep_last', 10),
+        keep_daily=backup_config.get('keep_daily', 14),
+        keep_weekly=backup_config.get('keep_weekly', 8)
+    )
 
 def run_daily_extraction():
     """Run the daily data extraction"""
@@ -49,31 +70,39 @@ def run_daily_extraction():
         # Backup existing files
         backup_existing_files()
         
-        # Run the main extraction script
-        result = subprocess.run(['python', 'daily_extractor.py'], 
-                              capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            logging.info("Daily extraction completed successfully")
-            logging.info(f"Output: {result.stdout}")
+        # Run the extractor in-process on the target URLs
+        urls = load_target_urls()
+        extractor = GazaCrisisExtractor()
+        REGISTRY.reset()  # The metrics summary covers this run only
+        extracted_data = extractor.extract_from_urls(urls)
+
+        if extracted_data:
+            saved = extractor.save_to_csv(extracted_data)
+            if extractor.update_main_csv(extracted_data) and saved:
+                extractor.finish_checkpoint()
+            logging.info(f"Daily extraction completed: {len(extracted_data)} of {len(urls)} URLs extracted")
         else:
-            logging.error(f"Daily extraction failed: {result.stderr}")
+            logging.error(f"Daily extraction found no data in {len(urls)} URLs")
+
+        extractor.save_metrics_summary()
         
         # Generate summary report
         generate_daily_report()
         
     except Exception as e:
         logging.error(f"Error in daily extraction: {e}")
+        raise
 
 def generate_daily_report():
     """Generate daily summary report"""
     try:
-        import pandas as pd
-        
+        summaries = CsvSummaryCache()
+
         report = {
             'date': datetime.now().strftime('%Y-%m-%d'),
             'files_status': {},
-            'total_records': {}
+            'total_records': {},
+            'summaries': {}
         }
         
         csv_files = {
@@ -87,9 +116,11 @@ def generate_daily_report():
         for name, file in csv_files.items():
             try:
                 if os.path.exists(file):
-                    df = pd.read_csv(file)
+                    # Unchanged files are served from the summary cache
+                    summary = summaries.summary(file)
                     report['files_status'][name] = 'exists'
-                    report['total_records'][name] = len(df)
+                    report['total_records'][name] = summary['rows']
+                    report['summaries'][name] = summary
                 else:
                     report['files_status'][name] = 'missing'
                     report['total_records'][name] = 0
@@ -98,32 +129,45 @@ def generate_daily_report():
                 report['total_records'][name] = 0
         
         # Save report
-        import json
         with open(f"daily_report_{datetime.now().strftime('%Y-%m-%d')}.json", 'w') as f:
             json.dump(report, f, indent=2)
         
-        logging.info(f"Daily report generated: {report}")
+        logging.info(f"Daily report generated: {report['total_records']}")
         
     except Exception as e:
         logging.error(f"Error generating daily report: {e}")
 
-def schedule_daily_tasks():
-    """Schedule daily tasks"""
-    # Schedule daily extraction at 8:00 AM UTC
-    schedule.every().day.at("08:00").do(run_daily_extraction)
+def sync_tfp_datasets():
+    """Refresh the local TechForPalestine mirror and the slices published for the stat pages"""
+    results = TfpMirror().sync()
+    logging.info(f"TechForPalestine sync: {results}")
+
+def schedule_daily_tasks(run_now=False):
+    """Schedule daily tasks and run them until interrupted"""
+    scheduler = JobScheduler(state_file='data_files/scheduler_state.json')
+
+    # Schedule daily extraction at 8:00 AM UTC (up to 5 minutes late, to spread load on the sources)
+    scheduler.add_daily('extraction', run_daily_extraction, '08:00', jitter=300)
     
+    # Mirror the TechForPalestine datasets before the extraction run
+    scheduler.add_daily('tfp_sync', sync_tfp_datasets, '07:30', jitter=300)
+
     # Schedule backup at 23:00 UTC
-    schedule.every().day.at("23:00").do(backup_existing_files)
+    scheduler.add_daily('backup', backup_existing_files, '23:00')
     
     logging.info("Daily tasks scheduled")
-    
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+
+    if run_now:
+        scheduler.run_now('extraction')
+
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        logging.info("Scheduler stopped, waiting for running jobs to finish")
 
 if __name__ == "__main__":
-    # Run immediately for testing
-    # run_daily_extraction()
-    
-    # Or schedule for daily automation
-    schedule_daily_tasks()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Daily automation for Gaza crisis data extraction')
+    parser.add_argument('--run-now', action='store_true', help='Run the extraction once immediately, then keep scheduling')
+    args = parser.parse_args()
+
+    schedule_daily_tasks(run_now=args.run_now)
@@ -7,16 +7,134 @@ import logging
 from datetime import datetime
 import os
 import re
+import sys
+import hashlib
 from urllib.parse import urljoin, urlparse
 import time
+from backup_store import BackupStore, DEFAULT_STORE_DIR
+from search_index import SearchIndex, DEFAULT_INDEX_PATH
+from rollups import RollupStore, DEFAULT_STORE_DIR as DEFAULT_ROLLUP_DIR
+from record_diff import ChangeLog, DEFAULT_CHANGELOG, upsert
+from checkpoint import ExtractionJournal, DEFAULT_CHECKPOINT_DIR
+import parquet_store
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crisis_shared.article_body import extract_article_body
+from crisis_shared.gazetteer import get_gazetteer
+from crisis_shared.log_pipeline import setup_logging
+from crisis_shared.metrics import REGISTRY, count, observe_stage, stage_timer
+from crisis_shared.profiling import add_profile_arguments, profile_from_args
+from crisis_shared.rate_limiter import AdaptiveRateLimiter
+
+# Per-host request rates learned by the rate limiter, kept between runs
+DEFAULT_RATE_STATE_FILE = 'data_files/rate_limits.json'
+
+
+# Classification rules, shared with the corpus reprocessing pass (reprocess.py).
+# The first incident type with a matching keyword wins.
+INCIDENT_TYPE_KEYWORDS = {
+    'casualties': ['killed', 'dead', 'death', 'casualties', 'bombing', 'strike', 'attack', 'journalist',
+                   'reporter'],
+    'hunger': ['starvation', 'malnutrition', 'hunger', 'food', 'famine'],
+    'water': ['water', 'thirst', 'dehydration'],
+    'aid': ['aid', 'humanitarian', 'relief', 'supplies'],
+    'infrastructure': ['hospital', 'school', 'building', 'destroyed', 'damage']
+}
+DEFAULT_INCIDENT_TYPE = 'casualties'
+
+TAG_KEYWORDS = {
+    'children': ['child', 'children', 'kid', 'baby', 'infant'],
+    'journalist': ['journalist', 'reporter', 'media', 'press', 'al jazeera'],
+    'medical': ['doctor', 'nurse', 'medical', 'health', 'hospital'],
+    'civilian': ['civilian', 'resident', 'family'],
+    'airstrike': ['airstrike', 'bombing', 'bomb', 'missile', 'strike'],
+    'artillery': ['artillery', 'shell', 'shelling'],
+    'evacuation': ['evacuation', 'flee', 'escape', 'displaced']
+}
+DEFAULT_TAG = 'general'
+
+# Casualty patterns: the largest number matched by any pattern of a type wins
+CASUALTY_PATTERNS = {
+    'casualties_deaths': [
+        r'(\d+).*?(?:killed|dead|deaths?|died|fatalities)',
+        r'(?:killed|dead|deaths?|died|fatalities).*?(\d+)',
+        r'(\d+).*?(?:people|persons|individuals).*?(?:killed|dead|died)',
+        r'(?:killing|killed).*?(\d+)',
+        r'(\d+).*?journalists.*?(?:killed|dead)',
+        r'(?:among|including).*?(\d+).*?(?:killed|dead)',
+        r'death.*?toll.*?(\d+)',
+        r'(\d+).*?(?:have been|were).*?killed'
+    ],
+    'casualties_injured': [
+        r'(\d+).*?(?:injured|wounded|hurt)',
+        r'(?:injured|wounded|hurt).*?(\d+)',
+        r'(\d+).*?(?:people|persons).*?(?:injured|wounded)',
+        r'(?:injuring|wounding).*?(\d+)'
+    ],
+    'casualties_hospitalized': [
+        r'(\d+).*?(?:hospitalized|admitted|taken to hospital)',
+        r'(?:hospitalized|admitted|taken to hospital).*?(\d+)'
+    ]
+}
+
+# Journalist casualties count as deaths
+JOURNALIST_PATTERNS = [
+    r'(\d+).*?(?:al.?jazeera|journalist|reporter|media).*?(?:killed|dead)',
+    r'(?:al.?jazeera|journalist|reporter|media).*?(\d+).*?(?:killed|dead)',
+    r'(\d+).*?(?:killed|dead).*?(?:al.?jazeera|journalist|reporter|media)',
+    r'(?:among|including).*?(\d+).*?(?:al.?jazeera|journalist)',
+    r'(\d+).*?(?:journalists|reporters|media personnel).*?(?:killed|dead)'
+]
+
+_COMPILED_CASUALTY_PATTERNS = {casualty_type: [re.compile(pattern, re.IGNORECASE) for pattern in pattern_list]
+                               for casualty_type, pattern_list in CASUALTY_PATTERNS.items()}
+_COMPILED_JOURNALIST_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in JOURNALIST_PATTERNS]
+
+
+def _largest_match(patterns, text):
+    numbers = [int(match) for pattern in patterns for match in pattern.findall(text) if str(match).isdigit()]
+    return max(numbers, default=0)
+
+
+def extract_casualties(text):
+    """Casualty figures mentioned in a text (0 where none are found)"""
+    casualties = {
+        'casualties_affected': 0,
+        'casualties_critical': 0,
+        'casualties_deaths': 0,
+        'casualties_injured': 0,
+        'casualties_hospitalized': 0
+    }
+
+    if not text:
+        return casualties
+
+    text_lower = text.lower()
+
+    # Check for journalist casualties first, then the general patterns
+    casualties['casualties_deaths'] = _largest_match(_COMPILED_JOURNALIST_PATTERNS, text_lower)
+    for casualty_type, patterns in _COMPILED_CASUALTY_PATTERNS.items():
+        casualties[casualty_type] = max(casualties[casualty_type], _largest_match(patterns, text_lower))
+
+    # Set affected as maximum of all casualty types
+    casualties['casualties_affected'] = max(
+        casualties['casualties_deaths'],
+        casualties['casualties_injured'],
+        casualties['casualties_hospitalized']
+    )
+
+    return casualties
 
 
 class GazaCrisisExtractor:
     def __init__(self, config_path='config.yaml'):
         """Initialize the Gaza Crisis Data Extractor"""
         self.config = self.load_config(config_path)
-        self.setup_logging()
         self.setup_directories()
+        self.setup_logging()
+        # Journal of the current extract_from_urls run (see checkpoint.py)
+        self.checkpoint = None
+        self.rate_limiter = self.setup_rate_limiter()
 
     def load_config(self, config_path):
         """Load configuration from YAML file"""
@@ -29,11 +147,36 @@ class GazaCrisisExtractor:
                 'extraction': {
                     'delay_between_requests': 2,
                     'timeout': 30,
-                    'max_retries': 3
+                    'max_retries': 3,
+                    'rate_limit': {
+                        'min_delay': 0.5,
+                        'max_delay': 60,
+                        'respect_robots': True,
+                        'state_file': DEFAULT_RATE_STATE_FILE
+                    }
                 },
                 'output': {
                     'csv_filename': 'gaza_crisis_data.csv',
-                    'backup_enabled': True
+                    'backup_enabled': True,
+                    'changelog_file': DEFAULT_CHANGELOG
+                },
+                'backup': {
+                    'store_dir': DEFAULT_STORE_DIR
+                },
+                'search': {
+                    'enabled': True,
+                    'index_path': DEFAULT_INDEX_PATH
+                },
+                'rollups': {
+                    'enabled': True,
+                    'store_dir': DEFAULT_ROLLUP_DIR
+                },
+                'parquet': {
+                    'enabled': False,
+                    'dataset_dir': parquet_store.DEFAULT_DATASET_DIR
+                },
+                'checkpoint': {
+                    'dir': DEFAULT_CHECKPOINT_DIR
                 },
                 'logging': {
                     'level': 'INFO',
@@ -43,19 +186,36 @@ class GazaCrisisExtractor:
 
     def setup_logging(self):
         """Setup logging configuration"""
-        log_level = getattr(logging, self.config['logging']['level'])
-        log_filename = os.path.join('data_files/extraction_logs', self.config['logging']['filename'])
-
-        logging.basicConfig(
-            level=log_level,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_filename, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
+        log_config = self.config['logging']
+        log_filename = os.path.join('data_files/extraction_logs', log_config['filename'])
+        rotate_hours = log_config.get('rotate_interval_hours')
+
+        # Records are written by a background thread, so logging never blocks extraction on disk I/O
+        setup_logging(
+            log_file=log_filename,
+            level=log_config['level'],
+            max_bytes=int(log_config.get('max_file_size', 10) * 1024 * 1024),
+            backup_count=log_config.get('backup_count', 5),
+            rotate_seconds=rotate_hours * 3600 if rotate_hours else None,
+            compress=log_config.get('compress', True),
+            json_format=log_config.get('json', True),
+            sampling=log_config.get('sampling')
         )
         self.logger = logging.getLogger(__name__)
 
+    def setup_rate_limiter(self):
+        """Per-host adaptive limiter starting at delay_between_requests (see crisis_shared/rate_limiter.py)"""
+        extraction = self.config['extraction']
+        rate_config = extraction.get('rate_limit', {})
+        return AdaptiveRateLimiter(
+            delay=extraction['delay_between_requests'],
+            min_delay=rate_config.get('min_delay', 0.5),
+            max_delay=rate_config.get('max_delay', 60),
+            state_file=rate_config.get('state_file', DEFAULT_RATE_STATE_FILE),
+            respect_robots=rate_config.get('respect_robots', True),
+            user_agent=extraction.get('user_agent', '*')
+        )
+
     def setup_directories(self):
         """Create necessary directories if they don't exist"""
         directories = [
@@ -70,6 +230,7 @@ class GazaCrisisExtractor:
     def extract_article_data(self, url):
         """Extract data from a single article URL"""
         self.logger.info(f"Extracting data from: {url}")
+        host = urlparse(url).netloc
 
         try:
             # Make request with headers to appear like a real browser
@@ -82,14 +243,29 @@ class GazaCrisisExtractor:
                 'Upgrade-Insecure-Requests': '1',
             }
 
-            response = requests.get(
-                url,
-                headers=headers,
-                timeout=self.config['extraction']['timeout']
-            )
+            self.rate_limiter.wait(url)
+            start = time.perf_counter()
+            try:
+                response = requests.get(
+                    url,
+                    headers=headers,
+                    timeout=self.config['extraction']['timeout']
+                )
+            except (requests.Timeout, requests.ConnectionError):
+                self.rate_limiter.record(url, error=True)
+                raise
+            # requests only exposes time-to-headers (DNS, connect, server wait); the rest is the body download
+            elapsed = response.elapsed.total_seconds()
+            self.rate_limiter.record(url, status=response.status_code, latency=elapsed,
+                                     retry_after=response.headers.get('Retry-After'))
+            observe_stage('response', elapsed, host=host)
+            observe_stage('download', max(0.0, time.perf_counter() - start - elapsed), host=host)
+            count('extraction_requests_total', 'Article requests by host and status', host=host,
+                  status=response.status_code)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+            with stage_timer('parse'):
+                soup = BeautifulSoup(response.content, 'html.parser')
 
             # Extract article data based on Al Jazeera structure
             data = self.parse_aljazeera_article(soup, url)
@@ -103,9 +279,11 @@ class GazaCrisisExtractor:
 
         except requests.RequestException as e:
             self.logger.error(f"Request failed for {url}: {str(e)}")
+            count('extraction_errors_total', 'Failed extractions by host and kind', host=host, kind='request')
             return None
         except Exception as e:
             self.logger.error(f"Extraction failed for {url}: {str(e)}")
+            count('extraction_errors_total', 'Failed extractions by host and kind', host=host, kind='extraction')
             return None
 
     def parse_aljazeera_article(self, soup, url):
@@ -172,61 +350,31 @@ class GazaCrisisExtractor:
                         data['time'] = parsed_date['time']
                         break
 
-        # Enhanced content extraction with multiple selectors
-        content_selectors = [
-            'div[data-component="ArticleBody"]',
-            'div.article-body',
-            'div.wysiwyg',
-            'div.content',
-            'article div.text',
-            'main article',
-            '.post-content',
-            '[data-testid="post-content"]'
-        ]
-
-        content_text = ""
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                # Get all paragraphs within the content
-                paragraphs = content_elem.find_all(['p', 'div'], string=True)
-                if paragraphs:
-                    content_text = ' '.join([p.get_text(strip=True) for p in paragraphs])
-                else:
-                    content_text = content_elem.get_text(separator=' ', strip=True)
-
-                if content_text and len(content_text) > 50:  # Ensure we got substantial content
-                    break
-
-        # If specific selectors fail, try getting all paragraphs
-        if not content_text or len(content_text) < 50:
-            paragraphs = soup.find_all('p')
-            if paragraphs:
-                content_text = ' '.join(
-                    [p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 20])
-
-        # Final fallback: get all text from body
-        if not content_text:
-            body = soup.find('body')
-            if body:
-                content_text = body.get_text(separator=' ', strip=True)
+        # Article body from the shared text-density extractor (single pass over the page)
+        with stage_timer('body'):
+            content_text = extract_article_body(soup)['text']
 
         data['description'] = self.clean_text(content_text)[:2000]  # Increased limit for better context
 
-        # Extract location from title and content
-        location = self.extract_location(data['title'], data['description'])
-        data['location_name'] = location
+        # Extract location and its coordinates from title and content
+        with stage_timer('location'):
+            place = self.resolve_location(data['title'], data['description'])
+        data['location_name'] = place.name
+        data['location_coordinates_lat'] = place.lat
+        data['location_coordinates_lng'] = place.lng
 
         # Enhanced casualty extraction from both title and description
         full_text = f"{data['title']} {data['description']}"
-        casualties = self.extract_casualties_from_text(full_text)
+        with stage_timer('regex'):
+            casualties = self.extract_casualties_from_text(full_text)
         data.update(casualties)
 
-        # Determine incident type based on content
-        data['type'] = self.classify_incident_type(data['title'], data['description'])
+        with stage_timer('classify'):
+            # Determine incident type based on content
+            data['type'] = self.classify_incident_type(data['title'], data['description'])
 
-        # Extract tags based on content
-        data['tags'] = self.extract_tags(data['title'], data['description'])
+            # Extract tags based on content
+            data['tags'] = self.extract_tags(data['title'], data['description'])
 
         # Set source as Al Jazeera
         data['sources'] = 'Al Jazeera'
@@ -235,33 +383,31 @@ class GazaCrisisExtractor:
         data['verified'] = 'verified'
 
         # Debug logging
-        self.logger.info(f"Extracted title: {data['title']}")
-        self.logger.info(f"Content length: {len(data['description'])}")
-        self.logger.info(f"Casualties found: {casualties}")
+        self.logger.debug(f"Extracted title: {data['title']}")
+        self.logger.debug(f"Content length: {len(data['description'])}")
+        self.logger.debug(f"Casualties found: {casualties}")
 
         return data
 
     def generate_incident_id(self, url):
-        """Generate unique incident ID from URL"""
+        """Generate a stable incident ID from the URL (the same article always gets the same ID)"""
         # Extract meaningful part from URL
         parsed_url = urlparse(url)
         path_parts = parsed_url.path.strip('/').split('/')
 
-        # Use date and article identifier
-        if len(path_parts) >= 4:  # Expected: /news/YYYY/M/DD/article-name
-            try:
-                year = int(path_parts[1]) if path_parts[1].isdigit() else datetime.now().year
-                month = int(path_parts[2]) if path_parts[2].isdigit() else datetime.now().month
-                day = int(path_parts[3]) if path_parts[3].isdigit() else datetime.now().day
-
-                # Create ID format: gaza-YYYY-MM-DD-XXX
-                incident_id = f"gaza-{year}-{month:02d}-{day:02d}-{abs(hash(url)) % 1000:03d}"
-            except (ValueError, IndexError):
-                # Fallback if path parsing fails
-                incident_id = f"gaza-{datetime.now().strftime('%Y-%m-%d')}-{abs(hash(url)) % 1000:03d}"
+        # Hash host and path only, so tracking parameters don't create a second incident.
+        # hashlib rather than hash(): str hashes are randomised per process.
+        canonical = f"{parsed_url.netloc.lower()}/{parsed_url.path.strip('/')}"
+        url_hash = hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:6]
+
+        # Dated form only when the URL carries the date: /news/YYYY/M/DD/article-name
+        # (anything else would fall back to today's date and change the ID on every run)
+        if len(path_parts) >= 4 and all(part.isdigit() for part in path_parts[1:4]):
+            year, month, day = (int(part) for part in path_parts[1:4])
+            # Create ID format: gaza-YYYY-MM-DD-xxxxxx
+            incident_id = f"gaza-{year}-{month:02d}-{day:02d}-{url_hash}"
         else:
-            # Fallback ID generation
-            incident_id = f"gaza-{datetime.now().strftime('%Y-%m-%d')}-{abs(hash(url)) % 1000:03d}"
+            incident_id = f"gaza-{url_hash}"
 
         return incident_id
 
@@ -322,154 +468,40 @@ class GazaCrisisExtractor:
                 'time': now.strftime('%H:%M:%S')
             }
 
+    def resolve_location(self, title, description):
+        """Most specific gazetteer place mentioned in title and content (the Gaza Strip if none)"""
+        return get_gazetteer().resolve(f"{title} {description}")
+
     def extract_location(self, title, description):
         """Extract location information from title and content"""
-        # Common Gaza locations
-        gaza_locations = [
-            'Gaza City', 'Gaza', 'Rafah', 'Khan Younis', 'Khan Yunis', 'Deir al-Balah',
-            'Beit Hanoun', 'Beit Lahia', 'Jabalia', 'Jabaliya', 'Shejaiya', 'Zeitoun',
-            'Al-Maghazi', 'Al-Bureij', 'Nuseirat', 'Al-Zahra', 'Tal al-Hawa'
-        ]
-
-        text = f"{title} {description}".lower()
-
-        for location in gaza_locations:
-            if location.lower() in text:
-                return location
-
-        # Default to Gaza if no specific location found
-        return 'Gaza'
+        return self.resolve_location(title, description).name
 
     def extract_casualties_from_text(self, text):
         """Enhanced casualty extraction from text"""
-        casualties = {
-            'casualties_affected': 0,
-            'casualties_critical': 0,
-            'casualties_deaths': 0,
-            'casualties_injured': 0,
-            'casualties_hospitalized': 0
-        }
-
-        if not text:
-            return casualties
-
-        text_lower = text.lower()
-
-        # Enhanced patterns for different casualty types
-        patterns = {
-            'casualties_deaths': [
-                r'(\d+).*?(?:killed|dead|deaths?|died|fatalities)',
-                r'(?:killed|dead|deaths?|died|fatalities).*?(\d+)',
-                r'(\d+).*?(?:people|persons|individuals).*?(?:killed|dead|died)',
-                r'(?:killing|killed).*?(\d+)',
-                r'(\d+).*?journalists.*?(?:killed|dead)',
-                r'(?:among|including).*?(\d+).*?(?:killed|dead)',
-                r'death.*?toll.*?(\d+)',
-                r'(\d+).*?(?:have been|were).*?killed'
-            ],
-            'casualties_injured': [
-                r'(\d+).*?(?:injured|wounded|hurt)',
-                r'(?:injured|wounded|hurt).*?(\d+)',
-                r'(\d+).*?(?:people|persons).*?(?:injured|wounded)',
-                r'(?:injuring|wounding).*?(\d+)'
-            ],
-            'casualties_hospitalized': [
-                r'(\d+).*?(?:hospitalized|admitted|taken to hospital)',
-                r'(?:hospitalized|admitted|taken to hospital).*?(\d+)'
-            ]
-        }
-
-        # Special handling for journalist casualties
-        journalist_patterns = [
-            r'(\d+).*?(?:al.?jazeera|journalist|reporter|media).*?(?:killed|dead)',
-            r'(?:al.?jazeera|journalist|reporter|media).*?(\d+).*?(?:killed|dead)',
-            r'(\d+).*?(?:killed|dead).*?(?:al.?jazeera|journalist|reporter|media)',
-            r'(?:among|including).*?(\d+).*?(?:al.?jazeera|journalist)',
-            r'(\d+).*?(?:journalists|reporters|media personnel).*?(?:killed|dead)'
-        ]
-
-        # Check for journalist casualties first
-        for pattern in journalist_patterns:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            if matches:
-                try:
-                    num = max([int(match) for match in matches if match.isdigit()])
-                    casualties['casualties_deaths'] = max(casualties['casualties_deaths'], num)
-                    self.logger.info(f"Found journalist casualties: {num}")
-                except (ValueError, TypeError):
-                    continue
-
-        # Then check for general casualty patterns
-        for casualty_type, pattern_list in patterns.items():
-            max_found = 0
-            for pattern in pattern_list:
-                matches = re.findall(pattern, text_lower, re.IGNORECASE)
-                if matches:
-                    try:
-                        numbers = [int(match) for match in matches if str(match).isdigit()]
-                        if numbers:
-                            max_found = max(max_found, max(numbers))
-                    except (ValueError, TypeError):
-                        continue
-
-            if max_found > 0:
-                casualties[casualty_type] = max(casualties[casualty_type], max_found)
-                self.logger.info(f"Found {casualty_type}: {max_found}")
-
-        # Set affected as maximum of all casualty types
-        casualties['casualties_affected'] = max(
-            casualties['casualties_deaths'],
-            casualties['casualties_injured'],
-            casualties['casualties_hospitalized']
-        )
-
-        # Special case: if we found deaths but no affected, set affected to deaths
-        if casualties['casualties_deaths'] > 0 and casualties['casualties_affected'] == 0:
-            casualties['casualties_affected'] = casualties['casualties_deaths']
-
+        casualties = extract_casualties(text)
+        self.logger.debug(f"Casualty figures found: {casualties}")
         return casualties
 
     def classify_incident_type(self, title, description):
         """Classify incident type based on content"""
         text = f"{title} {description}".lower()
 
-        # Classification keywords
-        classifications = {
-            'casualties': ['killed', 'dead', 'death', 'casualties', 'bombing', 'strike', 'attack', 'journalist',
-                           'reporter'],
-            'hunger': ['starvation', 'malnutrition', 'hunger', 'food', 'famine'],
-            'water': ['water', 'thirst', 'dehydration'],
-            'aid': ['aid', 'humanitarian', 'relief', 'supplies'],
-            'infrastructure': ['hospital', 'school', 'building', 'destroyed', 'damage']
-        }
-
-        for incident_type, keywords in classifications.items():
+        for incident_type, keywords in INCIDENT_TYPE_KEYWORDS.items():
             if any(keyword in text for keyword in keywords):
                 return incident_type
 
-        return 'casualties'  # Default type
+        return DEFAULT_INCIDENT_TYPE
 
     def extract_tags(self, title, description):
         """Extract relevant tags from content"""
         text = f"{title} {description}".lower()
         tags = []
 
-        # Tag keywords
-        tag_keywords = {
-            'children': ['child', 'children', 'kid', 'baby', 'infant'],
-            'journalist': ['journalist', 'reporter', 'media', 'press', 'al jazeera'],
-            'medical': ['doctor', 'nurse', 'medical', 'health', 'hospital'],
-            'civilian': ['civilian', 'resident', 'family'],
-            'airstrike': ['airstrike', 'bombing', 'bomb', 'missile', 'strike'],
-            'artillery': ['artillery', 'shell', 'shelling'],
-            'evacuation': ['evacuation', 'flee', 'escape', 'displaced']
-        }
-
-        for tag, keywords in tag_keywords.items():
+        for tag, keywords in TAG_KEYWORDS.items():
             if any(keyword in text for keyword in keywords):
                 tags.append(tag)
 
-        return '|'.join(tags) if tags else 'general'
+        return '|'.join(tags) if tags else DEFAULT_TAG
 
     def clean_text(self, text):
         """Clean and normalize text"""
@@ -485,8 +517,11 @@ class GazaCrisisExtractor:
 
         return text
 
-    def save_to_csv(self, data_list, filename=None):
-        """Save extracted data to CSV file"""
+    def save_to_csv(self, data_list, filename=None, report=True):
+        """
+        Save extracted data to CSV file. Reports (report=True) are also added to
+        the search index and, if enabled, the Parquet dataset.
+        """
         if not data_list:
             self.logger.warning("No data to save")
             return False
@@ -507,7 +542,7 @@ class GazaCrisisExtractor:
                 'casualties_details_count', 'casualties_details_ids'
             ]
 
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+            with stage_timer('save'), open(filename, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.DictWriter(csvfile, fieldnames=headers)
                 writer.writeheader()
 
@@ -522,72 +557,182 @@ class GazaCrisisExtractor:
             if self.config['output']['backup_enabled']:
                 self.create_backup(filename)
 
+            if report:
+                self.index_report(filename)
+                self.save_to_parquet(data_list, filename)
+
             return True
 
         except Exception as e:
             self.logger.error(f"Failed to save CSV: {str(e)}")
             return False
 
-    def create_backup(self, filename):
-        """Create backup of the CSV file"""
+    def index_report(self, filename):
+        """Add a saved report to the full-text search index"""
+        search_config = self.config.get('search', {})
+        if not search_config.get('enabled', True):
+            return
+
+        try:
+            with stage_timer('index'):
+                indexed = SearchIndex(search_config.get('index_path', DEFAULT_INDEX_PATH)).index_file(filename)
+            self.logger.info(f"Indexed {indexed} incidents from {filename}")
+
+        except Exception as e:
+            self.logger.error(f"Failed to index {filename}: {str(e)}")
+
+    def update_rollups(self, diff, all_rows):
+        """Apply a merge's added and changed rows to the rollup counters (built from all rows on first use)"""
+        rollup_config = self.config.get('rollups', {})
+        if not rollup_config.get('enabled', True):
+            return
+
+        try:
+            store = RollupStore(rollup_config.get('store_dir', DEFAULT_ROLLUP_DIR))
+            if store.exists:
+                store.add_records(diff.added)
+                # An updated incident moves its counts: remove the old version, add the new one
+                for old, new, _ in diff.changed:
+                    store.add_record(old, sign=-1)
+                    store.add_record(new)
+                store.save()
+            else:
+                store.rebuild(all_rows)
+            self.logger.info(f"Rollups updated with {len(diff.added)} new and {len(diff.changed)} changed rows")
+
+        except Exception as e:
+            self.logger.error(f"Failed to update rollups: {str(e)}")
+
+    def record_changes(self, diff, source):
+        """Append added and updated incidents (with old -> new field values) to the changelog"""
+        try:
+            changelog = ChangeLog(self.config['output'].get('changelog_file', DEFAULT_CHANGELOG))
+            changelog.append(diff, source=os.path.basename(source))
+
+        except Exception as e:
+            self.logger.error(f"Failed to write changelog: {str(e)}")
+
+    def save_to_parquet(self, data_list, filename):
+        """Add a report to the partitioned Parquet dataset (optional, needs pyarrow)"""
+        parquet_config = self.config.get('parquet', {})
+        if not parquet_config.get('enabled', False):
+            return
+
+        if not parquet_store.available():
+            self.logger.warning("Parquet output is enabled but pyarrow is not installed; only the CSV was written")
+            return
+
         try:
-            import shutil
-            backup_filename = filename.replace('daily_reports', 'backups')
-            backup_filename = backup_filename.replace('.csv', f'_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
+            with stage_timer('parquet'):
+                written = parquet_store.write_report(
+                    data_list, os.path.splitext(os.path.basename(filename))[0],
+                    parquet_config.get('dataset_dir', parquet_store.DEFAULT_DATASET_DIR))
+            self.logger.info(f"Added {written} rows from {filename} to the Parquet dataset")
 
-            os.makedirs(os.path.dirname(backup_filename), exist_ok=True)
-            shutil.copy2(filename, backup_filename)
+        except Exception as e:
+            self.logger.error(f"Failed to write Parquet for {filename}: {str(e)}")
+
+    def create_backup(self, filename):
+        """Back up the CSV file into the deduplicated backup store"""
+        try:
+            store = BackupStore(self.config.get('backup', {}).get('store_dir', DEFAULT_STORE_DIR))
+            snapshot = store.backup([filename], label='report')
 
-            self.logger.info(f"Backup created: {backup_filename}")
+            self.logger.info(f"Backup created: snapshot {snapshot['id']}")
 
         except Exception as e:
             self.logger.error(f"Failed to create backup: {str(e)}")
 
-    def extract_from_urls(self, urls):
-        """Extract data from multiple URLs"""
+    def open_checkpoint(self, urls, resume=False):
+        """
+        Journal for a run over urls. With resume, records already journalled by an
+        interrupted run over the same URLs are kept; otherwise it starts empty.
+        """
+        checkpoint_dir = self.config.get('checkpoint', {}).get('dir', DEFAULT_CHECKPOINT_DIR)
+        self.checkpoint = ExtractionJournal.for_urls(urls, checkpoint_dir)
+        if not resume:
+            self.checkpoint.clear()
+        return self.checkpoint
+
+    def finish_checkpoint(self):
+        """Drop the journal of the last run once its records are saved"""
+        if self.checkpoint:
+            self.checkpoint.clear()
+            self.checkpoint = None
+
+    def extract_from_urls(self, urls, resume=False):
+        """Extract data from multiple URLs, journalling each one (see checkpoint.py)"""
         if isinstance(urls, str):
             urls = [urls]
 
+        journal = self.open_checkpoint(urls, resume)
+        completed = journal.completed()
+        if completed:
+            self.logger.info(f"Resuming: {len(completed)} of {len(urls)} URLs already extracted")
+
         extracted_data = []
 
         for i, url in enumerate(urls):
+            if url in completed:
+                extracted_data.append(completed[url])
+                continue
+
+            # Requests are spaced per host by self.rate_limiter
             self.logger.info(f"Processing URL {i + 1}/{len(urls)}: {url}")
 
             data = self.extract_article_data(url)
+            journal.record(url, data)
             if data:
                 extracted_data.append(data)
 
-            # Delay between requests to be respectful
-            if i < len(urls) - 1:
-                time.sleep(self.config['extraction']['delay_between_requests'])
-
+        self.rate_limiter.save()
         return extracted_data
 
-    def update_main_csv(self, new_data, main_csv_path='incidents.csv'):
-        """Update the main incidents.csv file with new data"""
+    def save_metrics_summary(self, filename=None):
+        """Write this process's extraction metrics (stage timings, request counts) as JSON"""
+        if filename is None:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f"data_files/daily_reports/extraction_metrics_{timestamp}.json"
+
+        try:
+            REGISTRY.write_json(filename)
+            self.logger.info(f"Metrics summary saved to {filename}")
+            return filename
+        except Exception as e:
+            self.logger.error(f"Failed to save metrics summary: {str(e)}")
+            return None
+
+    def update_main_csv(self, new_data, main_csv_path='incidents.csv', keep_missing=True):
+        """
+        Merge new data into the main incidents.csv file, updating incidents that
+        were extracted before (see record_diff.upsert for keep_missing)
+        """
         try:
             existing_data = []
-            existing_ids = set()
+            id_index = {}
 
             # Read existing data if file exists
             if os.path.exists(main_csv_path):
                 with open(main_csv_path, 'r', encoding='utf-8') as csvfile:
                     reader = csv.DictReader(csvfile)
                     for row in reader:
+                        id_index[row['id']] = len(existing_data)
                         existing_data.append(row)
-                        existing_ids.add(row['id'])
-
-            # Add new data (avoiding duplicates)
-            new_entries = 0
-            for data in new_data:
-                if data['id'] not in existing_ids:
-                    existing_data.append(data)
-                    existing_ids.add(data['id'])
-                    new_entries += 1
-
-            # Save updated data
-            if self.save_to_csv(existing_data, main_csv_path):
-                self.logger.info(f"Updated main CSV with {new_entries} new entries")
+
+            # Add new incidents and update known ones in place (e.g. a death toll that has risen)
+            diff = upsert(existing_data, id_index, new_data, keep_missing)
+            if not diff.has_changes:
+                self.logger.info(f"Main CSV already up to date ({diff.unchanged} unchanged entries)")
+                return True
+
+            # Save updated data (the new rows were indexed and exported when their report was saved)
+            if self.save_to_csv(existing_data, main_csv_path, report=False):
+                self.logger.info(f"Updated main CSV: {len(diff.added)} new, {len(diff.changed)} updated, "
+                                 f"{diff.unchanged} unchanged entries")
+                if diff.renamed:
+                    self.logger.info(f"Moved {len(diff.renamed)} incidents from old-style ids to their current ids")
+                self.record_changes(diff, main_csv_path)
+                self.update_rollups(diff, existing_data)
                 return True
 
             return False
@@ -606,39 +751,50 @@ def main():
     parser.add_argument('--config', default='config.yaml', help='Config file path')
     parser.add_argument('--output', help='Output CSV file path')
     parser.add_argument('--update-main', action='store_true', help='Update main incidents.csv file')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip URLs already extracted by an interrupted run over the same URLs')
+    add_profile_arguments(parser, default_dir='data_files/daily_reports')
 
     args = parser.parse_args()
 
-    # Initialize extractor
-    extractor = GazaCrisisExtractor(args.config)
+    with profile_from_args(args, 'daily_extractor'):
+        # Initialize extractor
+        extractor = GazaCrisisExtractor(args.config)
 
-    # Extract data
-    print(f"Extracting data from {len(args.urls)} URL(s)...")
-    extracted_data = extractor.extract_from_urls(args.urls)
+        # Extract data
+        print(f"Extracting data from {len(args.urls)} URL(s)...")
+        extracted_data = extractor.extract_from_urls(args.urls, resume=args.resume)
 
-    if extracted_data:
-        print(f"Successfully extracted data from {len(extracted_data)} articles")
+        if extracted_data:
+            print(f"Successfully extracted data from {len(extracted_data)} articles")
 
-        # Save data
-        if args.output:
-            extractor.save_to_csv(extracted_data, args.output)
+            # Save data
+            if args.output:
+                saved = extractor.save_to_csv(extracted_data, args.output)
+            else:
+                saved = extractor.save_to_csv(extracted_data)
+
+            # Update main CSV if requested
+            if args.update_main:
+                saved = extractor.update_main_csv(extracted_data) and saved
+
+            # Keep the journal for --resume unless everything was saved
+            if saved:
+                extractor.finish_checkpoint()
+
+            print("Data extraction completed successfully!")
+
+            # Print extracted data for debugging
+            for data in extracted_data:
+                print(f"\nExtracted incident: {data['id']}")
+                print(f"Title: {data['title']}")
+                print(f"Deaths: {data['casualties_deaths']}")
+                print(f"Description length: {len(data['description'])}")
         else:
-            extractor.save_to_csv(extracted_data)
-
-        # Update main CSV if requested
-        if args.update_main:
-            extractor.update_main_csv(extracted_data)
-
-        print("Data extraction completed successfully!")
-
-        # Print extracted data for debugging
-        for data in extracted_data:
-            print(f"\nExtracted incident: {data['id']}")
-            print(f"Title: {data['title']}")
-            print(f"Deaths: {data['casualties_deaths']}")
-            print(f"Description length: {len(data['description'])}")
-    else:
-        print("No data was extracted. Check the logs for details.")
+            print("No data was extracted. Check the logs for details.")
+
+        # Where the run's time went, per stage and host
+        extractor.save_metrics_summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Optional Parquet output for extraction reports.
+
+Reports are appended to one Hive-partitioned dataset:
+    <dataset_dir>/month=2025-08/type=casualties/<report name>-0.parquet
+
+Columns are typed (dates as date32, coordinates as float64, casualty counts as
+int32), location_name, sources and verified are dictionary-encoded (type is
+a partition key, so each value is stored once, in the path), and files are
+zstd-compressed. read_dataset() prunes month/type partitions and uses the
+row-group statistics of `date` for the remaining date filter, and only reads
+the requested columns.
+
+Requires pyarrow; when it isn't installed, writing is skipped (the CSV
+reports are always written) and reading raises ParquetUnavailable.
+
+Usage:
+    python parquet_store.py convert data_files/daily_reports/*.csv
+    python parquet_store.py query --columns id,date,casualties_deaths --from 2025-08-01 --type casualties
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+from datetime import date
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+from rollups import record_day
+
+DEFAULT_DATASET_DIR = 'data_files/parquet/reports'
+
+# Columns in CSV order with their Arrow type names; `type` becomes a partition key
+COLUMNS = [
+    ('id', 'string'), ('title', 'string'), ('date', 'date'), ('time', 'string'),
+    ('location_name', 'dict'), ('location_coordinates_lat', 'float'), ('location_coordinates_lng', 'float'),
+    ('type', 'string'), ('description', 'string'),
+    ('casualties_affected', 'int'), ('casualties_critical', 'int'), ('casualties_deaths', 'int'),
+    ('casualties_injured', 'int'), ('casualties_hospitalized', 'int'),
+    ('evidence_types', 'string'), ('evidence_urls', 'string'), ('evidence_descriptions', 'string'),
+    ('sources', 'dict'), ('verified', 'dict'), ('tags', 'string'), ('last_updated', 'string'),
+    ('casualties_details_count', 'int'), ('casualties_details_ids', 'string')
+]
+
+PARTITION_COLUMNS = ('month', 'type')
+
+# Rows with no usable date (nor last_updated) go to this month partition
+UNDATED = 'undated'
+
+
+class ParquetUnavailable(RuntimeError):
+    """pyarrow is not installed"""
+
+
+def available():
+    return pa is not None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ParquetUnavailable("pyarrow is not installed (pip install pyarrow)")
+
+
+def arrow_schema():
+    _require_pyarrow()
+    types = {
+        'string': pa.string(),
+        'date': pa.date32(),
+        'float': pa.float64(),
+        'int': pa.int32(),
+        'dict': pa.dictionary(pa.int32(), pa.string())
+    }
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS] + [('month', pa.string())])
+
+
+def _convert(value, kind):
+    """CSV cell (or extractor value) -> Python value for the Arrow column, None when empty or invalid"""
+    if value is None or value == '':
+        return None
+    try:
+        if kind == 'int':
+            return int(float(value))
+        if kind == 'float':
+            return float(value)
+        if kind == 'date':
+            return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+    return str(value)
+
+
+def rows_to_table(rows):
+    """Arrow table of report rows (dicts with the CSV columns) plus the month partition column"""
+    records = []
+    for row in rows:
+        record = {name: _convert(row.get(name), kind) for name, kind in COLUMNS}
+        record['type'] = record['type'] or 'unknown'
+        # Partition by the article month, falling back to when the row was extracted
+        day = record_day(row)
+        record['month'] = day.strftime('%Y-%m') if day else UNDATED
+        records.append(record)
+    return pa.Table.from_pylist(records, schema=arrow_schema())
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS]), flavor='hive')
+
+
+def write_report(rows, name, dataset_dir=DEFAULT_DATASET_DIR, compression='zstd'):
+    """
+    Add one report's rows to the dataset as <name>-<n>.parquet in each partition
+    it touches; writing the same report name again replaces those files.
+    Returns the number of rows written.
+    """
+    _require_pyarrow()
+    table = rows_to_table(rows)
+    if table.num_rows == 0:
+        return 0
+
+    file_options = ds.ParquetFileFormat().make_write_options(
+        compression=compression,
+        use_dictionary=[name for name, kind in COLUMNS if kind == 'dict']
+    )
+    ds.write_dataset(
+        table, dataset_dir,
+        format='parquet',
+        partitioning=_partitioning(),
+        basename_template=f"{name}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+        file_options=file_options
+    )
+    return table.num_rows
+
+
+def build_filter(date_from=None, date_to=None, types=None):
+    """Dataset filter: month bounds prune partitions, date bounds use row-group statistics"""
+    expression = None
+
+    def both(left, right):
+        return right if left is None else left & right
+
+    if date_from:
+        start = date.fromisoformat(date_from)
+        expression = both(expression, (ds.field('month') >= start.strftime('%Y-%m')) & (ds.field('date') >= start))
+    if date_to:
+        end = date.fromisoformat(date_to)
+        expression = both(expression, (ds.field('month') <= end.strftime('%Y-%m')) & (ds.field('date') <= end))
+    if types:
+        expression = both(expression, ds.field('type').isin(list(types)))
+    return expression
+
+
+def read_dataset(dataset_dir=DEFAULT_DATASET_DIR, columns=None, date_from=None, date_to=None, types=None):
+    """Arrow table with only the requested columns of rows matching the filters"""
+    _require_pyarrow()
+    dataset = ds.dataset(dataset_dir, format='parquet', partitioning=_partitioning())
+    return dataset.to_table(columns=columns, filter=build_filter(date_from, date_to, types))
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Partitioned Parquet dataset of extraction reports')
+    parser.add_argument('--dataset', default=DEFAULT_DATASET_DIR, help='Dataset directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='Add report CSVs to the dataset')
+    convert_parser.add_argument('csv', nargs='+', help='Report CSV files')
+
+    query_parser = subparsers.add_parser('query', help='Read rows from the dataset')
+    query_parser.add_argument('--columns', help='Comma-separated columns (default: all)')
+    query_parser.add_argument('--from', dest='date_from', help='First date (YYYY-MM-DD)')
+    query_parser.add_argument('--to', dest='date_to', help='Last date (YYYY-MM-DD)')
+    query_parser.add_argument('--type', action='append', help='Incident type (repeatable)')
+    query_parser.add_argument('--limit', type=int, default=20, help='Rows to print')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if not available():
+        parser.error("pyarrow is not installed (pip install pyarrow)")
+
+    if args.command == 'convert':
+        for path in args.csv:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                written = write_report(list(csv.DictReader(f)), os.path.splitext(os.path.basename(path))[0],
+                                       args.dataset)
+            print(f"{path}: {written} rows")
+
+    elif args.command == 'query':
+        columns = args.columns.split(',') if args.columns else None
+        table = read_dataset(args.dataset, columns, args.date_from, args.date_to, args.type)
+        print(f"{table.num_rows} rows")
+        for row in table.slice(0, args.limit).to_pylist():
+            print(json.dumps(row, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Record-level diffs between extraction runs.
+
+Re-extracting an article gives a row with the same id (see
+GazaCrisisExtractor.generate_incident_id) but possibly updated figures.
+upsert() merges such rows into the stored ones through an id -> position
+index, and returns a RecordDiff listing added rows and changed fields
+(old -> new), which ChangeLog appends to a JSONL changelog.
+
+Merging keeps the stored value when the new extraction left a field empty
+(or a casualty figure at 0, which is what the extractor reports when it finds
+no number), so a parse that misses a figure doesn't erase it. last_updated
+is never treated as a change on its own.
+
+Rows stored under an older id scheme are adopted by the first re-extraction
+of the same article and renamed to its current id, instead of being left next
+to a duplicate:
+  - gaza-<date>-NNN ids (3 digits) came from Python's per-process hash() and
+    can't be recomputed; they are matched on the normalised title.
+  - gaza-<date>-xxxxxx ids whose date was the extraction day (URLs without a
+    date in the path) are matched on the URL hash they end with plus the title.
+Renames are logged as 'renamed' changelog entries.
+
+Usage:
+    python record_diff.py diff old.csv new.csv
+    python record_diff.py history <incident id> [--changelog data_files/changelog/incident_changes.jsonl]
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+from csv_summary import to_number
+
+DEFAULT_CHANGELOG = 'data_files/changelog/incident_changes.jsonl'
+
+# Fields that change on every extraction and don't make a record "changed" by themselves
+IGNORED_FIELDS = {'last_updated'}
+
+# Ids from before the URL hash was stable (3 digits of hash(), which is randomised per process)
+LEGACY_ID_PATTERN = re.compile(r'^gaza-\d+-\d+-\d+-\d{3}$')
+
+# Current ids end with 6 hex digits of the URL's sha1 (see GazaCrisisExtractor.generate_incident_id)
+URL_HASH_PATTERN = re.compile(r'^gaza-(?:.*-)?([0-9a-f]{6})$')
+
+
+def normalize(value):
+    """Comparable form of a cell: CSV strings and extractor values (28 vs '28' vs '28.0') compare equal"""
+    if value is None:
+        return ''
+    number = to_number(value)
+    # NaN never equals itself, so it stays a string
+    if number is not None and number == number:
+        return number
+    return str(value).strip()
+
+
+class RecordDiff:
+    """Outcome of merging a batch of rows: added rows, (old, new, changes) updates and unchanged count"""
+
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.unchanged = 0
+        self.renamed = []
+
+    @property
+    def has_changes(self):
+        return bool(self.added or self.changed or self.renamed)
+
+    def summary(self):
+        return {'added': len(self.added), 'changed': len(self.changed), 'unchanged': self.unchanged,
+                'renamed': len(self.renamed)}
+
+
+def is_missing(field, value):
+    value = normalize(value)
+    return value == '' or (field.startswith('casualties_') and value == 0)
+
+
+def merge_record(old, new, keep_missing=True):
+    """New row on top of the old one, keeping old values where the new row has none (unless keep_missing=False)"""
+    merged = dict(old)
+    for field, value in new.items():
+        if not keep_missing or field not in old or not is_missing(field, value):
+            merged[field] = value
+    return merged
+
+
+def field_changes(old, new):
+    """{field: (old, new)} for fields whose normalised values differ"""
+    changes = {}
+    for field in set(old) | set(new):
+        if field in IGNORED_FIELDS:
+            continue
+        if normalize(old.get(field)) != normalize(new.get(field)):
+            changes[field] = (old.get(field, ''), new.get(field, ''))
+    return changes
+
+
+def title_key(title):
+    return ' '.join(str(title or '').lower().split())
+
+
+def alias_keys(record_id, title):
+    """Keys a row of the same article stored under an older id is found by (see legacy_aliases)"""
+    title = title_key(title)
+    if not title:
+        return []
+    keys = [('title', title)]
+    match = URL_HASH_PATTERN.match(record_id or '')
+    if match:
+        keys.insert(0, ('hash', match.group(1), title))
+    return keys
+
+
+def legacy_aliases(rows):
+    """
+    {alias key: position} for stored rows: ('title', title) for legacy ids, and
+    ('hash', url hash, title) for hashed ids, so a row whose id embedded the
+    extraction date is found by the undated id of the same URL (the title is
+    part of the key because 6 hex digits can collide)
+    """
+    aliases = {}
+    for position, row in enumerate(rows):
+        record_id = row.get('id') or ''
+        title = title_key(row.get('title'))
+        if not title:
+            continue
+        if LEGACY_ID_PATTERN.match(record_id):
+            aliases.setdefault(('title', title), position)
+        else:
+            match = URL_HASH_PATTERN.match(record_id)
+            if match:
+                aliases.setdefault(('hash', match.group(1), title), position)
+    return aliases
+
+
+def upsert(rows, index, new_rows, keep_missing=True):
+    """
+    Merge new_rows into rows in place. index maps id -> position in rows and is
+    kept up to date. keep_missing=False lets new empty/zero values overwrite
+    (for authoritative recomputations such as reprocess.py). A new row whose id
+    is unknown adopts a stored row of the same article under an older id (see
+    the module docstring). Returns a RecordDiff.
+    """
+    diff = RecordDiff()
+    aliases = None
+    for new in new_rows:
+        record_id = new.get('id')
+        position = index.get(record_id)
+
+        if position is None:
+            if aliases is None:
+                aliases = legacy_aliases(rows)
+            position = next((aliases[key] for key in alias_keys(record_id, new.get('title')) if key in aliases), None)
+            if position is not None:
+                old_id = rows[position].get('id')
+                # Only the first re-extraction may claim the row
+                for alias in [alias for alias, adopted in aliases.items() if adopted == position]:
+                    del aliases[alias]
+                if index.get(old_id) == position:
+                    del index[old_id]
+                index[record_id] = position
+                rows[position] = dict(rows[position], id=record_id)
+                diff.renamed.append((old_id, record_id))
+
+        if position is None:
+            index[record_id] = len(rows)
+            rows.append(new)
+            diff.added.append(new)
+            continue
+
+        old = rows[position]
+        merged = merge_record(old, new, keep_missing)
+        changes = field_changes(old, merged)
+        if changes:
+            rows[position] = merged
+            diff.changed.append((old, merged, changes))
+        else:
+            diff.unchanged += 1
+
+    return diff
+
+
+def diff_rows(old_rows, new_rows, keep_missing=True):
+    """RecordDiff of new_rows against old_rows without modifying either"""
+    rows = list(old_rows)
+    return upsert(rows, {row.get('id'): i for i, row in enumerate(rows)}, new_rows, keep_missing)
+
+
+class ChangeLog:
+    """Append-only JSONL log of record additions and field changes"""
+
+    def __init__(self, path=DEFAULT_CHANGELOG):
+        self.path = path
+
+    def append(self, diff, source=None):
+        """Write one line per added or changed record; returns the number of lines written"""
+        if not diff.has_changes:
+            return 0
+
+        timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        lines = []
+        for old_id, new_id in diff.renamed:
+            lines.append({'at': timestamp, 'id': new_id, 'change': 'renamed', 'source': source,
+                          'previous_id': old_id})
+        for row in diff.added:
+            lines.append({'at': timestamp, 'id': row.get('id'), 'change': 'added', 'source': source})
+        for old, new, changes in diff.changed:
+            lines.append({
+                'at': timestamp,
+                'id': new.get('id'),
+                'change': 'updated',
+                'source': source,
+                'previous_update': old.get('last_updated'),
+                'fields': {field: {'old': before, 'new': after} for field, (before, after) in sorted(changes.items())}
+            })
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False, default=str) + '\n')
+        return len(lines)
+
+    def history(self, record_id):
+        """Every logged change of one record (including its rename, when given an old id), oldest first"""
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                # Cheap substring check before parsing every line of a long log
+                if record_id in line:
+                    entry = json.loads(line)
+                    if record_id in (entry.get('id'), entry.get('previous_id')):
+                        entries.append(entry)
+        return entries
+
+
+def read_csv(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Record-level diffs between extraction runs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    diff_parser = subparsers.add_parser('diff', help='Show records added or changed between two CSVs')
+    diff_parser.add_argument('old', help='Earlier CSV')
+    diff_parser.add_argument('new', help='Later CSV')
+
+    history_parser = subparsers.add_parser('history', help='Show the logged changes of one incident')
+    history_parser.add_argument('id', help='Incident id')
+    history_parser.add_argument('--changelog', default=DEFAULT_CHANGELOG, help='Changelog file')
+
+    args = parser.parse_args()
+
+    if args.command == 'diff':
+        diff = diff_rows(read_csv(args.old), read_csv(args.new))
+        for row in diff.added:
+            print(f"+ {row.get('id')}: {row.get('title', '')[:80]}")
+        for _, new, changes in diff.changed:
+            print(f"~ {new.get('id')}")
+            for field, (before, after) in sorted(changes.items()):
+                print(f"    {field}: {str(before)[:60]!r} -> {str(after)[:60]!r}")
+        print(json.dumps(diff.summary()))
+
+    elif args.command == 'history':
+        for entry in ChangeLog(args.changelog).history(args.id):
+            print(json.dumps(entry, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Re-run the classification, tag and casualty rules of daily_extractor.py over
+a stored corpus (incidents.csv by default), e.g. after a rules change.
+
+Rows are processed in batches. Keyword rules (incident type and tags) run as
+one compiled alternation per category over the batch's texts joined into a
+single buffer, with matches mapped back to rows by offset; the casualty
+regexes run in a process pool. Each finished batch is appended to a results
+file and recorded in a checkpoint, so an interrupted run resumes where it
+stopped (unless the CSV or the rules changed meanwhile). Results are written
+back through GazaCrisisExtractor.update_main_csv, so the changelog and
+rollups see the changes. Only the fields the rules derive (type, tags and
+the deaths/injured/hospitalized/affected figures) are written.
+
+Usage:
+    python reprocess.py [incidents.csv] [--batch-size 2000] [--workers 4] [--dry-run] [--restart]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+from daily_extractor import (GazaCrisisExtractor, CASUALTY_PATTERNS, DEFAULT_INCIDENT_TYPE, DEFAULT_TAG,
+                             INCIDENT_TYPE_KEYWORDS, JOURNALIST_PATTERNS, TAG_KEYWORDS, extract_casualties)
+from record_diff import diff_rows, is_missing
+
+DEFAULT_CHECKPOINT_DIR = 'data_files/reprocess'
+
+# Never occurs in keywords, so no match can span two rows of the buffer
+SEPARATOR = '\x00'
+
+# IDs made by GazaCrisisExtractor.generate_incident_id; other rows are curated by hand and left alone by default
+EXTRACTED_ID_PREFIX = 'gaza-'
+
+# Fields the rules compute; anything else in a row (e.g. casualties_critical, which no rule sets) is never touched
+DERIVED_CASUALTY_FIELDS = tuple(CASUALTY_PATTERNS) + ('casualties_affected',)
+DERIVED_FIELDS = ('type', 'tags') + DERIVED_CASUALTY_FIELDS
+
+
+class KeywordMatcher:
+    """Which categories' keywords occur in each of a batch of texts (substring semantics, like `in`)"""
+
+    def __init__(self, keywords):
+        self.categories = list(keywords)
+        self.patterns = [re.compile('|'.join(re.escape(keyword) for keyword in sorted(words, key=len, reverse=True)))
+                         for words in keywords.values()]
+
+    def match(self, texts):
+        """List of matched category sets, one per (lowercased) text"""
+        buffer = SEPARATOR.join(texts)
+        starts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + 1
+
+        matched = [set() for _ in texts]
+        for category, pattern in zip(self.categories, self.patterns):
+            position = 0
+            while True:
+                found = pattern.search(buffer, position)
+                if not found:
+                    break
+                row = bisect_right(starts, found.start()) - 1
+                matched[row].add(category)
+                # One hit is enough for this row: continue from the next row
+                if row + 1 >= len(starts):
+                    break
+                position = starts[row + 1]
+        return matched
+
+    def first(self, texts, default):
+        """First category (in rule order) matched by each text"""
+        return [next((category for category in self.categories if category in found), default)
+                for found in self.match(texts)]
+
+    def all(self, texts, default):
+        """'|'-joined categories (in rule order) matched by each text"""
+        return ['|'.join(category for category in self.categories if category in found) or default
+                for found in self.match(texts)]
+
+
+def rules_fingerprint():
+    """Hash of the rules, so a checkpoint from before a rules change isn't resumed"""
+    rules = [INCIDENT_TYPE_KEYWORDS, DEFAULT_INCIDENT_TYPE, TAG_KEYWORDS, DEFAULT_TAG, CASUALTY_PATTERNS,
+             JOURNALIST_PATTERNS]
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class Checkpoint:
+    """Progress of one reprocessing run: finished batches and their results (fsynced JSONL)"""
+
+    def __init__(self, csv_path, checkpoint_dir=DEFAULT_CHECKPOINT_DIR, scope='extracted'):
+        name = os.path.splitext(os.path.basename(csv_path))[0]
+        self.state_path = os.path.join(checkpoint_dir, f"{name}.checkpoint.json")
+        self.results_path = os.path.join(checkpoint_dir, f"{name}.results.jsonl")
+        stat = os.stat(csv_path)
+        self.run_key = {
+            'source': os.path.abspath(csv_path),
+            'source_size': stat.st_size,
+            'source_mtime_ns': stat.st_mtime_ns,
+            'rules': rules_fingerprint(),
+            'scope': scope
+        }
+        self.batches_done = 0
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def resume(self, batch_size):
+        """Load a matching checkpoint; returns the number of batches already done"""
+        if not os.path.exists(self.state_path):
+            return 0
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('run') != self.run_key or state.get('batch_size') != batch_size:
+            print("Checkpoint is for a different source file, rules, row scope or batch size; starting over",
+                  file=sys.stderr)
+            return 0
+        self.batches_done = state['batches_done']
+        return self.batches_done
+
+    def start(self, batch_size):
+        """Begin a run at self.batches_done, discarding results of any batch that wasn't recorded as done"""
+        self.batch_size = batch_size
+        if not os.path.exists(self.results_path):
+            return
+
+        # A crash between appending a batch's results and saving the checkpoint leaves extra lines
+        kept = []
+        with open(self.results_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if len(kept) == self.batches_done * batch_size or not line.endswith('\n'):
+                    break
+                kept.append(line)
+
+        tmp_path = f"{self.results_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(kept)
+        os.replace(tmp_path, self.results_path)
+
+    def record_batch(self, results):
+        with open(self.results_path, 'a', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.batches_done += 1
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'run': self.run_key, 'batch_size': self.batch_size, 'batches_done': self.batches_done}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def results(self):
+        if not os.path.exists(self.results_path):
+            return []
+        with open(self.results_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def clear(self):
+        for path in (self.state_path, self.results_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def process_batch(rows, type_matcher, tag_matcher, pool, workers):
+    """Recomputed type, tags and casualty figures for a batch of rows"""
+    texts = [f"{row.get('title') or ''} {row.get('description') or ''}" for row in rows]
+    lowered = [text.lower() for text in texts]
+
+    types = type_matcher.first(lowered, DEFAULT_INCIDENT_TYPE)
+    tags = tag_matcher.all(lowered, DEFAULT_TAG)
+    casualties = pool.map(extract_casualties, texts, chunksize=max(1, len(texts) // (workers * 4)))
+
+    return [dict({field: figures[field] for field in DERIVED_CASUALTY_FIELDS},
+                 id=row['id'], type=incident_type, tags=row_tags)
+            for row, incident_type, row_tags, figures in zip(rows, types, tags, casualties)]
+
+
+def fields_to_write(result, stored_row):
+    """
+    The recomputed fields to write back for a row: every derived field of an
+    extracted row, but only the empty ones of a hand-curated row (--all-rows
+    fills gaps in curated rows, it never replaces their figures)
+    """
+    fields = {field: result[field] for field in DERIVED_FIELDS if field in result}
+    if not (stored_row.get('id') or '').startswith(EXTRACTED_ID_PREFIX):
+        fields = {field: value for field, value in fields.items()
+                  if is_missing(field, stored_row.get(field)) and not is_missing(field, value)}
+    return dict(fields, id=result['id'])
+
+
+def print_progress(done_rows, total_rows, started, resumed_rows):
+    elapsed = time.monotonic() - started
+    rate = (done_rows - resumed_rows) / elapsed if elapsed > 0 else 0.0
+    eta = (total_rows - done_rows) / rate if rate else 0.0
+    print(f"\r{done_rows}/{total_rows} rows ({done_rows / total_rows:.0%}), {rate:.0f} rows/s, ETA {eta:.0f}s ",
+          end='', file=sys.stderr, flush=True)
+
+
+def reprocess(csv_path, batch_size=2000, workers=None, checkpoint_dir=DEFAULT_CHECKPOINT_DIR, dry_run=False,
+              restart=False, config_path='config.yaml', all_rows=False):
+    """
+    Recompute derived fields for the extracted rows of csv_path (and fill the
+    empty ones of hand-curated rows with all_rows=True); returns the RecordDiff
+    of the changes
+    """
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        stored = list(csv.DictReader(f))
+    rows = [row for row in stored if all_rows or (row.get('id') or '').startswith(EXTRACTED_ID_PREFIX)]
+
+    checkpoint = Checkpoint(csv_path, checkpoint_dir, scope='all' if all_rows else 'extracted')
+    first_batch = 0 if restart else checkpoint.resume(batch_size)
+    checkpoint.start(batch_size)
+
+    total_batches = (len(rows) + batch_size - 1) // batch_size
+    if first_batch:
+        print(f"Resuming after {first_batch}/{total_batches} batches", file=sys.stderr)
+
+    workers = workers or os.cpu_count() or 1
+    type_matcher = KeywordMatcher(INCIDENT_TYPE_KEYWORDS)
+    tag_matcher = KeywordMatcher(TAG_KEYWORDS)
+
+    started = time.monotonic()
+    resumed_rows = min(first_batch * batch_size, len(rows))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in range(first_batch, total_batches):
+            batch_rows = rows[batch * batch_size:(batch + 1) * batch_size]
+            checkpoint.record_batch(process_batch(batch_rows, type_matcher, tag_matcher, pool, workers))
+            print_progress(min((batch + 1) * batch_size, len(rows)), len(rows), started, resumed_rows)
+    print(file=sys.stderr)
+
+    stored_by_id = {row.get('id'): row for row in stored}
+    results = [fields_to_write(result, stored_by_id.get(result['id'], {})) for result in checkpoint.results()]
+    diff = diff_rows(stored, results, keep_missing=False)
+    if diff.has_changes and not dry_run:
+        if not GazaCrisisExtractor(config_path).update_main_csv(results, csv_path, keep_missing=False):
+            raise RuntimeError(f"Writing results back to {csv_path} failed; the checkpoint was kept for a retry")
+
+    checkpoint.clear()
+    return diff
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Re-run classification and casualty rules over stored incidents')
+    parser.add_argument('csv', nargs='?', default='incidents.csv', help='Incidents CSV to reprocess')
+    parser.add_argument('--batch-size', type=int, default=2000, help='Rows per batch (and per checkpoint)')
+    parser.add_argument('--workers', type=int, help='Processes for the casualty rules (default: CPU count)')
+    parser.add_argument('--checkpoint-dir', default=DEFAULT_CHECKPOINT_DIR, help='Where progress is kept')
+    parser.add_argument('--config', default='config.yaml', help='Extractor configuration')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument('--restart', action='store_true', help='Ignore any checkpoint and start from the first row')
+    parser.add_argument('--all-rows', action='store_true',
+                        help=f"Also fill empty fields of rows not created by the extractor "
+                             f"(ids without '{EXTRACTED_ID_PREFIX}'); their existing values are kept")
+    args = parser.parse_args()
+
+    diff = reprocess(args.csv, args.batch_size, args.workers, args.checkpoint_dir, args.dry_run, args.restart,
+                     args.config, args.all_rows)
+
+    for _, new, changes in diff.changed[:20]:
+        print(f"~ {new.get('id')}: " + ', '.join(f"{field} {before!r} -> {after!r}"
+                                                 for field, (before, after) in sorted(changes.items())))
+    if len(diff.changed) > 20:
+        print(f"... and {len(diff.changed) - 20} more")
+    print(f"{'Would update' if args.dry_run else 'Updated'} {len(diff.changed)} of {len(diff.changed) + diff.unchanged} "
+          f"incidents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Pre-aggregated incident and casualty counts for dashboard queries.
+
+Two NumPy cubes are kept per store, one row of measures per day:
+  counts      [measure, day, type, location]
+  tag_counts  [measure, day, tag, location]   (an incident counts once per tag)
+
+Measures are incidents, deaths, injured and affected. Rows are dated by
+`date`, falling back to the date part of `last_updated` (many extracted rows
+have no article date). Week and month totals are summed from the daily cells
+at query time, so a query costs O(days in range x matching cells), however
+many raw rows went in.
+
+add_record(row, sign=-1) removes a row's contribution again, so an updated
+incident can be applied as remove-old + add-new.
+
+Usage:
+    python rollups.py build ../incidents.csv [--store data_files/rollups]
+    python rollups.py query --measure deaths --granularity week --group-by location
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+from csv_summary import to_number
+
+DEFAULT_STORE_DIR = 'data_files/rollups'
+
+STORE_FORMAT_VERSION = 1
+
+# Measure -> CSV column it sums (None counts rows)
+MEASURES = {
+    'incidents': None,
+    'deaths': 'casualties_deaths',
+    'injured': 'casualties_injured',
+    'affected': 'casualties_affected'
+}
+
+GRANULARITIES = ('day', 'week', 'month')
+GROUP_BY = ('type', 'location', 'tag')
+
+UNKNOWN = 'unknown'
+
+
+def record_day(row):
+    """Date of a row as a date object, or None if neither date nor last_updated parses"""
+    for value in (row.get('date'), row.get('last_updated')):
+        try:
+            return date.fromisoformat((value or '').strip()[:10])
+        except ValueError:
+            continue
+    return None
+
+
+def record_tags(row):
+    tags = [tag.strip().lower() for tag in (row.get('tags') or '').replace(',', '|').split('|') if tag.strip()]
+    return sorted(set(tags)) or [UNKNOWN]
+
+
+def period_label(day, granularity):
+    if granularity == 'week':
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if granularity == 'month':
+        return day.strftime('%Y-%m')
+    return day.isoformat()
+
+
+class RollupStore:
+    """Daily counter cubes with incremental updates and range/filter/group-by queries"""
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._loaded_mtime = None
+        self._reset()
+        self.load()
+
+    def _reset(self):
+        self.start = None
+        self.types, self.locations, self.tags = [], [], []
+        self.counts = np.zeros((len(MEASURES), 0, 0, 0), dtype=np.int64)
+        self.tag_counts = np.zeros((len(MEASURES), 0, 0, 0), dtype=np.int64)
+        self.undated = 0
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.store_dir, 'meta.json')
+
+    @property
+    def exists(self):
+        return os.path.exists(self.meta_path)
+
+    @property
+    def days(self):
+        return self.counts.shape[1]
+
+    def load(self):
+        """(Re)load the store from disk if it changed since it was last loaded"""
+        with self._lock:
+            if not self.exists:
+                return
+            mtime = os.stat(self.meta_path).st_mtime_ns
+            if mtime == self._loaded_mtime:
+                return
+
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != STORE_FORMAT_VERSION:
+                self.logger.warning(f"Ignoring rollup store {self.store_dir} with format {meta.get('version')}")
+                return
+
+            self.start = date.fromisoformat(meta['start']) if meta['start'] else None
+            self.types, self.locations, self.tags = meta['types'], meta['locations'], meta['tags']
+            self.undated = meta.get('undated', 0)
+            self.counts = np.load(os.path.join(self.store_dir, 'counts.npy'))
+            self.tag_counts = np.load(os.path.join(self.store_dir, 'tag_counts.npy'))
+            self._loaded_mtime = mtime
+
+    def save(self):
+        with self._lock:
+            os.makedirs(self.store_dir, exist_ok=True)
+            for name, array in (('counts', self.counts), ('tag_counts', self.tag_counts)):
+                tmp_path = os.path.join(self.store_dir, f"{name}.tmp.npy")
+                np.save(tmp_path, array)
+                os.replace(tmp_path, os.path.join(self.store_dir, f"{name}.npy"))
+
+            # meta.json is written last: its mtime is what readers in other processes watch
+            meta = {
+                'version': STORE_FORMAT_VERSION,
+                'start': self.start.isoformat() if self.start else None,
+                'days': self.days,
+                'measures': list(MEASURES),
+                'types': self.types,
+                'locations': self.locations,
+                'tags': self.tags,
+                'undated': self.undated
+            }
+            tmp_path = f"{self.meta_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_path, self.meta_path)
+            self._loaded_mtime = os.stat(self.meta_path).st_mtime_ns
+
+    def _index(self, values, value, axis):
+        """Position of a dimension value, growing both cubes when it is new"""
+        if value in values:
+            return values.index(value)
+        values.append(value)
+        grow = [(0, 0)] * 4
+        grow[axis] = (0, 1)
+        if values is self.tags:
+            self.tag_counts = np.pad(self.tag_counts, grow)
+        elif values is self.types:
+            self.counts = np.pad(self.counts, grow)
+        else:
+            self.counts = np.pad(self.counts, grow)
+            self.tag_counts = np.pad(self.tag_counts, grow)
+        return len(values) - 1
+
+    def _day_index(self, day):
+        """Position of a day, extending the day axis of both cubes as needed"""
+        if self.start is None:
+            self.start = day
+        offset = (day - self.start).days
+        if offset < 0:
+            self.counts = np.pad(self.counts, [(0, 0), (-offset, 0), (0, 0), (0, 0)])
+            self.tag_counts = np.pad(self.tag_counts, [(0, 0), (-offset, 0), (0, 0), (0, 0)])
+            self.start, offset = day, 0
+        elif offset >= self.days:
+            # Grow by at least a month so daily appends don't copy the cubes every time
+            extra = max(offset - self.days + 1, 31)
+            self.counts = np.pad(self.counts, [(0, 0), (0, extra), (0, 0), (0, 0)])
+            self.tag_counts = np.pad(self.tag_counts, [(0, 0), (0, extra), (0, 0), (0, 0)])
+        return offset
+
+    def add_record(self, row, sign=1):
+        """Add (sign=1) or remove (sign=-1) one incident row's contribution"""
+        with self._lock:
+            day = record_day(row)
+            if day is None:
+                self.undated += sign
+                return False
+
+            values = np.array([1 if column is None else int(to_number(row.get(column)) or 0)
+                               for column in MEASURES.values()], dtype=np.int64) * sign
+
+            day_index = self._day_index(day)
+            type_index = self._index(self.types, (row.get('type') or '').strip().lower() or UNKNOWN, 2)
+            location_index = self._index(self.locations, (row.get('location_name') or '').strip() or UNKNOWN, 3)
+
+            self.counts[:, day_index, type_index, location_index] += values
+            for tag in record_tags(row):
+                tag_index = self._index(self.tags, tag, 2)
+                self.tag_counts[:, day_index, tag_index, location_index] += values
+            return True
+
+    def add_records(self, rows, sign=1):
+        with self._lock:
+            return sum(1 for row in rows if self.add_record(row, sign))
+
+    def rebuild(self, rows):
+        """Replace the store with aggregates of the given rows"""
+        with self._lock:
+            self._reset()
+            added = self.add_records(rows)
+            self.save()
+            return added
+
+    def _populated_range(self):
+        """Indexes of the first and last days with any data (the day axis is over-allocated)"""
+        populated = np.flatnonzero(self.counts.any(axis=(0, 2, 3)))
+        return (int(populated[0]), int(populated[-1])) if populated.size else (0, -1)
+
+    def query(self, measure='incidents', granularity='day', date_from=None, date_to=None, type=None, location=None,
+              tag=None, group_by=None):
+        """
+        Totals per period for one measure. Returns {period: value}, or
+        {group: {period: value}} with group_by ('type', 'location' or 'tag').
+        Tag filters and tag grouping use the tag cube, which has no type axis,
+        so they can't be combined with type.
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure {measure!r} (expected one of {', '.join(MEASURES)})")
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity {granularity!r} (expected one of {', '.join(GRANULARITIES)})")
+        if group_by is not None and group_by not in GROUP_BY:
+            raise ValueError(f"Unknown group_by {group_by!r} (expected one of {', '.join(GROUP_BY)})")
+
+        # Match values the way rows are stored: types and tags lowercased, locations stripped
+        type = type.strip().lower() if type is not None else None
+        tag = tag.strip().lower() if tag is not None else None
+        location = location.strip() if location is not None else None
+
+        use_tags = tag is not None or group_by == 'tag'
+        if use_tags and (type is not None or group_by == 'type'):
+            raise ValueError("Tag rollups have no type dimension; filter or group by type or by tag, not both")
+
+        with self._lock:
+            self.load()
+            if self.start is None:
+                return {}
+
+            first, last = self._populated_range()
+            if date_from is not None:
+                first = max(first, (date.fromisoformat(date_from) - self.start).days)
+            if date_to is not None:
+                last = min(last, (date.fromisoformat(date_to) - self.start).days)
+            if last < first:
+                return {}
+
+            cube = (self.tag_counts if use_tags else self.counts)[list(MEASURES).index(measure), first:last + 1]
+            second_values = self.tags if use_tags else self.types
+
+            # Filters select along the (type|tag) and location axes; a value never seen means no data
+            for axis, values, wanted in ((1, second_values, tag if use_tags else type), (2, self.locations, location)):
+                if wanted is None:
+                    continue
+                if wanted not in values:
+                    return {}
+                cube = np.take(cube, [values.index(wanted)], axis=axis)
+
+            # Bucket days into periods: consecutive days share a label, so reduceat sums each run
+            labels = [period_label(self.start + timedelta(days=first + offset), granularity)
+                      for offset in range(last - first + 1)]
+            boundaries = [0] + [i for i in range(1, len(labels)) if labels[i] != labels[i - 1]]
+            periods = [labels[i] for i in boundaries]
+            per_period = np.add.reduceat(cube, boundaries, axis=0)
+
+            if group_by is None:
+                totals = per_period.sum(axis=(1, 2))
+                return {period: int(value) for period, value in zip(periods, totals)}
+
+            if group_by == 'location':
+                grouped, names = per_period.sum(axis=1), self.locations
+                if location is not None:
+                    names = [location]
+            else:
+                grouped, names = per_period.sum(axis=2), second_values
+                wanted = tag if use_tags else type
+                if wanted is not None:
+                    names = [wanted]
+
+            return {name: {period: int(value) for period, value in zip(periods, grouped[:, i]) if value}
+                    for i, name in enumerate(names) if grouped[:, i].any()}
+
+    def describe(self):
+        """Dimensions of the store, for building query UIs"""
+        with self._lock:
+            self.load()
+            first, last = self._populated_range()
+            populated = self.start is not None and last >= 0
+            return {
+                'start': (self.start + timedelta(days=first)).isoformat() if populated else None,
+                'end': (self.start + timedelta(days=last)).isoformat() if populated else None,
+                'measures': list(MEASURES),
+                'granularities': list(GRANULARITIES),
+                'types': self.types,
+                'locations': self.locations,
+                'tags': self.tags,
+                'undated': self.undated
+            }
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Pre-aggregated incident and casualty counts')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help='Rollup store directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Rebuild the store from a CSV')
+    build_parser.add_argument('csv', help='Incidents CSV (e.g. incidents.csv)')
+
+    query_parser = subparsers.add_parser('query', help='Query the store')
+    query_parser.add_argument('--measure', default='incidents', choices=list(MEASURES))
+    query_parser.add_argument('--granularity', default='day', choices=GRANULARITIES)
+    query_parser.add_argument('--from', dest='date_from', help='First day (YYYY-MM-DD)')
+    query_parser.add_argument('--to', dest='date_to', help='Last day (YYYY-MM-DD)')
+    query_parser.add_argument('--type')
+    query_parser.add_argument('--location')
+    query_parser.add_argument('--tag')
+    query_parser.add_argument('--group-by', choices=GROUP_BY)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = RollupStore(args.store)
+
+    if args.command == 'build':
+        with open(args.csv, 'r', encoding='utf-8', newline='') as f:
+            added = store.rebuild(csv.DictReader(f))
+        print(f"Aggregated {added} dated rows ({store.undated} without a usable date)")
+
+    elif args.command == 'query':
+        result = store.query(args.measure, args.granularity, args.date_from, args.date_to, args.type, args.location,
+                             args.tag, args.group_by)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+In-process job scheduler for the daily automation.
+
+Jobs run on a small worker pool at a fixed UTC time each day (plus optional
+random jitter). The scheduler sleeps until the next job is due instead of
+polling, never starts a job while its previous run is still going, catches up
+on runs missed while the process was down, and keeps a timing history per job.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+
+class ScheduledJob:
+    """A function run once a day at a given UTC time"""
+
+    def __init__(self, name, func, at, jitter=0, catch_up=True):
+        self.name = name
+        self.func = func
+        self.hour, self.minute = (int(part) for part in at.split(':'))
+        self.jitter = jitter  # Up to this many seconds of random delay per run
+        self.catch_up = catch_up
+        self.running = False
+        self.next_run = None
+
+    def last_slot(self, now):
+        """Most recent scheduled time at or before `now`"""
+        slot = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        return slot if slot <= now else slot - timedelta(days=1)
+
+    def schedule_next(self, now):
+        """Pick the next run time after `now`, with jitter applied"""
+        self.next_run = self.last_slot(now) + timedelta(days=1, seconds=random.uniform(0, self.jitter))
+
+
+class JobScheduler:
+    """Runs ScheduledJobs on a thread pool and records when and how long they ran"""
+
+    def __init__(self, state_file='data_files/scheduler_state.json', max_workers=2, history_size=50):
+        self.state_file = state_file
+        self.history_size = history_size
+        self.jobs = {}
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self.state = self._load_state()
+
+    def _load_state(self):
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Could not read scheduler state {self.state_file}: {e}")
+        return {}
+
+    def _save_state(self):
+        """Persist last-run times and history (caller holds the lock)"""
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def add_daily(self, name, func, at, jitter=0, catch_up=True):
+        """Schedule `func` every day at `at` ('HH:MM', UTC)"""
+        job = ScheduledJob(name, func, at, jitter, catch_up)
+        now = datetime.now(timezone.utc)
+        job.schedule_next(now)
+
+        # Missed run: the last scheduled slot passed after the last recorded run
+        last_run = self.state.get(name, {}).get('last_run')
+        if catch_up and last_run and datetime.fromisoformat(last_run) < job.last_slot(now):
+            self.logger.info(f"Job '{name}' missed its run at {job.last_slot(now).isoformat()}, catching up")
+            job.next_run = now
+
+        self.jobs[name] = job
+        self._wake.set()
+        self.logger.info(f"Job '{name}' scheduled daily at {at} UTC, next run {job.next_run.isoformat()}")
+        return job
+
+    def run_now(self, name):
+        """Start a job immediately (skipped if it is already running)"""
+        return self._start(self.jobs[name], datetime.now(timezone.utc))
+
+    def _start(self, job, now):
+        with self._lock:
+            if job.running:
+                self.logger.warning(f"Job '{job.name}' is still running, skipping this run")
+                return None
+            job.running = True
+        return self.pool.submit(self._run_job, job, now)
+
+    def _run_job(self, job, scheduled_for):
+        started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        status, error = 'ok', None
+        self.logger.info(f"Job '{job.name}' started")
+
+        try:
+            job.func()
+        except Exception as e:
+            status, error = 'error', str(e)
+            self.logger.error(f"Job '{job.name}' failed: {e}")
+
+        duration = time.perf_counter() - start
+        self.logger.info(f"Job '{job.name}' finished ({status}) in {duration:.1f}s")
+
+        with self._lock:
+            job.running = False
+            job_state = self.state.setdefault(job.name, {})
+            job_state['last_run'] = started.isoformat()
+            history = job_state.setdefault('history', [])
+            history.append({
+                'scheduled_for': scheduled_for.isoformat(),
+                'started': started.isoformat(),
+                'duration_seconds': round(duration, 3),
+                'status': status,
+                'error': error
+            })
+            del history[:-self.history_size]
+            self._save_state()
+
+    def history(self, name):
+        """Recorded runs of a job, oldest first"""
+        with self._lock:
+            return list(self.state.get(name, {}).get('history', []))
+
+    def run_forever(self):
+        """Sleep until the next job is due, run it, repeat (until stop())"""
+        try:
+            while not self._stopped:
+                now = datetime.now(timezone.utc)
+
+                for job in self.jobs.values():
+                    if job.next_run <= now:
+                        job.schedule_next(now)
+                        self._start(job, now)
+
+                if not self.jobs:
+                    self._wake.wait()
+                else:
+                    next_due = min(job.next_run for job in self.jobs.values())
+                    self._wake.wait(max(0.0, (next_due - datetime.now(timezone.utc)).total_seconds()))
+                self._wake.clear()
+        finally:
+            # Let running jobs finish so their history is recorded
+            self.pool.shutdown(wait=True)
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
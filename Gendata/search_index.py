@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Full-text search over extracted incidents (title, description, location and
+tags), backed by an SQLite FTS5 index with BM25 ranking.
+
+Incidents are keyed by id, so an incident seen in several reports is indexed
+once (from the most recently indexed file). GazaCrisisExtractor.save_to_csv
+adds rows as reports are written; sync_directory() picks up any report CSV
+that changed on disk since it was last indexed.
+
+Query syntax (FTS5): words, "exact phrases", prefix*, OR and NOT.
+
+Usage:
+    python search_index.py sync [--reports-dir data_files/daily_reports]
+    python search_index.py search '"field hospital" rafah' [--type medical] [--from 2024-01-01]
+"""
+
+import argparse
+import csv
+import html
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_INDEX_PATH = 'data_files/search_index.db'
+DEFAULT_REPORTS_DIR = 'data_files/daily_reports'
+
+# BM25 column weights: title, description, location, tags
+BM25_WEIGHTS = (10.0, 1.0, 2.0, 2.0)
+
+MAX_PER_PAGE = 100
+
+# Snippet highlight markers; replaced with <mark> after the text around them is escaped
+_HIGHLIGHT_START, _HIGHLIGHT_END = '\x01', '\x02'
+
+# A quoted phrase, an operator, or a bare term (optionally with a trailing * for prefix search)
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+_OPERATORS = {'OR', 'AND', 'NOT'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    rowid INTEGER PRIMARY KEY,
+    incident_id TEXT NOT NULL UNIQUE,
+    source_file TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    location TEXT,
+    tags TEXT,
+    type TEXT,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_type ON documents(type);
+CREATE INDEX IF NOT EXISTS documents_date ON documents(date);
+CREATE INDEX IF NOT EXISTS documents_source ON documents(source_file);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS incidents_fts USING fts5(
+    title, description, location, tags,
+    content='documents', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS documents_insert AFTER INSERT ON documents BEGIN
+    INSERT INTO incidents_fts(rowid, title, description, location, tags)
+    VALUES (new.rowid, new.title, new.description, new.location, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_delete AFTER DELETE ON documents BEGIN
+    INSERT INTO incidents_fts(incidents_fts, rowid, title, description, location, tags)
+    VALUES ('delete', old.rowid, old.title, old.description, old.location, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_update AFTER UPDATE ON documents BEGIN
+    INSERT INTO incidents_fts(incidents_fts, rowid, title, description, location, tags)
+    VALUES ('delete', old.rowid, old.title, old.description, old.location, old.tags);
+    INSERT INTO incidents_fts(rowid, title, description, location, tags)
+    VALUES (new.rowid, new.title, new.description, new.location, new.tags);
+END;
+
+CREATE TABLE IF NOT EXISTS indexed_files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER
+);
+"""
+
+
+def split_tags(value):
+    """Tags are written '|'-separated by the extractor and ','-separated in incidents.csv"""
+    return [tag.strip().lower() for tag in re.split(r'[|,]', value or '') if tag.strip()]
+
+
+def build_match_query(query):
+    """
+    Turn user input into a valid FTS5 expression: phrases and terms are quoted
+    (so punctuation such as 'al-shifa' can't break the syntax), while OR/AND/NOT
+    and trailing * prefixes are kept.
+    """
+    parts = []
+    for phrase, term in _QUERY_TOKEN.findall(query or ''):
+        if phrase:
+            words = phrase.replace('"', ' ').strip()
+            if words:
+                parts.append(f'"{words}"')
+        elif term in _OPERATORS:
+            # An operator needs an operand on both sides
+            if parts and parts[-1] not in _OPERATORS:
+                parts.append(term)
+        else:
+            prefix = term.endswith('*')
+            word = term.rstrip('*').replace('"', '')
+            if word:
+                parts.append(f'"{word}"' + ('*' if prefix else ''))
+
+    while parts and parts[-1] in _OPERATORS:
+        parts.pop()
+    return ' '.join(parts)
+
+
+class SearchIndex:
+    """SQLite FTS5 index of incidents with field filters and paginated BM25 search"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            # WAL lets the web interface search while an extraction run is writing
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def index_rows(self, rows, source_file):
+        """Add or replace incidents (dicts with the CSV columns); returns the number indexed"""
+        source_file = os.path.abspath(source_file)
+        records = []
+        for row in rows:
+            incident_id = str(row.get('id') or '').strip()
+            if not incident_id:
+                continue
+            tags = split_tags(row.get('tags'))
+            records.append((
+                incident_id, source_file, row.get('title') or '', row.get('description') or '',
+                row.get('location_name') or '',
+                # Stored as |a|b| so a tag filter is a LIKE '%|tag|%' match, and tokenised as words for FTS
+                f"|{'|'.join(tags)}|" if tags else '',
+                (row.get('type') or '').strip().lower(), (row.get('date') or '').strip()[:10]
+            ))
+
+        with self._write_lock, self._connect() as conn:
+            conn.executemany("""
+                INSERT INTO documents (incident_id, source_file, title, description, location, tags, type, date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(incident_id) DO UPDATE SET
+                    source_file = excluded.source_file, title = excluded.title,
+                    description = excluded.description, location = excluded.location,
+                    tags = excluded.tags, type = excluded.type, date = excluded.date
+            """, records)
+
+        return len(records)
+
+    def index_file(self, path):
+        """Index every row of a report CSV and remember its size and mtime"""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            count = self.index_rows(csv.DictReader(f), path)
+
+        stat = os.stat(path)
+        with self._write_lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO indexed_files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                         (os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+        return count
+
+    def sync_directory(self, reports_dir=DEFAULT_REPORTS_DIR):
+        """Index report CSVs that are new or changed since they were last indexed; returns files indexed"""
+        with self._connect() as conn:
+            known = {row['path']: (row['size'], row['mtime_ns'])
+                     for row in conn.execute("SELECT path, size, mtime_ns FROM indexed_files")}
+
+        indexed = 0
+        present = set()
+        if os.path.isdir(reports_dir):
+            for filename in sorted(os.listdir(reports_dir)):
+                if not filename.endswith('.csv'):
+                    continue
+                path = os.path.abspath(os.path.join(reports_dir, filename))
+                present.add(path)
+                stat = os.stat(path)
+                if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                try:
+                    self.index_file(path)
+                    indexed += 1
+                except Exception as e:
+                    logging.error(f"Failed to index {path}: {e}")
+
+        # Forget reports that were deleted from this directory
+        prefix = os.path.join(os.path.abspath(reports_dir), '')
+        removed = [path for path in known if path.startswith(prefix) and path not in present]
+        if removed:
+            with self._write_lock, self._connect() as conn:
+                for path in removed:
+                    conn.execute("DELETE FROM documents WHERE source_file = ?", (path,))
+                    conn.execute("DELETE FROM indexed_files WHERE path = ?", (path,))
+
+        return indexed
+
+    def search(self, query='', type=None, tags=None, location=None, date_from=None, date_to=None, page=1,
+               per_page=20):
+        """
+        Ranked search with optional filters. Without a query, matching incidents
+        are listed newest first. Returns {'total', 'page', 'per_page', 'results'}.
+        """
+        page = max(1, int(page))
+        per_page = min(max(1, int(per_page)), MAX_PER_PAGE)
+        match = build_match_query(query)
+
+        conditions, params = [], []
+        if match:
+            conditions.append("incidents_fts MATCH ?")
+            params.append(match)
+        if type:
+            conditions.append("d.type = ?")
+            params.append(type.strip().lower())
+        for tag in split_tags(tags) if isinstance(tags, str) else [tag.lower() for tag in tags or []]:
+            conditions.append("d.tags LIKE ?")
+            params.append(f"%|{tag}|%")
+        if location:
+            conditions.append("d.location LIKE ?")
+            params.append(f"%{location.strip()}%")
+        if date_from:
+            conditions.append("d.date >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("d.date <= ?")
+            params.append(date_to)
+
+        if match:
+            source = "incidents_fts JOIN documents d ON d.rowid = incidents_fts.rowid"
+            rank = f"bm25(incidents_fts, {', '.join(str(weight) for weight in BM25_WEIGHTS)})"
+            snippet = f"snippet(incidents_fts, -1, '{_HIGHLIGHT_START}', '{_HIGHLIGHT_END}', '…', 16)"
+            order = "score"
+        else:
+            source = "documents d"
+            rank, snippet = "0.0", "substr(d.description, 1, 200)"
+            order = "d.date DESC, d.rowid DESC"
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM {source} {where}", params).fetchone()[0]
+            rows = conn.execute(f"""
+                SELECT d.incident_id, d.title, d.date, d.type, d.location, d.tags, d.source_file,
+                       {rank} AS score, {snippet} AS snippet
+                FROM {source} {where}
+                ORDER BY {order}
+                LIMIT ? OFFSET ?
+            """, params + [per_page, (page - 1) * per_page]).fetchall()
+
+        results = []
+        for row in rows:
+            results.append({
+                'id': row['incident_id'],
+                'title': row['title'],
+                'date': row['date'],
+                'type': row['type'],
+                'location': row['location'],
+                'tags': split_tags(row['tags']),
+                'source_file': os.path.basename(row['source_file']),
+                # bm25() is lower-is-better; flip the sign so higher scores rank first
+                'score': round(-row['score'], 4) if match else None,
+                'snippet': html.escape(row['snippet'] or '').replace(_HIGHLIGHT_START, '<mark>')
+                                                            .replace(_HIGHLIGHT_END, '</mark>')
+            })
+
+        return {'total': total, 'page': page, 'per_page': per_page, 'results': results}
+
+    def optimize(self):
+        """Merge FTS segments (worth running after large rebuilds)"""
+        with self._write_lock, self._connect() as conn:
+            conn.execute("INSERT INTO incidents_fts(incidents_fts) VALUES ('optimize')")
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Full-text search over extracted incidents')
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help='Index database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sync_parser = subparsers.add_parser('sync', help='Index new or changed report CSVs')
+    sync_parser.add_argument('--reports-dir', default=DEFAULT_REPORTS_DIR, help='Directory of report CSVs')
+    sync_parser.add_argument('--file', action='append', default=[], help='Also index this CSV (repeatable)')
+
+    search_parser = subparsers.add_parser('search', help='Query the index')
+    search_parser.add_argument('query', nargs='?', default='', help='Words, "phrases", prefix*, OR, NOT')
+    search_parser.add_argument('--type', help='Incident type')
+    search_parser.add_argument('--tags', help='Comma-separated tags (all must match)')
+    search_parser.add_argument('--location', help='Location substring')
+    search_parser.add_argument('--from', dest='date_from', help='Earliest date (YYYY-MM-DD)')
+    search_parser.add_argument('--to', dest='date_to', help='Latest date (YYYY-MM-DD)')
+    search_parser.add_argument('--page', type=int, default=1)
+    search_parser.add_argument('--per-page', type=int, default=20)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    index = SearchIndex(args.index)
+
+    if args.command == 'sync':
+        indexed = index.sync_directory(args.reports_dir)
+        for path in args.file:
+            index.index_file(path)
+            indexed += 1
+        index.optimize()
+        print(f"Indexed {indexed} files")
+
+    elif args.command == 'search':
+        results = index.search(args.query, args.type, args.tags, args.location, args.date_from, args.date_to,
+                               args.page, args.per_page)
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
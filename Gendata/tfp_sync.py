@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Local mirror of the TechForPalestine datasets used by the War Crimes pages.
+
+Each sync makes conditional requests (If-None-Match / If-Modified-Since), so
+unchanged datasets cost a 304. New content is stored as a gzipped version,
+a row-level delta against the previous version is written, and small
+pre-aggregated slices (children only, journalists, daily series, and the age
+figures of the civilian casualties page) are published for the pages to load
+instead of the multi-MB upstream files.
+
+Any static file server works as a stand-in for upstream, e.g.:
+    cd fixtures && python -m http.server 8000
+    python tfp_sync.py --base-url http://127.0.0.1:8000
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import date, datetime
+
+import requests
+
+DEFAULT_BASE_URL = 'https://data.techforpalestine.org/api/v2'
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_MIRROR_DIR = 'data_files/tfp_mirror'
+DEFAULT_PUBLISH_DIR = os.path.join(REPO_ROOT, 'Pages', 'War_Crimes_Stats', 'data')
+
+# Dataset name -> (upstream file, record key used for deltas; None for single objects)
+DATASETS = {
+    'killed-in-gaza': ('killed-in-gaza.min.json', 'id'),
+    'casualties-daily': ('casualties_daily.min.json', 'report_date'),
+    'press-killed-in-gaza': ('press_killed_in_gaza.min.json', 'id'),
+    'summary': ('summary.json', None)
+}
+
+CHILD_MAX_AGE = 17
+ELDERLY_MIN_AGE = 60  # The casualties page's "Elderly (60+)"
+MAX_AGE = 120
+
+AGE_PATTERN = re.compile(r'^\s*([-+]?\d+)')
+ISO_DATE_PATTERN = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})')
+
+
+def parse_age(value):
+    """Whole years like the pages' parseInt (e.g. '3 months' -> 3), or None when missing"""
+    match = AGE_PATTERN.match(str(value)) if value is not None else None
+    return int(match.group(1)) if match else None
+
+
+def parse_date(value):
+    """Date from 'YYYY-MM-DD...' or 'DD/MM/YYYY', like the pages' parseKilledInGazaDate; None otherwise"""
+    text = str(value or '').strip()
+    match = ISO_DATE_PATTERN.match(text)
+    if match:
+        year, month, day = (int(part) for part in match.groups())
+    else:
+        parts = text.split('/')
+        if len(parts) != 3 or not all(part.strip().isdigit() for part in parts):
+            return None
+        day, month, year = (int(part) for part in parts)
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def age_from_dob(dob, today=None):
+    """Age today from a date of birth, None if unparseable or outside 0-120 (the page's calculateAgeAtDeath)"""
+    born = parse_date(dob)
+    if born is None:
+        return None
+    today = today or date.today()
+    age = today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+    return age if 0 <= age <= MAX_AGE else None
+
+
+def age_figures(records, today=None):
+    """
+    The age statistics the civilian casualties page shows, computed the way it
+    does: the age field, else the age from the date of birth. Ages are only
+    range-checked on the date of birth path, as on the page.
+    """
+    ages = []
+    for record in records:
+        age = parse_age(record.get('age'))
+        if age is None and record.get('dob'):
+            age = age_from_dob(record['dob'], today)
+        ages.append(age)
+
+    known = [age for age in ages if age is not None]
+    return {
+        'total_records': len(records),
+        'elderly_killed': sum(1 for age in known if age >= ELDERLY_MIN_AGE),
+        'unknown_age_count': len(records) - len(known),
+        'avg_age': round(sum(known) / len(known), 1) if known else None
+    }
+
+
+def compute_delta(old, new, key):
+    """Row-level changes between two versions of a list dataset, matched by key"""
+    old_rows = {row.get(key): row for row in old if isinstance(row, dict)}
+    new_rows = {row.get(key): row for row in new if isinstance(row, dict)}
+
+    return {
+        'key': key,
+        'added': [new_rows[row_key] for row_key in new_rows if row_key not in old_rows],
+        'removed': [row_key for row_key in old_rows if row_key not in new_rows],
+        'changed': [new_rows[row_key] for row_key in new_rows
+                    if row_key in old_rows and new_rows[row_key] != old_rows[row_key]]
+    }
+
+
+class TfpMirror:
+    """Versioned local copies of the TechForPalestine datasets"""
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, mirror_dir=DEFAULT_MIRROR_DIR, publish_dir=DEFAULT_PUBLISH_DIR,
+                 keep_versions=10, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.mirror_dir = mirror_dir
+        self.publish_dir = publish_dir
+        self.keep_versions = keep_versions
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'GazaCrisisDocumentation-Mirror/1.0'})
+
+        self.state_file = os.path.join(mirror_dir, 'state.json')
+        self.state = {}
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def _save_state(self):
+        os.makedirs(self.mirror_dir, exist_ok=True)
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def _version_path(self, name, version):
+        return os.path.join(self.mirror_dir, 'versions', name, f"{version}.json.gz")
+
+    def load_version(self, name, version=None):
+        """Parsed content of a stored version (the current one by default)"""
+        version = version or self.state.get(name, {}).get('current')
+        if not version:
+            return None
+        with gzip.open(self._version_path(name, version), 'rb') as f:
+            return json.loads(f.read())
+
+    def sync_dataset(self, name):
+        """Fetch one dataset if it changed upstream; returns 'unchanged', 'new' or 'same-content'"""
+        filename, key = DATASETS[name]
+        dataset_state = self.state.setdefault(name, {'versions': []})
+
+        headers = {}
+        if dataset_state.get('etag'):
+            headers['If-None-Match'] = dataset_state['etag']
+        if dataset_state.get('last_modified'):
+            headers['If-Modified-Since'] = dataset_state['last_modified']
+
+        response = self.session.get(f"{self.base_url}/{filename}", headers=headers, timeout=self.timeout)
+        dataset_state['last_checked'] = datetime.now().isoformat()
+
+        if response.status_code == 304:
+            self.logger.info(f"{name}: not modified")
+            return 'unchanged'
+        response.raise_for_status()
+
+        dataset_state['etag'] = response.headers.get('ETag')
+        dataset_state['last_modified'] = response.headers.get('Last-Modified')
+
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        if digest == dataset_state.get('sha256'):
+            # Servers without validators (or a re-upload of the same file) still give a full response
+            self.logger.info(f"{name}: downloaded {len(content)} bytes, content unchanged")
+            return 'same-content'
+
+        data = json.loads(content)
+        version = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{digest[:8]}"
+        path = self._version_path(name, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path, 'wb') as f:
+            f.write(content)
+
+        previous = dataset_state.get('current')
+        if previous and key and isinstance(data, list):
+            self._write_delta(name, previous, version, compute_delta(self.load_version(name, previous), data, key))
+
+        dataset_state.update(current=version, sha256=digest)
+        dataset_state['versions'].append({'version': version, 'bytes': len(content),
+                                          'rows': len(data) if isinstance(data, list) else None})
+        self._prune_versions(name)
+        self.logger.info(f"{name}: stored version {version} ({len(content)} bytes)")
+        return 'new'
+
+    def _write_delta(self, name, old_version, new_version, delta):
+        path = os.path.join(self.mirror_dir, 'deltas', name, f"{old_version}__{new_version}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(delta, previous=old_version, version=new_version), f, ensure_ascii=False,
+                      separators=(',', ':'))
+        self.logger.info(f"{name}: {len(delta['added'])} added, {len(delta['changed'])} changed, "
+                         f"{len(delta['removed'])} removed since {old_version}")
+
+    def _prune_versions(self, name):
+        """Keep the newest keep_versions versions and the deltas between them"""
+        versions = self.state[name]['versions']
+        for old in versions[:-self.keep_versions]:
+            if os.path.exists(self._version_path(name, old['version'])):
+                os.remove(self._version_path(name, old['version']))
+
+            delta_dir = os.path.join(self.mirror_dir, 'deltas', name)
+            if os.path.isdir(delta_dir):
+                for filename in os.listdir(delta_dir):
+                    if filename.startswith(f"{old['version']}__"):
+                        os.remove(os.path.join(delta_dir, filename))
+        del versions[:-self.keep_versions]
+
+    def publish(self):
+        """Write pre-aggregated slices of the current versions for the pages"""
+        os.makedirs(self.publish_dir, exist_ok=True)
+        published = {}
+
+        def write(filename, data):
+            path = os.path.join(self.publish_dir, filename)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            published[filename] = os.path.getsize(path)
+
+        killed = self.load_version('killed-in-gaza')
+        if isinstance(killed, list):
+            children = []
+            for record in killed:
+                age = parse_age(record.get('age'))
+                if age is not None and 0 <= age <= CHILD_MAX_AGE:
+                    children.append(record)
+
+            write('children-killed.min.json', children)
+            write('killed-in-gaza-summary.json', dict(age_figures(killed),
+                                                      version=self.state['killed-in-gaza']['current']))
+
+        for name, filename in (('press-killed-in-gaza', 'journalists-killed.min.json'),
+                               ('casualties-daily', 'casualties-daily.min.json'),
+                               ('summary', 'summary.json')):
+            data = self.load_version(name)
+            if data is not None:
+                write(filename, data)
+
+        write('index.json', {
+            'updated': datetime.now().isoformat(),
+            'versions': {name: state.get('current') for name, state in self.state.items()},
+            'files': dict(published)
+        })
+        return published
+
+    def sync(self, names=None):
+        """Sync the given datasets (all by default) and republish if anything changed"""
+        results = {}
+        for name in names or DATASETS:
+            try:
+                results[name] = self.sync_dataset(name)
+            except Exception as e:
+                self.logger.error(f"{name}: sync failed: {e}")
+                results[name] = f"error: {e}"
+            self._save_state()
+
+        if 'new' in results.values() or not os.path.exists(os.path.join(self.publish_dir, 'index.json')):
+            self.publish()
+        return results
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Mirror the TechForPalestine datasets locally')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='Upstream base URL (or a local stand-in server)')
+    parser.add_argument('--datasets', help=f"Comma-separated datasets (default: {','.join(DATASETS)})")
+    parser.add_argument('--mirror-dir', default=DEFAULT_MIRROR_DIR, help='Where versions and deltas are kept')
+    parser.add_argument('--publish-dir', default=DEFAULT_PUBLISH_DIR, help='Where page slices are written')
+    parser.add_argument('--keep-versions', type=int, default=10, help='Versions kept per dataset')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    mirror = TfpMirror(args.base_url, args.mirror_dir, args.publish_dir, args.keep_versions)
+    results = mirror.sync(args.datasets.split(',') if args.datasets else None)
+    for name, result in results.items():
+        print(f"{name}: {result}")
+
+
+if __name__ == "__main__":
+    main()
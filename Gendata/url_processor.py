@@ -3,6 +3,13 @@ from bs4 import BeautifulSoup
 import re
 from urllib.parse import urljoin, urlparse
 import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crisis_shared.metrics import count, observe_stage, stage_timer
+from crisis_shared.profiling import add_profile_arguments, profile_from_args
 
 
 class URLProcessor:
@@ -13,10 +20,31 @@ class URLProcessor:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
 
+    def fetch(self, url, method='get', **kwargs):
+        """Request a URL through the session, recording timing and status per host"""
+        host = urlparse(url).netloc
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:
+            count('url_processor_errors_total', 'Failed requests by host', host=host)
+            raise
+
+        # requests only exposes time-to-headers (DNS, connect, server wait); the rest is the body download
+        elapsed = response.elapsed.total_seconds()
+        observe_stage('response', elapsed, host=host)
+        observe_stage('download', max(0.0, time.perf_counter() - start - elapsed), host=host)
+        count('url_processor_requests_total', 'Requests by host and status', host=host, status=response.status_code)
+        return response
+
+    def parse_html(self, content):
+        with stage_timer('parse'):
+            return BeautifulSoup(content, 'html.parser')
+
     def validate_url(self, url):
         """Validate if URL is accessible and returns content"""
         try:
-            response = self.session.head(url, timeout=10, allow_redirects=True)
+            response = self.fetch(url, method='head', timeout=10, allow_redirects=True)
             return {
                 'valid': response.status_code == 200,
                 'status_code': response.status_code,
@@ -64,10 +92,10 @@ class URLProcessor:
 
         try:
             # Get the main page
-            response = self.session.get(base_url, timeout=15)
+            response = self.fetch(base_url, timeout=15)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = self.parse_html(response.content)
 
             # Find article links
             article_selectors = [
@@ -102,10 +130,10 @@ class URLProcessor:
         urls = []
 
         try:
-            response = self.session.get(base_url, timeout=15)
+            response = self.fetch(base_url, timeout=15)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = self.parse_html(response.content)
 
             # Find article links
             article_selectors = [
@@ -137,10 +165,10 @@ class URLProcessor:
         urls = []
 
         try:
-            response = self.session.get(base_url, timeout=15)
+            response = self.fetch(base_url, timeout=15)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = self.parse_html(response.content)
 
             # Generic selectors for article links
             article_selectors = [
@@ -195,10 +223,10 @@ class URLProcessor:
     def extract_images_from_article(self, url):
         """Extract images from an article URL"""
         try:
-            response = self.session.get(url, timeout=15)
+            response = self.fetch(url, timeout=15)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = self.parse_html(response.content)
 
             images = []
             img_tags = soup.find_all('img')
@@ -287,33 +315,35 @@ def main():
     parser.add_argument('--extract-urls', help='Extract article URLs from a news site')
     parser.add_argument('--validate-url', help='Validate a single URL')
     parser.add_argument('--extract-images', help='Extract images from an article URL')
+    add_profile_arguments(parser, default_dir='data_files/daily_reports')
 
     args = parser.parse_args()
 
-    processor = URLProcessor()
-
-    if args.extract_urls:
-        print(f"Extracting URLs from: {args.extract_urls}")
-        urls = processor.extract_article_urls(args.extract_urls)
-        print(f"Found {len(urls)} Gaza-related URLs:")
-        for url in urls:
-            print(f"  - {url}")
-
-    elif args.validate_url:
-        print(f"Validating URL: {args.validate_url}")
-        result = processor.validate_url(args.validate_url)
-        print(f"Valid: {result['valid']}")
-        if not result['valid']:
-            print(f"Error: {result.get('error', 'Unknown error')}")
-
-    elif args.extract_images:
-        print(f"Extracting images from: {args.extract_images}")
-        images = processor.extract_images_from_article(args.extract_images)
-        print(f"Found {len(images)} images:")
-        for img in images:
-            print(f"  - {img['url']}")
-            if img['caption']:
-                print(f"    Caption: {img['caption']}")
+    with profile_from_args(args, 'url_processor'):
+        processor = URLProcessor()
+
+        if args.extract_urls:
+            print(f"Extracting URLs from: {args.extract_urls}")
+            urls = processor.extract_article_urls(args.extract_urls)
+            print(f"Found {len(urls)} Gaza-related URLs:")
+            for url in urls:
+                print(f"  - {url}")
+
+        elif args.validate_url:
+            print(f"Validating URL: {args.validate_url}")
+            result = processor.validate_url(args.validate_url)
+            print(f"Valid: {result['valid']}")
+            if not result['valid']:
+                print(f"Error: {result.get('error', 'Unknown error')}")
+
+        elif args.extract_images:
+            print(f"Extracting images from: {args.extract_images}")
+            images = processor.extract_images_from_article(args.extract_images)
+            print(f"Found {len(images)} images:")
+            for img in images:
+                print(f"  - {img['url']}")
+                if img['caption']:
+                    print(f"    Caption: {img['caption']}")
 
 
 if __name__ == "__main__":
@@ -1,13 +1,34 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response
 import json
+import logging
 import os
+import time
 from datetime import datetime
 import threading
 from daily_extractor import GazaCrisisExtractor
+from csv_summary import CsvSummaryCache
+from search_index import SearchIndex
+from rollups import RollupStore
+from crisis_shared.metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE
 import csv
 
 app = Flask(__name__)
 
+# Row counts of report CSVs, re-read only when a file changes
+csv_summaries = CsvSummaryCache()
+
+# Full-text index of report CSVs (also updated by the extractor as it saves reports)
+search_index = SearchIndex()
+
+# Reports written by other processes without indexing them (e.g. with search disabled in
+# their config) are picked up by a background sync, at most once per interval
+SEARCH_SYNC_INTERVAL = 300
+search_sync = {'last': 0.0, 'running': False}
+search_sync_lock = threading.Lock()
+
+# Daily counters maintained by update_main_csv; reloaded when another process saves them
+rollups = RollupStore()
+
 # Global variable to store extraction status
 extraction_status = {
     'running': False,
@@ -35,6 +56,8 @@ def extract_data():
 
     data = request.get_json()
     urls = data.get('urls', [])
+    # Skip URLs already extracted by an interrupted run over the same URLs
+    resume = bool(data.get('resume', False))
 
     if not urls:
         return jsonify({'error': 'No URLs provided'}), 400
@@ -49,7 +72,7 @@ def extract_data():
         return jsonify({'error': 'No valid URLs provided'}), 400
 
     # Start extraction in background thread
-    thread = threading.Thread(target=run_extraction, args=(valid_urls,))
+    thread = threading.Thread(target=run_extraction, args=(valid_urls, resume))
     thread.daemon = True
     thread.start()
 
@@ -59,8 +82,8 @@ def extract_data():
     })
 
 
-def run_extraction(urls):
-    """Run extraction in background thread"""
+def run_extraction(urls, resume=False):
+    """Run extraction in background thread, journalling each URL (see checkpoint.py)"""
     global extraction_status
 
     try:
@@ -76,7 +99,14 @@ def run_extraction(urls):
         extractor = GazaCrisisExtractor()
         extracted_data = []
 
+        journal = extractor.open_checkpoint(urls, resume)
+        completed = journal.completed()
+
         for i, url in enumerate(urls):
+            if url in completed:
+                extracted_data.append(completed[url])
+                continue
+
             extraction_status.update({
                 'progress': int((i / len(urls)) * 100),
                 'message': f'Processing URL {i + 1}/{len(urls)}: {url[:50]}...',
@@ -84,9 +114,12 @@ def run_extraction(urls):
             })
 
             data = extractor.extract_article_data(url)
+            journal.record(url, data)
             if data:
                 extracted_data.append(data)
 
+        extractor.rate_limiter.save()
+
         # Save extracted data
         if extracted_data:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -94,7 +127,8 @@ def run_extraction(urls):
 
             if extractor.save_to_csv(extracted_data, filename):
                 # Update main CSV
-                extractor.update_main_csv(extracted_data)
+                if extractor.update_main_csv(extracted_data):
+                    extractor.finish_checkpoint()
 
                 extraction_status.update({
                     'running': False,
@@ -242,13 +276,10 @@ def get_statistics():
                 if file_age < 7 * 24 * 3600:  # 7 days in seconds
                     recent_count += 1
 
-                # Count incidents in file
+                # Count incidents in file (cached until the file changes)
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as csvfile:
-                        reader = csv.reader(csvfile)
-                        next(reader, None)  # Skip header
-                        total_incidents += sum(1 for row in reader)
-                except:
+                    total_incidents += csv_summaries.row_count(filepath)
+                except Exception:
                     pass
 
                 stats['file_sizes'].append(stat.st_size)
@@ -262,6 +293,85 @@ def get_statistics():
         return jsonify({'error': str(e)}), 500
 
 
+def schedule_search_sync():
+    """Start a catch-up sync of the reports directory unless one ran recently; never blocks a search"""
+    with search_sync_lock:
+        if search_sync['running'] or time.time() - search_sync['last'] < SEARCH_SYNC_INTERVAL:
+            return
+        search_sync.update(running=True, last=time.time())
+
+    thread = threading.Thread(target=run_search_sync, daemon=True)
+    thread.start()
+
+
+def run_search_sync():
+    """Index report CSVs that are new or changed on disk (runs in a background thread)"""
+    try:
+        indexed = search_index.sync_directory('data_files/daily_reports')
+        if indexed:
+            logging.getLogger(__name__).info(f"Search sync indexed {indexed} report files")
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Search sync failed: {e}")
+    finally:
+        search_sync['running'] = False
+
+
+@app.route('/api/search')
+def search():
+    """Full-text search over extracted incidents with field filters and pagination"""
+    try:
+        schedule_search_sync()
+
+        results = search_index.search(
+            request.args.get('q', ''),
+            type=request.args.get('type'),
+            tags=request.args.get('tags'),
+            location=request.args.get('location'),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', 20, type=int)
+        )
+        return jsonify(results)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/rollups')
+def get_rollups():
+    """Pre-aggregated incident/casualty series, e.g. ?measure=deaths&granularity=week&group_by=location"""
+    try:
+        series = rollups.query(
+            measure=request.args.get('measure', 'incidents'),
+            granularity=request.args.get('granularity', 'day'),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            type=request.args.get('type'),
+            location=request.args.get('location'),
+            tag=request.args.get('tag'),
+            group_by=request.args.get('group_by')
+        )
+        return jsonify({'series': series})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/rollups/dimensions')
+def get_rollup_dimensions():
+    """Date range, measures and the types, locations and tags available to /api/rollups"""
+    return jsonify(rollups.describe())
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for extractions run by this server"""
+    return Response(REGISTRY.to_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.route('/api/validate-url', methods=['POST'])
 def validate_url():
     """Validate if URL is accessible"""
@@ -0,0 +1,7 @@
+"""
+Code shared by the Gaza crisis data pipelines: the incident extractor web app
+(incident-extractor/), the daily extractor (Gendata/) and the scraper (user/).
+
+Entry points in those folders add the repository root to sys.path so this
+package can be imported without being installed.
+"""
@@ -0,0 +1,235 @@
+"""
+Readability-style article body extraction shared by the incident extractor's
+url_parser and the Gendata daily extractor.
+
+Paragraph-level nodes (including text-only divs, which some sites use
+instead of <p>) are collected in one pass, scored by text density, and the
+score is credited to their parent and grandparent containers. The
+best-scoring container wins; when several near-best containers share an
+ancestor (sites that wrap every paragraph separately) that ancestor wins
+instead. Its paragraphs, plus those of strong sibling containers, are
+returned in document order with offsets into the joined text. Ancestor
+checks are memoised per container, so each container is examined once
+rather than once per paragraph below it.
+
+Accuracy fixtures and a comparison with the extractors this replaced:
+tests/test_article_body.py and tests/bench_article_body.py.
+Timing on saved pages:  python -m crisis_shared.article_body page1.html page2.html
+"""
+import re
+
+from bs4 import BeautifulSoup, Tag
+
+# Nodes treated as paragraphs of body text (divs only when all their children are inline)
+PARAGRAPH_TAGS = ['p', 'pre', 'blockquote', 'li', 'td', 'div']
+
+# Children that keep a div a paragraph; any other child (including custom elements) makes it a container
+INLINE_TAGS = {'a', 'abbr', 'b', 'bdi', 'bdo', 'br', 'cite', 'code', 'data', 'dfn', 'em', 'font', 'i', 'img', 'kbd',
+               'mark', 'q', 's', 'samp', 'small', 'span', 'strong', 'sub', 'sup', 'time', 'u', 'var', 'wbr'}
+
+# Containers whose text is never article body
+SKIP_TAGS = {'script', 'style', 'noscript', 'nav', 'footer', 'header', 'aside', 'form',
+             'figure', 'figcaption', 'button', 'iframe', 'svg', 'select'}
+
+# class/id hints that a container holds (or doesn't hold) the article
+POSITIVE_HINTS = re.compile(r'article|body|content|entry|main|post|story|text|wysiwyg', re.I)
+NEGATIVE_HINTS = re.compile(r'comment|footer|nav|sidebar|share|social|related|promo|advert|\bads?\b|'
+                            r'menu|newsletter|subscribe|caption|byline|cookie|breadcrumb', re.I)
+
+# Paragraphs shorter than this (in characters) are ignored
+MIN_PARAGRAPH_CHARS = 25
+
+# Paragraphs that are mostly link text are navigation, not body
+MAX_LINK_DENSITY = 0.5
+
+# Sibling containers scoring at least this fraction of the winner are included too
+SIBLING_SCORE_RATIO = 0.2
+
+# Containers scoring at least this fraction of the winner count as near-best, and an
+# ancestor of the winner holding this many of the (up to 4) others replaces it
+NEAR_BEST_RATIO = 0.75
+NEAR_BEST_CANDIDATES = 4
+NEAR_BEST_SHARED = 3
+
+# Separator between paragraphs in the returned text
+PARAGRAPH_SEPARATOR = "\n\n"
+
+
+def _hints(node):
+    return ' '.join(node.get('class') or []) + ' ' + (node.get('id') or '')
+
+
+def _class_weight(node):
+    """Score adjustment from a node's class and id attributes"""
+    hints = _hints(node)
+    weight = 0
+    if POSITIVE_HINTS.search(hints):
+        weight += 25
+    if NEGATIVE_HINTS.search(hints):
+        weight -= 25
+    return weight
+
+
+def _is_unlikely(node):
+    """True for containers that never hold body text: SKIP_TAGS, or negative class/id hints without positive ones"""
+    if node.name in SKIP_TAGS:
+        return True
+    if node.name in ('body', 'html', '[document]'):
+        return False
+    hints = _hints(node)
+    return bool(NEGATIVE_HINTS.search(hints)) and not POSITIVE_HINTS.search(hints)
+
+
+def _has_ancestor(node, matches, cache):
+    """
+    True if an ancestor of node satisfies matches(). cache maps id(container) ->
+    "it or one of its ancestors matches", so the containers shared by many
+    paragraphs are examined once.
+    """
+    path = []
+    found = False
+    for parent in node.parents:
+        key = id(parent)
+        if key in cache:
+            found = cache[key]
+            break
+        path.append(key)
+        if matches(parent):
+            found = True
+            break
+    for key in path:
+        cache[key] = found
+    return found
+
+
+def _is_paragraph(node):
+    """Whether a PARAGRAPH_TAGS node is scored as a paragraph itself rather than through its children"""
+    if node.name == 'p':
+        return True
+    if node.name == 'div':
+        return all(child.name in INLINE_TAGS for child in node.children if isinstance(child, Tag))
+    # List items / cells / quotes wrapping real paragraphs are scored through those paragraphs
+    return node.find(PARAGRAPH_TAGS) is None
+
+
+def _credit(scores, node, score):
+    """Add a paragraph's score to one of its containers"""
+    if not isinstance(node, Tag):
+        return
+    key = id(node)
+    if key not in scores:
+        scores[key] = [node, _class_weight(node)]
+    scores[key][1] += score
+
+
+def _shared_ancestor(top, top_score, scores):
+    """Nearest ancestor of top holding most of the other near-best containers, or top itself"""
+    near_best = [node for node, score in sorted(scores.values(), key=lambda entry: entry[1], reverse=True)
+                 if node is not top and score >= top_score * NEAR_BEST_RATIO][:NEAR_BEST_CANDIDATES]
+    if len(near_best) < NEAR_BEST_SHARED:
+        return top
+
+    ancestor_ids = [{id(parent) for parent in node.parents} for node in near_best]
+    for parent in top.parents:
+        if parent.name in ('body', '[document]'):
+            break
+        if sum(id(parent) in ids for ids in ancestor_ids) >= NEAR_BEST_SHARED:
+            return parent
+    return top
+
+
+def _build_result(texts):
+    """Join paragraph texts and record each paragraph's offsets"""
+    paragraphs = []
+    offset = 0
+    for text in texts:
+        paragraphs.append({'text': text, 'start': offset, 'end': offset + len(text)})
+        offset += len(text) + len(PARAGRAPH_SEPARATOR)
+
+    return {
+        'text': PARAGRAPH_SEPARATOR.join(texts),
+        'paragraphs': paragraphs
+    }
+
+
+def extract_article_body(page, min_paragraph_chars=MIN_PARAGRAPH_CHARS):
+    """
+    Extract the main article body from an HTML string or an already parsed soup.
+
+    Returns {'text': ..., 'paragraphs': [{'text', 'start', 'end'}, ...]} where
+    the offsets index into 'text'. The soup is not modified.
+    """
+    soup = page if isinstance(page, Tag) else BeautifulSoup(page, 'html.parser')
+
+    scores = {}
+    candidates = []
+    unlikely_cache = {}
+
+    for node in soup.find_all(PARAGRAPH_TAGS):
+        if not _is_paragraph(node) or _is_unlikely(node) or _has_ancestor(node, _is_unlikely, unlikely_cache):
+            continue
+
+        text = re.sub(r'\s+', ' ', node.get_text(' ')).strip()
+        if len(text) < min_paragraph_chars:
+            continue
+
+        link_chars = sum(len(link.get_text(strip=True)) for link in node.find_all('a'))
+        if link_chars / len(text) > MAX_LINK_DENSITY:
+            continue
+
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+        _credit(scores, node.parent, score)
+        _credit(scores, node.parent.parent if node.parent else None, score / 2)
+        candidates.append((node, text))
+
+    if not scores:
+        # No paragraph structure at all: fall back to the visible lines of the body
+        body = soup.find('body') or soup
+        lines = [re.sub(r'\s+', ' ', line).strip() for line in body.get_text('\n').split('\n')]
+        return _build_result([line for line in lines if len(line) >= min_paragraph_chars])
+
+    top, top_score = max(scores.values(), key=lambda entry: entry[1])
+    top = _shared_ancestor(top, top_score, scores)
+
+    # The winner plus any strong sibling containers (articles split across several divs)
+    selected = {id(top)}
+    if top.parent is not None:
+        for sibling in top.parent.find_all(recursive=False):
+            entry = scores.get(id(sibling))
+            if entry and entry[1] >= top_score * SIBLING_SCORE_RATIO:
+                selected.add(id(sibling))
+
+    selected_cache = {}
+    texts = [text for node, text in candidates
+             if _has_ancestor(node, lambda parent: id(parent) in selected, selected_cache)]
+
+    return _build_result(texts)
+
+
+def main():
+    """Time extraction on saved HTML pages and show what was extracted"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Benchmark article body extraction on saved pages')
+    parser.add_argument('pages', nargs='+', help='Saved HTML files')
+    parser.add_argument('--repeat', type=int, default=20, help='Extractions per page')
+    args = parser.parse_args()
+
+    for path in args.pages:
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            html = file.read()
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = extract_article_body(html)
+        elapsed = (time.perf_counter() - start) / args.repeat
+
+        print(f"{path}: {elapsed * 1000:.1f} ms, {len(result['paragraphs'])} paragraphs, "
+              f"{len(result['text'])} characters")
+        for paragraph in result['paragraphs'][:3]:
+            print(f"  [{paragraph['start']}:{paragraph['end']}] {paragraph['text'][:100]}")
+
+
+if __name__ == "__main__":
+    main()
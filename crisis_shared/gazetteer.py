@@ -0,0 +1,241 @@
+"""
+Gaza gazetteer shared by every pipeline: canonical place names, aliases and
+spelling variants, and approximate coordinates.
+
+Names are matched with a token trie (longest match wins, so "Gaza City" beats
+"Gaza"), and coordinates are indexed in a grid for nearest-place lookups and
+proximity clustering. Use get_gazetteer() so the index is built once per process.
+"""
+import math
+import re
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+
+Place = namedtuple('Place', ['name', 'kind', 'lat', 'lng', 'aliases'])
+
+# More specific kinds win when a text mentions several places
+KIND_RANK = {'region': 0, 'governorate': 1, 'city': 2, 'town': 2, 'area': 3, 'camp': 3, 'neighborhood': 3}
+
+DEFAULT_PLACE = 'Gaza Strip'
+
+# Approximate centre points
+PLACES = (
+    Place('Gaza Strip', 'region', 31.4167, 34.3333, ('Gaza',)),
+    Place('North Gaza', 'governorate', 31.5450, 34.5000, ('Northern Gaza', 'North Gaza Governorate')),
+    Place('Central Gaza', 'governorate', 31.4200, 34.3700, ('Middle Area', 'Deir al-Balah Governorate')),
+    Place('Southern Gaza', 'governorate', 31.3200, 34.3000, ('South Gaza',)),
+
+    Place('Gaza City', 'city', 31.5017, 34.4668, ()),
+    Place('Khan Younis', 'city', 31.3490, 34.3088, ('Khan Yunis', 'Khan Yunus', 'Khanyounis')),
+    Place('Rafah', 'city', 31.2996, 34.2392, ()),
+    Place('Deir al-Balah', 'city', 31.4180, 34.3500, ('Deir el-Balah', 'Dair al-Balah', 'Deir Al Balah')),
+    Place('Beit Lahia', 'city', 31.5453, 34.5042, ('Beit Lahiya', 'Beit Lahiyah')),
+    Place('Beit Hanoun', 'city', 31.5389, 34.5361, ('Beit Hanun',)),
+    Place('Jabalia', 'city', 31.5317, 34.4833, ('Jabaliya', 'Jabalya')),
+    Place('Bani Suheila', 'town', 31.3440, 34.3250, ('Bani Suhaila',)),
+    Place('Abasan', 'town', 31.3200, 34.3450, ('Abasan al-Kabira',)),
+    Place("Khuza'a", 'town', 31.3070, 34.3610, ('Khuzaa', 'Khuza')),
+    Place('Al-Qarara', 'town', 31.3740, 34.3410, ('Qarara',)),
+    Place('Az-Zawayda', 'town', 31.4330, 34.3730, ('Zawayda', 'Al-Zawaida', 'Zawaida')),
+    Place('Al-Zahra', 'town', 31.4610, 34.4190, ('Az-Zahra',)),
+    Place('Al-Mawasi', 'area', 31.3500, 34.2700, ('Mawasi',)),
+
+    Place('Jabalia Camp', 'camp', 31.5330, 34.4950, ('Jabalia refugee camp', 'Jabaliya camp', 'Jabaliya refugee camp')),
+    Place('Al-Shati Camp', 'camp', 31.5310, 34.4460, ('Al-Shati', 'Shati', 'Shati camp', 'Beach Camp',
+                                                      'Beach refugee camp')),
+    Place('Nuseirat', 'camp', 31.4480, 34.3925, ('Nuseirat Camp', 'Nuseirat refugee camp', 'Nusseirat')),
+    Place('Bureij', 'camp', 31.4400, 34.4030, ('Al-Bureij', 'Bureij Camp', 'Bureij refugee camp')),
+    Place('Maghazi', 'camp', 31.4220, 34.3860, ('Al-Maghazi', 'Maghazi Camp', 'Maghazi refugee camp')),
+
+    Place("Shuja'iyya", 'neighborhood', 31.5030, 34.4830, ('Shujaiya', 'Shujaiyya', 'Shejaiya', 'Shejaiyeh',
+                                                           'Al-Shujaiya')),
+    Place('Zeitoun', 'neighborhood', 31.4900, 34.4500, ('Zaytoun', 'Zeitun', 'Al-Zeitoun')),
+    Place('Tuffah', 'neighborhood', 31.5080, 34.4750, ('Al-Tuffah',)),
+    Place('Daraj', 'neighborhood', 31.5060, 34.4650, ('Al-Daraj',)),
+    Place('Sabra', 'neighborhood', 31.4950, 34.4550, ()),
+    Place('Tal al-Hawa', 'neighborhood', 31.5000, 34.4400, ('Tel al-Hawa',)),
+    Place('Rimal', 'neighborhood', 31.5180, 34.4470, ('Al-Rimal',)),
+    Place('Sheikh Radwan', 'neighborhood', 31.5250, 34.4600, ()),
+    Place('Tel al-Sultan', 'neighborhood', 31.3080, 34.2420, ('Tal al-Sultan', 'Tal as-Sultan')),
+)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+APOSTROPHES = re.compile(r"['’‘`]")
+
+EARTH_RADIUS_KM = 6371.0
+
+# Beyond this many grid rings, nearest() falls back to a linear scan
+MAX_SEARCH_RINGS = 25
+
+
+def tokenize(text):
+    """Lower-case word tokens; apostrophes are dropped so Shuja'iyya == Shujaiyya"""
+    return TOKEN_PATTERN.findall(APOSTROPHES.sub('', text.lower()))
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class Gazetteer:
+    """Name and coordinate lookups over a fixed set of places"""
+
+    def __init__(self, places=PLACES, cell_degrees=0.02):
+        self.places = tuple(places)
+        self.cell_degrees = cell_degrees
+
+        # Token trie: token -> child node; the None key holds the place index of a complete name
+        self._trie = {}
+        self._names = {}
+        for index, place in enumerate(self.places):
+            for name in (place.name,) + tuple(place.aliases):
+                tokens = tokenize(name)
+                node = self._trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node[None] = index
+                self._names[' '.join(tokens)] = index
+
+        # Grid index: (row, col) cell -> place indexes
+        self._grid = defaultdict(list)
+        for index, place in enumerate(self.places):
+            self._grid[self._cell(place.lat, place.lng)].append(index)
+
+        self.default = self.lookup(DEFAULT_PLACE)
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def lookup(self, name):
+        """Place for an exact name or alias (any spelling variant), or None"""
+        index = self._names.get(' '.join(tokenize(name)))
+        return self.places[index] if index is not None else None
+
+    def find_all(self, text):
+        """Every place mentioned in the text, in order of mention (longest match at each position)"""
+        tokens = tokenize(text)
+        found = []
+        position = 0
+
+        while position < len(tokens):
+            node = self._trie
+            match = None
+            end = position
+            while end < len(tokens) and tokens[end] in node:
+                node = node[tokens[end]]
+                end += 1
+                if None in node:
+                    match = (node[None], end)
+
+            if match:
+                found.append(self.places[match[0]])
+                position = match[1]
+            else:
+                position += 1
+
+        return found
+
+    def rank_places(self, text):
+        """Distinct places mentioned in the text, most specific first, then by first mention"""
+        mentioned = list(dict.fromkeys(self.find_all(text)))
+        return sorted(mentioned, key=lambda place: -KIND_RANK.get(place.kind, 0))
+
+    def resolve(self, text, default=True):
+        """The most specific place mentioned in the text (the whole Strip if none, unless default=False)"""
+        ranked = self.rank_places(text or '')
+        if ranked:
+            return ranked[0]
+        return self.default if default else None
+
+    def _ring_cells(self, row, col, ring):
+        """Grid cells exactly `ring` cells away (Chebyshev distance) from a cell"""
+        if ring == 0:
+            return [(row, col)]
+        cells = []
+        for offset in range(-ring, ring + 1):
+            cells += [(row - ring, col + offset), (row + ring, col + offset)]
+        for offset in range(-ring + 1, ring):
+            cells += [(row + offset, col - ring), (row + offset, col + ring)]
+        return cells
+
+    def nearest(self, lat, lng, max_km=None):
+        """Closest place to a point, searching grid rings outward from the point's cell"""
+        row, col = self._cell(lat, lng)
+        best, best_km = None, float('inf')
+        # Width of a grid cell in km (the longitude side is the narrower one)
+        cell_km = self.cell_degrees * 111.32 * math.cos(math.radians(lat))
+        max_ring = max(max(abs(r - row), abs(c - col)) for r, c in self._grid)
+
+        if max_ring > MAX_SEARCH_RINGS:
+            # Far outside the indexed area: one linear scan is cheaper than walking empty rings
+            rings = [list(self._grid)]
+        else:
+            rings = (self._ring_cells(row, col, ring) for ring in range(max_ring + 1))
+
+        for ring, cells in enumerate(rings):
+            # Anything in this ring or beyond is at least (ring - 1) cells away
+            if best is not None and (ring - 1) * cell_km > best_km:
+                break
+            for cell in cells:
+                for index in self._grid.get(cell, ()):
+                    place = self.places[index]
+                    km = distance_km(lat, lng, place.lat, place.lng)
+                    if km < best_km:
+                        best, best_km = place, km
+
+        if max_km is not None and best_km > max_km:
+            return None
+        return best
+
+    def within(self, lat, lng, radius_km):
+        """Places within radius_km of a point, closest first"""
+        places = [(distance_km(lat, lng, place.lat, place.lng), place) for place in self.places]
+        return [place for km, place in sorted(places, key=lambda item: item[0]) if km <= radius_km]
+
+
+def cluster_points(points, radius_km):
+    """
+    Group (lat, lng) points so that points within radius_km of each other share
+    a cluster. Returns lists of point indexes. Points are bucketed into grid
+    cells at least one radius wide, so each point is only compared with its 3x3
+    cell neighbourhood.
+    """
+    if not points:
+        return []
+    lat_degrees = radius_km / 111.32
+    # A degree of longitude shrinks with cos(lat); size cells for the highest latitude so none is too narrow
+    widest_lat = min(max(abs(lat) for lat, _ in points), 89.0)
+    lng_degrees = lat_degrees / math.cos(math.radians(widest_lat))
+    grid = defaultdict(list)
+    for index, (lat, lng) in enumerate(points):
+        grid[(int(math.floor(lat / lat_degrees)), int(math.floor(lng / lng_degrees)))].append(index)
+
+    parent = list(range(len(points)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for (row, col), members in grid.items():
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                for other in grid.get((row + dr, col + dc), ()):
+                    for index in members:
+                        if index < other and distance_km(*points[index], *points[other]) <= radius_km:
+                            parent[find(index)] = find(other)
+
+    clusters = defaultdict(list)
+    for index in range(len(points)):
+        clusters[find(index)].append(index)
+    return list(clusters.values())
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer():
+    """The shared gazetteer, built on first use"""
+    return Gazetteer()
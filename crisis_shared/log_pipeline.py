@@ -0,0 +1,250 @@
+"""
+Queue-based logging for the extraction pipelines.
+
+setup_logging() puts a single QueueHandler on the root logger, so logging
+calls only enqueue the record; a QueueListener thread does the formatting and
+disk I/O. The file handler rotates by size and/or age and gzips rolled-over
+files, records can be written as JSON lines, and a sampling filter keeps
+hot-path debug lines (one call site logging per article or per match) from
+flooding the log.
+
+One process owns a log file: processes started by multiprocessing log to the
+console only, and servers whose worker processes each set up logging pass
+per_process=True so every worker rotates its own `<name>.<pid>.log`.
+"""
+import atexit
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+PLAIN_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and goes into JSON output
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_settings = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any `extra=` fields"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Per call site sampling for records at or below max_level: the first `burst`
+    records from a logging statement pass, then one in every `rate`. Passed
+    records carry `sample_rate` so readers can scale counts back up.
+    """
+
+    def __init__(self, max_level=logging.DEBUG, burst=20, rate=100):
+        super().__init__()
+        self.max_level = max_level
+        self.burst = burst
+        self.rate = max(1, rate)
+        self._counts = {}
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+
+        # Messages are f-strings, so the call site identifies the message type
+        key = (record.pathname, record.lineno)
+        seen = self._counts.get(key, 0) + 1
+        self._counts[key] = seen  # Racy increments only shift which records get sampled
+
+        if seen <= self.burst:
+            return True
+        if (seen - self.burst) % self.rate == 0:
+            record.sample_rate = self.rate
+            return True
+        return False
+
+
+class RollingFileHandler(RotatingFileHandler):
+    """
+    Rotates when the file exceeds max_bytes or is older than rotate_seconds.
+
+    Every write updates the file's mtime, so its age is tracked separately: the
+    time the current file was started is kept in a `<filename>.opened` sidecar,
+    which lets age-based rotation carry over between runs.
+    """
+
+    def __init__(self, filename, max_bytes=0, backup_count=5, rotate_seconds=None, encoding='utf-8'):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding, delay=True)
+        self.rotate_seconds = rotate_seconds
+        self.opened_file = f"{self.baseFilename}.opened"
+        self._opened_at = self._read_opened_at() if rotate_seconds else time.time()
+
+    def _read_opened_at(self):
+        """When the current file was started, recorded in the sidecar (written now if missing)"""
+        if os.path.exists(self.baseFilename):
+            try:
+                with open(self.opened_file, 'r', encoding='utf-8') as f:
+                    return float(f.read())
+            except (OSError, ValueError):
+                # No sidecar yet: the file is at least as old as its last write
+                opened_at = os.path.getmtime(self.baseFilename)
+        else:
+            opened_at = time.time()
+        self._write_opened_at(opened_at)
+        return opened_at
+
+    def _write_opened_at(self, opened_at):
+        try:
+            with open(self.opened_file, 'w', encoding='utf-8') as f:
+                f.write(repr(opened_at))
+        except OSError:
+            pass  # Age is still tracked in memory for this run
+
+    def shouldRollover(self, record):
+        if self.rotate_seconds and time.time() - self._opened_at >= self.rotate_seconds:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self._opened_at = time.time()
+        if self.rotate_seconds:
+            self._write_opened_at(self._opened_at)
+
+
+def gzip_namer(name):
+    return f"{name}.gz"
+
+
+def gzip_rotator(source, dest):
+    """Compress the rolled-over file (runs on the listener thread, off the hot path)"""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _started_by_multiprocessing():
+    """Whether this process is a multiprocessing child (spawn or forkserver start)"""
+    # parent_process() is only set once the child starts running its target; modules imported while
+    # the target is unpickled (e.g. a pool initializer's module) see the `_inheriting` flag instead
+    return (multiprocessing.parent_process() is not None
+            or getattr(multiprocessing.current_process(), '_inheriting', False))
+
+
+def setup_logging(log_file=None, level='INFO', max_bytes=10 * 1024 * 1024, backup_count=5, rotate_seconds=None,
+                  compress=True, json_format=True, console=True, sampling=None, per_process=False):
+    """
+    Route all logging through a background listener. Like logging.basicConfig,
+    only the first call in a process takes effect; later calls return the
+    running listener, with a warning if they asked for different settings.
+
+    sampling: dict of SamplingFilter arguments (max_level, burst, rate), or None for the defaults
+    per_process: write to `<name>.<pid><ext>` instead of log_file, for servers that start
+                 several worker processes which each call this
+    """
+    global _listener, _settings
+
+    settings = {'log_file': log_file, 'level': level, 'max_bytes': max_bytes, 'backup_count': backup_count,
+                'rotate_seconds': rotate_seconds, 'compress': compress, 'json_format': json_format,
+                'console': console, 'sampling': sampling, 'per_process': per_process}
+
+    if _listener is not None:
+        ignored = [f"{key}={value!r} (using {_settings[key]!r})" for key, value in settings.items()
+                   if _settings is not None and value != _settings[key]]
+        if ignored:
+            logging.getLogger(__name__).warning(f"Logging is already configured, ignoring {', '.join(ignored)}")
+        return _listener
+    _settings = settings
+
+    if log_file and _started_by_multiprocessing():
+        # A spawned pool worker re-imports the modules that call this; the parent owns (and rotates)
+        # the log file, and a second handler on it would lose lines when either one rolls it over
+        log_file = None
+    elif log_file and per_process:
+        root, ext = os.path.splitext(log_file)
+        log_file = f"{root}.{os.getpid()}{ext}"
+
+    handlers = []
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        file_handler = RollingFileHandler(log_file, max_bytes, backup_count, rotate_seconds)
+        if compress:
+            file_handler.namer = gzip_namer
+            file_handler.rotator = gzip_rotator
+        file_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(PLAIN_FORMAT))
+        handlers.append(file_handler)
+
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(PLAIN_FORMAT))
+        handlers.append(console_handler)
+
+    sampling = dict(sampling or {})
+    if isinstance(sampling.get('max_level'), str):
+        sampling['max_level'] = getattr(logging, sampling['max_level'].upper())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(**sampling))
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, level.upper()) if isinstance(level, str) else level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener, _settings
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        _settings = None
+
+
+def _restart_listener_in_child():
+    # A forked child (e.g. a process pool worker) inherits the queue but not the listener thread.
+    # It gets a fresh queue, so records still pending in the parent's copy are not written twice,
+    # and only the console handlers: the parent owns (and rotates) the log file, and the inherited
+    # file buffer may have been mid-write in the parent's listener thread at fork time.
+    global _listener
+
+    if _listener is not None:
+        child_queue = queue.SimpleQueue()
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, QueueHandler) and handler.queue is _listener.queue:
+                handler.queue = child_queue
+        console_handlers = [handler for handler in _listener.handlers if not isinstance(handler, logging.FileHandler)]
+        _listener = QueueListener(child_queue, *console_handlers, respect_handler_level=True)
+        _listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
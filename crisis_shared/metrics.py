@@ -0,0 +1,221 @@
+"""
+In-process extraction metrics: labelled counters and timing histograms.
+
+Pipelines record into the shared REGISTRY (e.g. `with stage_timer('parse'):`).
+The registry renders the Prometheus text format for /metrics endpoints and a
+JSON summary for run reports. Metrics are per process; work done in
+process-pool workers is included only where the pool task returns its
+REGISTRY.export() for the parent to merge() (see text_parser.py).
+"""
+import copy
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_METRIC = 'extraction_stage_seconds'
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """Monotonic count per label set"""
+    kind = 'counter'
+
+    def __init__(self, name, help_text, lock):
+        self.name = name
+        self.help = help_text
+        self._lock = lock
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def merge(self, values):
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+    def render(self):
+        lines = []
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+    def summary(self):
+        return [dict(key, value=value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Bucketed observations (with sum, count and max) per label set"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, lock, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._lock = lock
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0, 'max': 0.0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+            state['max'] = max(state['max'], value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the time spent in the with-block (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def merge(self, values):
+        with self._lock:
+            for key, other in values.items():
+                state = self._values.get(key)
+                if state is None:
+                    self._values[key] = copy.deepcopy(other)
+                    continue
+                state['buckets'] = [mine + theirs for mine, theirs in zip(state['buckets'], other['buckets'])]
+                state['sum'] += other['sum']
+                state['count'] += other['count']
+                state['max'] = max(state['max'], other['max'])
+
+    def _quantile(self, state, q):
+        """Approximate quantile: upper bound of the bucket holding it"""
+        rank = q * state['count']
+        seen = 0
+        for bound, count in zip(self.buckets, state['buckets']):
+            seen += count
+            if seen >= rank:
+                return min(bound, state['max'])
+        return state['max']
+
+    def render(self):
+        lines = []
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['buckets']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {state['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {state['count']}")
+        return lines
+
+    def summary(self):
+        return [dict(key, count=state['count'], total_seconds=round(state['sum'], 6),
+                     mean_seconds=round(state['sum'] / state['count'], 6),
+                     p50_seconds=self._quantile(state, 0.5), p95_seconds=self._quantile(state, 0.95),
+                     max_seconds=round(state['max'], 6))
+                for key, state in sorted(self._values.items())]
+
+
+class MetricsRegistry:
+    """Named counters and histograms with Prometheus and JSON output"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, metric_class, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, help_text, self._lock, **kwargs)
+        return metric
+
+    def counter(self, name, help_text=''):
+        return self._get(Counter, name, help_text)
+
+    def histogram(self, name, help_text='', buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                if metric.help:
+                    lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Plain dict of every metric, for JSON reports"""
+        with self._lock:
+            return {name: metric.summary() for name, metric in sorted(self._metrics.items())}
+
+    def write_json(self, path, **extra):
+        """Write the summary (plus any extra fields) to a JSON file"""
+        report = dict(extra, generated_at=time.strftime('%Y-%m-%dT%H:%M:%S'), metrics=self.summary())
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def export(self):
+        """Picklable copy of every metric's values, for merge() into another process's registry"""
+        with self._lock:
+            return [(metric.kind, name, metric.help, getattr(metric, 'buckets', None), copy.deepcopy(metric._values))
+                    for name, metric in self._metrics.items()]
+
+    def merge(self, exported):
+        """Add the values of another registry's export() to this one"""
+        for kind, name, help_text, buckets, values in exported:
+            if kind == 'counter':
+                metric = self.counter(name, help_text)
+            else:
+                metric = self.histogram(name, help_text, buckets)
+            metric.merge(values)
+
+
+REGISTRY = MetricsRegistry()
+
+# Prometheus text format content type, for /metrics responses
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def stage_timer(stage, **labels):
+    """Time one pipeline stage into the shared stage histogram"""
+    return REGISTRY.histogram(STAGE_METRIC, 'Time spent per extraction stage').time(stage=stage, **labels)
+
+
+def observe_stage(stage, seconds, **labels):
+    """Record an already measured stage duration"""
+    REGISTRY.histogram(STAGE_METRIC, 'Time spent per extraction stage').observe(seconds, stage=stage, **labels)
+
+
+def count(name, help_text='', amount=1, **labels):
+    """Increment a counter in the shared registry"""
+    REGISTRY.counter(name, help_text).inc(amount, **labels)
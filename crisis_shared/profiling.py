@@ -0,0 +1,278 @@
+"""
+Profiling mode for extraction runs.
+
+RunProfiler wraps a run and captures any of:
+  cpu     cProfile stats (calling thread only) -> <prefix>.prof and a top-functions table
+  wall    sampled wall-clock stacks of every thread -> <prefix>_wall.folded (flamegraph input)
+  memory  tracemalloc peak and top allocation sites -> <prefix>_memory.txt
+
+Every run also writes <prefix>_profile.json, a summary that can be compared
+between versions:
+
+    python -m crisis_shared.profiling diff old_profile.json new_profile.json
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime
+
+PROFILE_MODES = ('cpu', 'wall', 'memory')
+
+# Functions and stacks kept in the JSON summary
+SUMMARY_TOP_N = 200
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class WallClockSampler(threading.Thread):
+    """Samples the stacks of all other threads at a fixed interval"""
+
+    def __init__(self, interval=0.01):
+        super().__init__(name='wall-clock-sampler', daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.rounds = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.rounds += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class RunProfiler:
+    """Context manager capturing the requested profiles for one run"""
+
+    def __init__(self, name, output_dir='.', modes=PROFILE_MODES, sample_interval=0.01, memory_frames=10):
+        unknown = set(modes) - set(PROFILE_MODES)
+        if unknown:
+            raise ValueError(f"Unknown profile modes: {', '.join(sorted(unknown))}")
+
+        self.name = name
+        self.modes = tuple(modes)
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.memory_frames = memory_frames
+        self.prefix = os.path.join(output_dir, f"profile_{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.summary = {}
+
+        self._cpu = None
+        self._sampler = None
+        self._started = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if 'memory' in self.modes:
+            tracemalloc.start(self.memory_frames)
+        if 'wall' in self.modes:
+            self._sampler = WallClockSampler(self.sample_interval)
+            self._sampler.start()
+        if 'cpu' in self.modes:
+            self._cpu = cProfile.Profile()
+            self._cpu.enable()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        """Stop profiling and write the outputs; returns the summary"""
+        duration = time.perf_counter() - self._started
+        if self._cpu:
+            self._cpu.disable()
+        if self._sampler:
+            self._sampler.stop()
+
+        self.summary = {
+            'name': self.name,
+            'created': datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'duration_seconds': round(duration, 4),
+            'files': {}
+        }
+
+        if self._cpu:
+            self._write_cpu()
+        if self._sampler:
+            self._write_wall(duration)
+        if 'memory' in self.modes:
+            self._write_memory()
+
+        with open(f"{self.prefix}_profile.json", 'w', encoding='utf-8') as f:
+            json.dump(self.summary, f, indent=2)
+        print(f"Profile saved to {self.prefix}_profile.json", file=sys.stderr)
+        return self.summary
+
+    def _write_cpu(self):
+        self._cpu.dump_stats(f"{self.prefix}.prof")
+
+        text = io.StringIO()
+        stats = pstats.Stats(self._cpu, stream=text)
+        stats.sort_stats('cumulative').print_stats(50)
+        with open(f"{self.prefix}_cpu.txt", 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+
+        functions = []
+        for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            functions.append({
+                'function': f"{os.path.basename(filename)}:{line}({function})",
+                'calls': ncalls,
+                'self_seconds': round(tottime, 6),
+                'cumulative_seconds': round(cumtime, 6)
+            })
+        functions.sort(key=lambda entry: entry['cumulative_seconds'], reverse=True)
+
+        self.summary['cpu'] = {'total_seconds': round(stats.total_tt, 6), 'functions': functions[:SUMMARY_TOP_N]}
+        self.summary['files'].update(cpu_stats=f"{self.prefix}.prof", cpu_report=f"{self.prefix}_cpu.txt")
+
+    def _write_wall(self, duration):
+        sampler = self._sampler
+        with open(f"{self.prefix}_wall.folded", 'w', encoding='utf-8') as f:
+            for stack, samples in sampler.stacks.most_common():
+                f.write(f"{stack} {samples}\n")
+
+        # Seconds per sample, from the achieved rather than the requested interval
+        per_sample = duration / sampler.rounds if sampler.rounds else 0.0
+        inclusive = Counter()
+        for stack, samples in sampler.stacks.items():
+            for label in set(stack.split(';')):
+                inclusive[label] += samples
+
+        self.summary['wall'] = {
+            'samples': sampler.rounds,
+            'interval_seconds': round(per_sample, 6),
+            'functions': [{'function': label, 'seconds': round(samples * per_sample, 4)}
+                          for label, samples in inclusive.most_common(SUMMARY_TOP_N)],
+            'stacks': [{'stack': stack, 'seconds': round(samples * per_sample, 4)}
+                       for stack, samples in sampler.stacks.most_common(20)]
+        }
+        self.summary['files']['wall_stacks'] = f"{self.prefix}_wall.folded"
+
+    def _write_memory(self):
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        top = snapshot.statistics('lineno')[:30]
+        with open(f"{self.prefix}_memory.txt", 'w', encoding='utf-8') as f:
+            f.write(f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB (still allocated at end: "
+                    f"{current / 1024 / 1024:.1f} MiB)\n\n")
+            for stat in top:
+                f.write(f"{stat}\n")
+
+        self.summary['memory'] = {
+            'peak_bytes': peak,
+            'current_bytes': current,
+            'top': [{'location': str(stat.traceback[0]), 'bytes': stat.size, 'count': stat.count} for stat in top]
+        }
+        self.summary['files']['memory_report'] = f"{self.prefix}_memory.txt"
+
+
+def add_profile_arguments(parser, default_dir='.'):
+    """Add --profile [modes] and --profile-dir to an argparse parser"""
+    parser.add_argument('--profile', nargs='?', const=','.join(PROFILE_MODES), metavar='MODES',
+                        help=f"Profile the run (comma-separated modes, default: {','.join(PROFILE_MODES)})")
+    parser.add_argument('--profile-dir', default=default_dir, help='Where profile outputs are written')
+
+
+def profile_from_args(args, name):
+    """RunProfiler for parsed --profile arguments, or a no-op context if profiling is off"""
+    if not getattr(args, 'profile', None):
+        return nullcontext()
+    return RunProfiler(name, args.profile_dir, modes=[mode.strip() for mode in args.profile.split(',')])
+
+
+def _index(entries, key, value):
+    return {entry[key]: entry[value] for entry in entries}
+
+
+def diff_profiles(old, new, threshold=0.1, min_seconds=0.01):
+    """
+    Compare two profile summaries. Returns (rows, regressions) where rows are
+    (metric, old, new) tuples and regressions are the rows that grew by more
+    than `threshold` (relative) and `min_seconds` (absolute, for timings).
+    """
+    rows = [('duration_seconds', old.get('duration_seconds'), new.get('duration_seconds'))]
+
+    if 'memory' in old and 'memory' in new:
+        rows.append(('memory peak_bytes', old['memory']['peak_bytes'], new['memory']['peak_bytes']))
+
+    for mode, value in (('cpu', 'cumulative_seconds'), ('wall', 'seconds')):
+        if mode in old and mode in new:
+            old_functions = _index(old[mode]['functions'], 'function', value)
+            new_functions = _index(new[mode]['functions'], 'function', value)
+            for function in sorted(set(old_functions) | set(new_functions)):
+                rows.append((f"{mode} {function}", old_functions.get(function, 0.0), new_functions.get(function, 0.0)))
+
+    regressions = []
+    for metric, old_value, new_value in rows:
+        if old_value is None or new_value is None:
+            continue
+        minimum = 0 if metric.startswith('memory') else min_seconds
+        if new_value - old_value > max(minimum, threshold * old_value):
+            regressions.append((metric, old_value, new_value))
+
+    return rows, regressions
+
+
+def main():
+    """Compare two profile summaries; exits with status 1 when something regressed"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Profiling tools for extraction runs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    diff_parser = subparsers.add_parser('diff', help='Compare two *_profile.json summaries')
+    diff_parser.add_argument('old', help='Baseline profile summary')
+    diff_parser.add_argument('new', help='Profile summary to check')
+    diff_parser.add_argument('--threshold', type=float, default=0.1, help='Relative growth reported as a regression')
+    diff_parser.add_argument('--min-seconds', type=float, default=0.01, help='Ignore timing changes smaller than this')
+    diff_parser.add_argument('--all', action='store_true', help='Show every compared metric, not just regressions')
+
+    args = parser.parse_args()
+
+    with open(args.old, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(args.new, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    rows, regressions = diff_profiles(old, new, args.threshold, args.min_seconds)
+
+    shown = rows if args.all else regressions
+    for metric, old_value, new_value in sorted(shown, key=lambda row: (row[2] or 0) - (row[1] or 0), reverse=True):
+        change = f"{(new_value - old_value) / old_value:+.0%}" if old_value else 'new'
+        print(f"{metric:<70} {old_value:>14} -> {new_value:>14}  {change}")
+
+    print(f"\n{len(regressions)} regressions (threshold {args.threshold:.0%}) between {args.old} and {args.new}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Adaptive per-host rate limiting for the scrapers and extractors.
+
+Each host has a token bucket whose refill rate adapts to how the host is
+doing: every 2xx response within the host's usual latency adds a little to
+the rate (additive increase), while 403/429/5xx responses, timeouts and
+connection errors halve it and a response much slower than the host's usual
+latency cuts it by a fifth (multiplicative decrease). Other responses (3xx,
+404 and the remaining 4xx) say nothing about load and leave the rate alone.
+Retry-After is honoured as a pause of the host and a cap on its rate.
+A robots.txt Crawl-delay (whole seconds, as urllib.robotparser reads it) or
+Request-rate is a floor on the delay between requests that adaptation never
+goes below.
+
+Learned rates and latencies are saved to a JSON state file, so the next run
+starts from what the last one learned instead of the default delay.
+
+Callers do:
+    limiter.wait(url)
+    ... make the request ...
+    limiter.record(url, status=response.status_code, latency=seconds,
+                   retry_after=response.headers.get('Retry-After'))
+or record(url, error=True) when the request timed out or failed to connect.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+# Responses that mean "slow down" besides 5xx (403 is how many sites refuse crawlers going too fast)
+THROTTLE_STATUSES = {403, 429}
+
+# Latency above this multiple of the host's baseline counts as the host struggling
+SLOW_FACTOR = 2.0
+
+# Weight of the newest response in the latency moving average
+LATENCY_ALPHA = 0.2
+
+# How long a fetched robots.txt is trusted (also applies to failed fetches)
+ROBOTS_TTL = 24 * 3600
+
+# Unsaved changes are written at most this often by record()
+AUTOSAVE_INTERVAL = 30.0
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), None if absent or invalid"""
+    if value is None or value == '':
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostState:
+    """Bucket and learned figures of one host"""
+
+    def __init__(self, delay):
+        self.delay = delay             # Current seconds per request (1 / refill rate)
+        self.tokens = 1.0              # May go negative: each negative token is a reserved future slot
+        self.refilled = time.monotonic()
+        self.paused_until = 0.0        # Monotonic time before which no request starts (Retry-After)
+        self.latency = None            # Moving average of response latency
+        self.baseline = None           # Typical healthy latency, drifts slowly
+        self.crawl_delay = None        # From robots.txt
+        self.robots_checked = None     # Wall-clock time robots.txt was last fetched
+
+    def to_json(self):
+        return {
+            'delay': round(self.delay, 4),
+            'latency': self.latency,
+            'baseline': self.baseline,
+            'crawl_delay': self.crawl_delay,
+            'robots_checked': self.robots_checked
+        }
+
+
+class AdaptiveRateLimiter:
+    """Token bucket per host, with AIMD on the refill rate; thread-safe"""
+
+    def __init__(self, delay=2.0, min_delay=0.5, max_delay=60.0, burst=1, increase=0.05, state_file=None,
+                 respect_robots=True, user_agent='*', robots_timeout=10):
+        self.default_delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.burst = burst
+        self.increase = increase      # Requests per second added after each healthy response
+        self.state_file = state_file
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.robots_timeout = robots_timeout
+        self.hosts = {}
+        self._lock = threading.Lock()
+        self._robots_locks = {}
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self.load()
+
+    def _host(self, host):
+        """State of a host, created at the default delay; caller holds the lock"""
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self._clamp(self.default_delay, None))
+        return state
+
+    def _clamp(self, delay, crawl_delay):
+        floor = max(self.min_delay, crawl_delay or 0.0)
+        return min(max(delay, floor), max(self.max_delay, floor))
+
+    def load(self):
+        """Start from the rates saved by an earlier run"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable rate limit state {self.state_file}: {e}")
+            return
+
+        for host, figures in saved.get('hosts', {}).items():
+            state = HostState(self.default_delay)
+            state.latency = figures.get('latency')
+            state.baseline = figures.get('baseline')
+            state.crawl_delay = figures.get('crawl_delay')
+            state.robots_checked = figures.get('robots_checked')
+            state.delay = self._clamp(figures.get('delay', self.default_delay), state.crawl_delay)
+            self.hosts[host] = state
+
+    def save(self):
+        """Write the learned rates (atomically) if they changed"""
+        if not self.state_file:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {'updated': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                        'hosts': {host: state.to_json() for host, state in sorted(self.hosts.items())}}
+            self._dirty = False
+            self._saved_at = time.monotonic()
+
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def _check_robots(self, url, host):
+        """Fetch the host's robots.txt crawl delay if it hasn't been fetched recently"""
+        with self._lock:
+            checked = self._host(host).robots_checked
+        if checked and time.time() - checked < ROBOTS_TTL:
+            return
+
+        # Concurrent first requests to a host fetch its robots.txt once
+        with self._lock:
+            robots_lock = self._robots_locks.setdefault(host, threading.Lock())
+        with robots_lock:
+            with self._lock:
+                checked = self._host(host).robots_checked
+            if checked and time.time() - checked < ROBOTS_TTL:
+                return
+
+            crawl_delay = None
+            scheme = urlparse(url).scheme or 'https'
+            robots_url = f"{scheme}://{host}/robots.txt"
+            try:
+                headers = {'User-Agent': self.user_agent} if self.user_agent != '*' else {}
+                request = urllib.request.Request(robots_url, headers=headers)
+                with urllib.request.urlopen(request, timeout=self.robots_timeout) as response:
+                    lines = response.read().decode('utf-8', errors='replace').splitlines()
+                parser = RobotFileParser(robots_url)
+                parser.parse(lines)
+                parser.modified()  # Otherwise the parser treats the rules as never fetched
+                crawl_delay = parser.crawl_delay(self.user_agent)
+                request_rate = parser.request_rate(self.user_agent)
+                if request_rate and request_rate.requests:
+                    crawl_delay = max(crawl_delay or 0, request_rate.seconds / request_rate.requests)
+            except Exception as e:
+                # Missing or unreachable robots.txt: no crawl delay, try again after the TTL
+                logging.debug(f"No robots.txt for {host}: {e}")
+
+            with self._lock:
+                state = self._host(host)
+                state.crawl_delay = float(crawl_delay) if crawl_delay else None
+                state.robots_checked = time.time()
+                state.delay = self._clamp(state.delay, state.crawl_delay)
+                self._dirty = True
+            if crawl_delay:
+                logging.info(f"robots.txt of {host} asks for {float(crawl_delay):.1f}s between requests")
+
+    def wait(self, url):
+        """Block until a request to this URL's host is allowed"""
+        host = urlparse(url).netloc
+        if self.respect_robots:
+            self._check_robots(url, host)
+
+        with self._lock:
+            state = self._host(host)
+            now = time.monotonic()
+            state.tokens = min(self.burst, state.tokens + (now - state.refilled) / state.delay)
+            state.refilled = now
+            # Reserve a token; a negative balance is the wait until it refills
+            state.tokens -= 1.0
+            sleep_for = max(-state.tokens * state.delay, state.paused_until - now, 0.0)
+
+        if sleep_for > 0:
+            time.sleep(sleep_for)
+
+    def record(self, url, status=None, latency=None, error=False, retry_after=None):
+        """Adapt the host's rate to how a request went"""
+        host = urlparse(url).netloc
+        retry_after = parse_retry_after(retry_after)
+
+        with self._lock:
+            state = self._host(host)
+            old_delay = state.delay
+            rate = 1.0 / state.delay
+
+            # Settle the bucket at the old rate, so slots already reserved keep their timing
+            now = time.monotonic()
+            state.tokens = min(self.burst, state.tokens + (now - state.refilled) / old_delay)
+            state.refilled = now
+
+            if latency is not None and not error:
+                state.latency = latency if state.latency is None else (
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * state.latency)
+
+            if error or (status is not None and (status in THROTTLE_STATUSES or status >= 500)):
+                rate /= 2
+                if retry_after:
+                    rate = min(rate, 1.0 / retry_after)
+                    state.paused_until = max(state.paused_until, time.monotonic() + retry_after)
+            elif latency is not None and state.baseline and state.latency > SLOW_FACTOR * state.baseline:
+                rate *= 0.8
+            elif status is not None and 200 <= status < 300:
+                rate += self.increase
+
+            if latency is not None and not error:
+                # The baseline follows improvements quickly and degradations slowly
+                if state.baseline is None:
+                    state.baseline = state.latency
+                else:
+                    state.baseline += (0.1 if state.latency < state.baseline else 0.01) * (
+                        state.latency - state.baseline)
+
+            state.delay = new_delay = self._clamp(1.0 / rate, state.crawl_delay)
+            self._dirty = True
+            autosave = time.monotonic() - self._saved_at > AUTOSAVE_INTERVAL
+
+        if new_delay > old_delay * 1.5:
+            logging.info(f"Slowing down {host}: {old_delay:.2f}s -> {new_delay:.2f}s between requests")
+        if autosave:
+            self.save()
+
+    def delay(self, url):
+        """Current seconds between requests to this URL's host"""
+        with self._lock:
+            return self._host(urlparse(url).netloc).delay
@@ -1,30 +1,123 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-from extractor.text_parser import extract_incidents_from_text
+from extractor.text_parser import extract_incidents_from_text, extract_incidents_from_stream
 from extractor.url_parser import extract_incidents_from_url
+from extractor.result_cache import ResultCache, normalize_url
+from crisis_shared.metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE, count
+import hashlib
+import json
 import os
+import time
+
+# Origins allowed to call the API (your GitHub Pages domain)
+CORS_ORIGINS = ["https://aliattia02.github.io"]
 
 app = Flask(__name__)
 # Enable CORS for your GitHub Pages domain
-CORS(app, origins=["https://aliattia02.github.io"])
+CORS(app, origins=CORS_ORIGINS)
+
+# URL extraction results are shared between users for EXTRACTOR_CACHE_TTL seconds
+url_cache = ResultCache(
+    ttl=int(os.environ.get('EXTRACTOR_CACHE_TTL', 600)),
+    max_entries=int(os.environ.get('EXTRACTOR_CACHE_SIZE', 1000))
+)
+
+
+def is_cacheable(incidents):
+    """Failed fetches are retried on the next request rather than cached"""
+    return not any('error' in incident for incident in incidents)
+
+
+def cache_headers(expires_at, status):
+    """Response headers letting browsers and CDNs reuse a URL extraction"""
+    if not expires_at:
+        return {'Cache-Control': 'no-store', 'X-Cache': status}
+    max_age = max(0, int(expires_at - time.time()))
+    return {'Cache-Control': f'public, max-age={max_age}', 'X-Cache': status}
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value covers etag (weak comparison, as for GET)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+
+def url_extraction_parts(incidents, expires_at, status, if_none_match=None):
+    """
+    (HTTP status, headers, body) of a URL extraction response, shared by the
+    WSGI route and the ASGI fast path: cacheable results carry an ETag, and a
+    request whose If-None-Match matches it gets a 304 without a body.
+    """
+    body = json.dumps({'incidents': incidents}).encode('utf-8')
+    headers = cache_headers(expires_at, status)
+    if not expires_at:
+        return 200, headers, body
+
+    headers['ETag'] = '"' + hashlib.sha1(body).hexdigest() + '"'
+    if etag_matches(if_none_match, headers['ETag']):
+        return 304, headers, b''
+    return 200, headers, body
+
+
+def url_extraction_response(url):
+    """Serve a URL extraction from the cache, coalescing concurrent misses"""
+    incidents, expires_at, status = url_cache.get_or_compute(
+        normalize_url(url), lambda: extract_incidents_from_url(url), cacheable=is_cacheable
+    )
+    count('url_cache_requests_total', 'URL extraction cache lookups by result', result=status)
+
+    code, headers, body = url_extraction_parts(incidents, expires_at, status, request.headers.get('If-None-Match'))
+    return Response(body, status=code, headers=headers, mimetype='application/json')
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/extract', methods=['POST'])
+@app.route('/extract', methods=['GET', 'POST'])
 def extract():
+    # GET /extract?url=... is the cacheable form for browsers and CDNs
+    if request.method == 'GET':
+        if not request.args.get('url'):
+            return jsonify({'error': 'No URL provided'}), 400
+        return url_extraction_response(request.args['url'])
+
     data = request.json
 
     if 'text' in data:
         incidents = extract_incidents_from_text(data['text'])
         return jsonify({'incidents': incidents})
     elif 'url' in data:
-        incidents = extract_incidents_from_url(data['url'])
-        return jsonify({'incidents': incidents})
+        return url_extraction_response(data['url'])
     else:
         return jsonify({'error': 'No text or URL provided'}), 400
 
+@app.route('/extract/stream', methods=['POST'])
+def extract_stream():
+    """
+    Extract incidents from a large plain-text body or a 'file' upload.
+    Incidents are streamed back as newline-delimited JSON while the input is read.
+    """
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        encoding = upload.mimetype_params.get('charset', 'utf-8')
+    else:
+        stream = request.stream
+        encoding = request.mimetype_params.get('charset', 'utf-8')
+
+    def generate():
+        for incident in extract_incidents_from_stream(stream, encoding):
+            yield json.dumps(incident) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(REGISTRY.to_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == '__main__':
     # Use PORT environment variable provided by Render
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,162 @@
+"""
+ASGI entry point for the incident extractor.
+
+URL extractions (POST /extract with a 'url') are served natively with an async
+HTTP client, so slow upstream sites overlap on the event loop instead of each
+one holding a worker. Every other request is passed through to the Flask app.
+
+Run with:  gunicorn asgi:application -k uvicorn.workers.UvicornWorker
+      or:  EXTRACTOR_SERVER=asgi python start.py
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app, CORS_ORIGINS, url_cache, is_cacheable, url_extraction_parts
+from extractor.result_cache import normalize_url
+from extractor.url_parser import ASYNC_CONCURRENCY, create_async_client, extract_incidents_from_url_async
+from crisis_shared.metrics import count
+
+flask_app = WsgiToAsgi(app)
+
+logger = logging.getLogger(__name__)
+
+# Created per worker process on lifespan startup (or first use)
+http_client = None
+fetch_slots = None
+
+# URL extractions currently running on this worker's event loop, by cache key
+in_flight = {}
+
+
+def _get_client():
+    """Return the worker's async HTTP client and concurrency limiter"""
+    global http_client, fetch_slots
+
+    if http_client is None:
+        http_client = create_async_client()
+        fetch_slots = asyncio.Semaphore(ASYNC_CONCURRENCY)
+    return http_client, fetch_slots
+
+
+async def _read_body(receive):
+    """Read the full request body from the ASGI receive channel"""
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+def _replay_body(body, receive):
+    """Build a receive channel that hands an already-read body to the Flask app"""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        return await receive()
+
+    return replay
+
+
+async def _extract_url_cached(url):
+    """Async URL extraction through the shared result cache, coalescing concurrent misses"""
+    key = normalize_url(url)
+
+    cached = url_cache.get(key)
+    if cached is not None:
+        return cached[0], cached[1], 'HIT'
+
+    if key in in_flight:
+        incidents, expires_at = await asyncio.shield(in_flight[key])
+        return incidents, expires_at, 'COALESCED'
+
+    future = in_flight[key] = asyncio.get_running_loop().create_future()
+    try:
+        client, slots = _get_client()
+        async with slots:
+            incidents = await extract_incidents_from_url_async(url, client)
+        expires_at = url_cache.set(key, incidents) if is_cacheable(incidents) else 0
+        future.set_result((incidents, expires_at))
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        logger.error(f"URL extraction failed for {url}: {e}")
+        future.set_exception(e)
+        # Waiting requests re-raise it; mark it retrieved so an unawaited future isn't reported at GC
+        future.exception()
+        raise
+    finally:
+        del in_flight[key]
+
+    return incidents, expires_at, 'MISS'
+
+
+async def _send_json(send, scope, body, status=200, extra_headers=None):
+    """Send an encoded JSON body, adding CORS headers for allowed origins"""
+    headers = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode('latin-1')),
+    ]
+    for name, value in (extra_headers or {}).items():
+        headers.append((name.lower().encode('latin-1'), value.encode('latin-1')))
+
+    origin = dict(scope.get('headers', [])).get(b'origin', b'').decode('latin-1')
+    if origin in CORS_ORIGINS:
+        headers.append((b'access-control-allow-origin', origin.encode('latin-1')))
+        headers.append((b'vary', b'Origin'))
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _handle_lifespan(receive, send):
+    """Open the HTTP client on startup and close it on shutdown"""
+    global http_client
+
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            _get_client()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if http_client is not None:
+                await http_client.aclose()
+                http_client = None
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _handle_lifespan(receive, send)
+        return
+
+    if scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] == '/extract':
+        body = await _read_body(receive)
+
+        try:
+            data = json.loads(body or b'null')
+        except ValueError:
+            data = None
+
+        # Text extraction keeps priority over URLs, as in the Flask route
+        if isinstance(data, dict) and 'url' in data and 'text' not in data:
+            incidents, expires_at, status = await _extract_url_cached(data['url'])
+            count('url_cache_requests_total', 'URL extraction cache lookups by result', result=status)
+            if_none_match = dict(scope.get('headers', [])).get(b'if-none-match', b'').decode('latin-1')
+            code, headers, body = url_extraction_parts(incidents, expires_at, status, if_none_match)
+            await _send_json(send, scope, body, status=code, extra_headers=headers)
+            return
+
+        receive = _replay_body(body, receive)
+
+    await flask_app(scope, receive, send)
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+
+def normalize_url(url):
+    """Cache key for a URL: trimmed, lower-case scheme/host, no fragment"""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', parts.query, ''))
+
+
+class _Flight:
+    """An extraction in progress that other requests for the same key can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.expires_at = 0
+        self.error = None
+
+
+class ResultCache:
+    """
+    Thread-safe TTL cache for extraction results with single-flight computation:
+    concurrent misses for the same key wait for one computation instead of
+    starting their own
+    """
+
+    def __init__(self, ttl=600, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, expires_at), oldest first
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (value, expires_at) for a fresh entry, or None"""
+        with self._lock:
+            return self._get_locked(key)
+
+    def _get_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, value):
+        """Store a value and return its expiry timestamp"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return expires_at
+
+    def get_or_compute(self, key, compute, cacheable=lambda value: True):
+        """
+        Return (value, expires_at, status) where status is 'HIT', 'MISS' (this
+        call computed the value) or 'COALESCED' (waited for another request).
+        Values rejected by `cacheable` are returned but not stored; their
+        expires_at is 0.
+        """
+        with self._lock:
+            entry = self._get_locked(key)
+            if entry is not None:
+                return entry[0], entry[1], 'HIT'
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, flight.expires_at, 'COALESCED'
+
+        try:
+            flight.value = compute()
+            if cacheable(flight.value):
+                flight.expires_at = self.set(key, flight.value)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+        return flight.value, flight.expires_at, 'MISS'
@@ -1,12 +1,29 @@
+import codecs
+import multiprocessing
+import os
 import re
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import spacy
 import nltk
 from nltk.tokenize import sent_tokenize
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from crisis_shared.gazetteer import get_gazetteer
+from crisis_shared.log_pipeline import setup_logging
+from crisis_shared.metrics import REGISTRY, count, stage_timer
+
+# Configure logging (EXTRACTOR_LOG_FILE adds a rotating, gzipped log file; every server
+# worker imports this module, so with several workers each writes its own <name>.<pid>.log)
+setup_logging(
+    log_file=os.environ.get('EXTRACTOR_LOG_FILE'),
+    level=os.environ.get('EXTRACTOR_LOG_LEVEL', 'INFO'),
+    json_format=os.environ.get('EXTRACTOR_LOG_JSON', '1') == '1',
+    per_process=int(os.environ.get('EXTRACTOR_WORKERS', 1)) > 1
+)
 logger = logging.getLogger(__name__)
 
 # Try to download required NLTK resources
@@ -23,13 +40,22 @@ except:
     logger.warning("spaCy model not available. Using simpler NLP methods.")
     SPACY_AVAILABLE = False
 
-# Gaza-specific location data
-GAZA_LOCATIONS = [
-    "Gaza City", "Gaza Strip", "Rafah", "Khan Younis", "Jabalia", "Beit Lahiya",
-    "Beit Hanoun", "Deir al-Balah", "Nuseirat", "Al-Shati", "Beach Camp",
-    "Bureij", "Maghazi", "Northern Gaza", "Central Gaza", "Southern Gaza",
-    "Jabalia Camp", "Shuja'iyya", "Zeitoun", "Tuffah", "Daraj", "Sabra"
-]
+# Documents at least this long are processed on the worker pool instead of serially
+PARALLEL_MIN_CHARS = int(os.environ.get('EXTRACTOR_PARALLEL_MIN_CHARS', 200000))
+
+# Number of worker processes. Defaults to the CPU cores per server worker process
+# (start.py exports EXTRACTOR_WORKERS), so N server workers don't each start N
+# spaCy-loading processes; with one server worker per core that is 1 (no pool).
+SERVER_WORKERS = max(1, int(os.environ.get('EXTRACTOR_WORKERS', 1)))
+PARALLEL_WORKERS = int(os.environ.get('EXTRACTOR_PARALLEL_WORKERS', max(1, (os.cpu_count() or 1) // SERVER_WORKERS)))
+
+# Streaming ingestion: bytes read per step, and the paragraph length at which
+# an unbroken block of text is split into sentences instead of buffered further
+STREAM_READ_SIZE = 64 * 1024
+STREAM_MAX_PARAGRAPH_CHARS = 20000
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
 
 # Incident classification keywords
 INCIDENT_TYPES = {
@@ -89,10 +115,9 @@ def extract_locations(text):
     """Extract location mentions from text"""
     locations = []
 
-    # Check for known Gaza locations
-    for location in GAZA_LOCATIONS:
-        if location.lower() in text.lower():
-            locations.append(location)
+    # Known Gaza locations (shared gazetteer), most specific first
+    for place in get_gazetteer().rank_places(text):
+        locations.append(place.name)
 
     # Try spaCy NER if available
     if SPACY_AVAILABLE:
@@ -101,8 +126,8 @@ def extract_locations(text):
             if ent.label_ == "GPE" or ent.label_ == "LOC":
                 locations.append(ent.text)
 
-    # Remove duplicates and return
-    return list(set(locations))
+    # Remove duplicates (keeping first-seen order so results are reproducible across processes)
+    return list(dict.fromkeys(locations))
 
 
 def extract_casualties(text):
@@ -173,7 +198,8 @@ def extract_incidents_from_paragraph(paragraph):
         return None  # Skip short paragraphs
 
     # Determine if this paragraph likely describes an incident
-    incident_type = determine_incident_type(paragraph)
+    with stage_timer('classify'):
+        incident_type = determine_incident_type(paragraph)
     if incident_type == "general":
         # Check if any incident-related keywords are present
         has_incident_keywords = any(
@@ -185,9 +211,11 @@ def extract_incidents_from_paragraph(paragraph):
             return None
 
     # Extract information
-    date = extract_dates(paragraph)
-    locations = extract_locations(paragraph)
-    casualties = extract_casualties(paragraph)
+    with stage_timer('regex'):
+        date = extract_dates(paragraph)
+        casualties = extract_casualties(paragraph)
+    with stage_timer('location'):
+        locations = extract_locations(paragraph)
 
     # Create incident object
     incident = {
@@ -206,6 +234,7 @@ def extract_incidents_from_paragraph(paragraph):
     if casualties["total"] is not None:
         incident["casualties"] = casualties
 
+    count('extracted_incidents_total', 'Incidents extracted by type', type=incident_type)
     return incident
 
 
@@ -222,9 +251,155 @@ def split_into_meaningful_chunks(text):
     return [p for p in paragraphs if p.strip()]
 
 
-def extract_incidents_from_text(text):
+def iter_text_from_stream(stream, encoding='utf-8', read_size=STREAM_READ_SIZE):
+    """Read a binary or text stream incrementally, yielding decoded text pieces"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    while True:
+        data = stream.read(read_size)
+        if not data:
+            break
+        text = data if isinstance(data, str) else decoder.decode(data)
+        if text:
+            yield text
+
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_meaningful_chunks(pieces):
+    """
+    Streaming counterpart of split_into_meaningful_chunks: yields paragraphs as
+    soon as their closing blank line arrives, keeping only the unfinished
+    paragraph in memory
+    """
+    buffer = ""
+    emitted = 0
+    # True while the current paragraph is being emitted sentence by sentence
+    in_long_paragraph = False
+
+    for piece in pieces:
+        buffer += piece
+        *paragraphs, buffer = buffer.split('\n\n')
+
+        if paragraphs and in_long_paragraph:
+            in_long_paragraph = False
+            yield from sent_tokenize(paragraphs.pop(0))
+
+        for paragraph in paragraphs:
+            if paragraph.strip():
+                emitted += 1
+                yield paragraph
+
+        # Very long unbroken text: emit complete sentences, keep the last (possibly partial) one
+        if len(buffer) > STREAM_MAX_PARAGRAPH_CHARS:
+            sentences = sent_tokenize(buffer)
+            if len(sentences) > 1:
+                in_long_paragraph = True
+                buffer = sentences.pop()
+                emitted += len(sentences)
+                yield from sentences
+            elif len(buffer) > STREAM_MAX_PARAGRAPH_CHARS * 4:
+                # No sentence boundary at all - cut at the last space to bound memory
+                cut = buffer.rfind(' ', 0, STREAM_MAX_PARAGRAPH_CHARS) + 1 or STREAM_MAX_PARAGRAPH_CHARS
+                emitted += 1
+                yield buffer[:cut]
+                buffer = buffer[cut:]
+
+    if not buffer.strip():
+        return
+
+    # Same rule as the in-memory path: a single long paragraph is split by sentences
+    if in_long_paragraph or (emitted == 0 and len(buffer) > 300):
+        yield from sent_tokenize(buffer)
+    else:
+        yield buffer
+
+
+def extract_incidents_from_stream(stream, encoding='utf-8'):
+    """
+    Extract incidents from a file-like object without loading it into memory,
+    yielding each incident as soon as its paragraph has been read
+    """
+    chunk_count = 0
+    incident_count = 0
+
+    for chunk in iter_meaningful_chunks(iter_text_from_stream(stream, encoding)):
+        chunk_count += 1
+        incident = extract_incidents_from_paragraph(chunk)
+        if incident:
+            incident_count += 1
+            yield incident
+
+    logger.info(f"Streamed {chunk_count} chunks, extracted {incident_count} potential incidents")
+
+
+def _init_worker():
+    """Load a worker-local spaCy model when the pool process starts"""
+    global nlp, SPACY_AVAILABLE
+
+    if SPACY_AVAILABLE:
+        return
+
+    try:
+        nlp = spacy.load("en_core_web_sm")
+        SPACY_AVAILABLE = True
+    except:
+        SPACY_AVAILABLE = False
+
+
+def get_process_pool():
+    """Return the shared process pool, creating it on first use"""
+    global _process_pool
+
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned, not forked: server workers run threads, and a forked child can inherit
+            # locks (logging, the metrics registry) held by another thread and deadlock on them
+            _process_pool = ProcessPoolExecutor(max_workers=PARALLEL_WORKERS, initializer=_init_worker,
+                                                mp_context=multiprocessing.get_context('spawn'))
+            logger.info(f"Started extraction process pool with {PARALLEL_WORKERS} workers")
+        return _process_pool
+
+
+def shutdown_process_pool():
+    """Stop the shared process pool (if it was started)"""
+    global _process_pool
+
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown()
+            _process_pool = None
+
+
+def _extract_batch(chunks):
+    """Pool task: results for a batch of chunks, plus the metrics recorded while extracting them"""
+    REGISTRY.reset()
+    results = [extract_incidents_from_paragraph(chunk) for chunk in chunks]
+    return results, REGISTRY.export()
+
+
+def process_chunks_parallel(chunks):
+    """Process chunks on the process pool, returning results in chunk order"""
+    # Send a few batches per worker so slow chunks don't leave other workers idle
+    batch_size = max(1, len(chunks) // (PARALLEL_WORKERS * 4))
+    batches = [chunks[start:start + batch_size] for start in range(0, len(chunks), batch_size)]
+
+    results = []
+    for batch_results, metrics in get_process_pool().map(_extract_batch, batches):
+        results.extend(batch_results)
+        # Pool workers have their own registry; their timings and counters belong to this process's
+        REGISTRY.merge(metrics)
+    return results
+
+
+def extract_incidents_from_text(text, parallel=None):
     """
     Enhanced function to extract potential incidents from provided text
+
+    parallel: True/False forces the process pool on or off; None picks it
+    automatically for documents longer than PARALLEL_MIN_CHARS.
     """
     if not text or len(text.strip()) < 50:
         logger.warning("Text too short for meaningful extraction")
@@ -237,9 +412,17 @@ def extract_incidents_from_text(text):
     chunks = split_into_meaningful_chunks(text)
     logger.info(f"Split text into {len(chunks)} chunks")
 
+    if parallel is None:
+        parallel = len(text) >= PARALLEL_MIN_CHARS and PARALLEL_WORKERS > 1
+
     # Process each chunk
-    for chunk in chunks:
-        incident = extract_incidents_from_paragraph(chunk)
+    if parallel and len(chunks) > 1:
+        logger.info(f"Processing chunks in parallel ({PARALLEL_WORKERS} workers)")
+        results = process_chunks_parallel(chunks)
+    else:
+        results = map(extract_incidents_from_paragraph, chunks)
+
+    for incident in results:
         if incident:
             incidents.append(incident)
 
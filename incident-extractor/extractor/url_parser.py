@@ -1,61 +1,102 @@
+import asyncio
+import logging
+import os
+import time
 import requests
-import re
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse
 from .text_parser import extract_incidents_from_text
+from crisis_shared.article_body import extract_article_body
+from crisis_shared.metrics import count, observe_stage, stage_timer
+
+logger = logging.getLogger(__name__)
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Seconds to wait for an upstream page
+REQUEST_TIMEOUT = 10
+
+# Maximum concurrent upstream fetches per async worker
+ASYNC_CONCURRENCY = int(os.environ.get('EXTRACTOR_ASYNC_CONCURRENCY', 100))
+
+
+def extract_article_text(html):
+    """Extract the main article text from an HTML page, one paragraph per block"""
+    with stage_timer('body'):
+        return extract_article_body(html)['text']
+
+
+def extract_incidents_from_html(html, url):
+    """Extract incidents from a fetched page and tag them with its source"""
+    # Get the source
+    source = url.split('//')[1].split('/')[0]
+
+    # Extract incidents using text parser
+    incidents = extract_incidents_from_text(extract_article_text(html))
+
+    # Add source to each incident
+    for incident in incidents:
+        incident['sources'] = source
+
+    return incidents
 
 
 def extract_incidents_from_url(url):
     """
     Fetch a URL and extract incidents from its content
     """
+    host = urlparse(url).netloc
     try:
         # Fetch the URL
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        start = time.perf_counter()
+        response = requests.get(url, headers=REQUEST_HEADERS, timeout=REQUEST_TIMEOUT)
+        record_fetch(host, response, time.perf_counter() - start)
         response.raise_for_status()
 
-        # Parse HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return extract_incidents_from_html(response.text, url)
+
+    except Exception as e:
+        logger.warning(f"Error extracting content from {url}: {e}", exc_info=True)
+        count('url_extraction_errors_total', 'Failed URL extractions by host', host=host)
+        return [{"error": str(e), "description": f"Failed to process URL: {url}"}]
 
-        # Extract main article content - this is simplified and will need customization for different sites
-        # Try to find article content based on common patterns
-        article_content = ""
 
-        # Try finding by article tag
-        article = soup.find('article')
-        if article:
-            article_content = article.get_text()
-        else:
-            # Try common content div class names
-            content_divs = soup.find_all(['div', 'section'], class_=[
-                'content', 'article-content', 'story-content', 'entry-content', 'post-content', 'main-content'
-            ])
+def record_fetch(host, response, total_seconds):
+    """Record upstream timing (time-to-headers, then body download) and status for a host"""
+    elapsed = response.elapsed.total_seconds()
+    observe_stage('response', elapsed, host=host)
+    observe_stage('download', max(0.0, total_seconds - elapsed), host=host)
+    count('upstream_requests_total', 'Upstream fetches by host and status', host=host, status=response.status_code)
 
-            if content_divs:
-                article_content = content_divs[0].get_text()
-            else:
-                # Fallback: extract all paragraph text
-                paragraphs = soup.find_all('p')
-                article_content = "\n\n".join([p.get_text() for p in paragraphs])
 
-        # Clean up the text
-        article_content = article_content.replace('\t', ' ').strip()
-        article_content = re.sub(r'\n{3,}', '\n\n', article_content)
+def create_async_client():
+    """Create the shared async HTTP client used by the ASGI entry point"""
+    import httpx
 
-        # Get the source
-        source = url.split('//')[1].split('/')[0]
+    return httpx.AsyncClient(
+        headers=REQUEST_HEADERS,
+        timeout=REQUEST_TIMEOUT,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=ASYNC_CONCURRENCY)
+    )
 
-        # Extract incidents using text parser
-        incidents = extract_incidents_from_text(article_content)
 
-        # Add source to each incident
-        for incident in incidents:
-            incident['sources'] = source
+async def extract_incidents_from_url_async(url, client):
+    """
+    Async counterpart of extract_incidents_from_url: the fetch runs on the event
+    loop and parsing runs in a thread so other requests keep being served
+    """
+    host = urlparse(url).netloc
+    try:
+        start = time.perf_counter()
+        response = await client.get(url)
+        record_fetch(host, response, time.perf_counter() - start)
+        response.raise_for_status()
 
-        return incidents
+        return await asyncio.to_thread(extract_incidents_from_html, response.text, url)
 
     except Exception as e:
-        print(f"Error extracting content from URL: {e}")
-        return [{"error": str(e), "description": f"Failed to process URL: {url}"}]
\ No newline at end of file
+        logger.warning(f"Error extracting content from {url}: {e}", exc_info=True)
+        count('url_extraction_errors_total', 'Failed URL extractions by host', host=host)
+        return [{"error": str(e), "description": f"Failed to process URL: {url}"}]
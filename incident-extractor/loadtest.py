@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Local load test for the /extract URL path.
+
+Starts a stub upstream that serves a sample article after a fixed delay, then
+fires concurrent URL extraction requests at a running extractor and reports
+throughput and latency percentiles. Run it once per serving profile to compare:
+
+    EXTRACTOR_SERVER=wsgi python start.py        # or: gunicorn app:app
+    python loadtest.py --target http://127.0.0.1:8000/extract
+
+    EXTRACTOR_SERVER=asgi python start.py
+    python loadtest.py --target http://127.0.0.1:8000/extract
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_ARTICLE = """<html><head><title>Stub article</title></head><body><article>
+<p>At least 25 people were killed and 60 wounded in an airstrike on a school sheltering displaced families in Khan Younis on 12 March 2024.</p>
+<p>Aid convoys carrying medical supplies were blocked at the Rafah crossing, the UN said, as hospitals in Gaza City ran out of fuel.</p>
+<p>Officials warned that malnutrition among children in northern Gaza had reached famine levels.</p>
+</article></body></html>"""
+
+
+def start_stub_upstream(port, delay):
+    """Serve SAMPLE_ARTICLE on a background thread, sleeping `delay` seconds per request"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            body = SAMPLE_ARTICLE.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed_request(target, url):
+    """POST one URL extraction request, returning (latency in seconds, success)"""
+    payload = json.dumps({'url': url}).encode('utf-8')
+    request = urllib.request.Request(target, data=payload, headers={'Content-Type': 'application/json'})
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            ok = response.status == 200 and 'error' not in response.read().decode('utf-8')
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list"""
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the incident extractor URL path')
+    parser.add_argument('--target', default='http://127.0.0.1:8000/extract', help='Extractor /extract endpoint')
+    parser.add_argument('--requests', type=int, default=200, help='Total requests to send')
+    parser.add_argument('--concurrency', type=int, default=20, help='Concurrent clients')
+    parser.add_argument('--upstream-port', type=int, default=8765, help='Port for the stub upstream')
+    parser.add_argument('--upstream-delay', type=float, default=1.0, help='Stub upstream response delay (s)')
+    args = parser.parse_args()
+
+    server = start_stub_upstream(args.upstream_port, args.upstream_delay)
+    # Unique query strings so every request really reaches the upstream
+    urls = [f"http://127.0.0.1:{args.upstream_port}/article?n={i}" for i in range(args.requests)]
+
+    print(f"Sending {args.requests} requests to {args.target} "
+          f"({args.concurrency} concurrent, upstream delay {args.upstream_delay}s)")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda url: timed_request(args.target, url), urls))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+
+    print(f"Throughput: {len(results) / elapsed:.1f} req/s over {elapsed:.1f}s")
+    print(f"Latency p50: {percentile(latencies, 50) * 1000:.0f} ms, "
+          f"p95: {percentile(latencies, 95) * 1000:.0f} ms, "
+          f"p99: {percentile(latencies, 99) * 1000:.0f} ms")
+    print(f"Errors: {errors}")
+
+
+if __name__ == "__main__":
+    main()
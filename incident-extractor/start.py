@@ -1,7 +1,23 @@
+import multiprocessing
+import os
 import subprocess
 import sys
 import nltk
 
+# Serving profile (all optional):
+#   EXTRACTOR_SERVER             'wsgi' (threaded gunicorn workers, default) or
+#                                'asgi' (uvicorn workers with async URL fetching)
+#   EXTRACTOR_WORKERS            worker processes (default one per CPU core; each loads spaCy)
+#   EXTRACTOR_THREADS            threads per WSGI worker (default 4)
+#   EXTRACTOR_PARALLEL_WORKERS   processes per worker for long documents (default CPU cores / workers)
+#   EXTRACTOR_ASYNC_CONCURRENCY  concurrent URL fetches per ASGI worker (default 100)
+#   EXTRACTOR_TIMEOUT            seconds before a stuck worker is restarted (default 60)
+#   EXTRACTOR_LOG_FILE           log file; each worker writes <name>.<pid>.log when there are several
+SERVER = os.environ.get('EXTRACTOR_SERVER', 'wsgi')
+WORKERS = os.environ.get('EXTRACTOR_WORKERS', str(multiprocessing.cpu_count()))
+THREADS = os.environ.get('EXTRACTOR_THREADS', '4')
+TIMEOUT = os.environ.get('EXTRACTOR_TIMEOUT', '60')
+
 # Download spaCy model
 subprocess.check_call([sys.executable, "-m", "spacy", "download", "en_core_web_sm"])
 
@@ -10,4 +26,10 @@ nltk.download('punkt')
 nltk.download('stopwords')
 
 # Start the app with gunicorn
-subprocess.call(["gunicorn", "app:app"])
\ No newline at end of file
+if SERVER == 'asgi':
+    command = ["gunicorn", "asgi:application", "--worker-class", "uvicorn.workers.UvicornWorker"]
+else:
+    command = ["gunicorn", "app:app", "--worker-class", "gthread", "--threads", THREADS]
+
+# Workers size their document-processing pools from EXTRACTOR_WORKERS (see extractor/text_parser.py)
+subprocess.call(command + ["--workers", WORKERS, "--timeout", TIMEOUT], env=dict(os.environ, EXTRACTOR_WORKERS=WORKERS))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Compare the shared article body extractor with the two it replaced, on the
+fixtures in tests/fixtures/article_body: time per page (parsing included)
+and how many of the expected paragraphs each one returns, plus the share of
+returned text that is not article body.
+
+Usage:
+    python tests/bench_article_body.py [--repeat 50]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crisis_shared.article_body import extract_article_body
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'article_body')
+SITES = ['aljazeera', 'bbc', 'reuters', 'ap']
+
+
+def legacy_url_parser(html):
+    """incident-extractor url_parser.extract_article_text before the shared extractor"""
+    soup = BeautifulSoup(html, 'html.parser')
+    article_content = ""
+
+    article = soup.find('article')
+    if article:
+        article_content = article.get_text()
+    else:
+        content_divs = soup.find_all(['div', 'section'], class_=[
+            'content', 'article-content', 'story-content', 'entry-content', 'post-content', 'main-content'
+        ])
+        if content_divs:
+            article_content = content_divs[0].get_text()
+        else:
+            paragraphs = soup.find_all('p')
+            article_content = "\n\n".join([p.get_text() for p in paragraphs])
+
+    article_content = article_content.replace('\t', ' ').strip()
+    return re.sub(r'\n{3,}', '\n\n', article_content)
+
+
+def legacy_daily_extractor(html):
+    """Gendata GazaCrisisExtractor.parse_aljazeera_article body selection before the shared extractor"""
+    soup = BeautifulSoup(html, 'html.parser')
+    content_selectors = [
+        'div[data-component="ArticleBody"]',
+        'div.article-body',
+        'div.wysiwyg',
+        'div.content',
+        'article div.text',
+        'main article',
+        '.post-content',
+        '[data-testid="post-content"]'
+    ]
+
+    content_text = ""
+    for selector in content_selectors:
+        content_elem = soup.select_one(selector)
+        if content_elem:
+            paragraphs = content_elem.find_all(['p', 'div'], string=True)
+            if paragraphs:
+                content_text = ' '.join([p.get_text(strip=True) for p in paragraphs])
+            else:
+                content_text = content_elem.get_text(separator=' ', strip=True)
+            if content_text and len(content_text) > 50:
+                break
+
+    if not content_text or len(content_text) < 50:
+        paragraphs = soup.find_all('p')
+        if paragraphs:
+            content_text = ' '.join([p.get_text(strip=True) for p in paragraphs if len(p.get_text(strip=True)) > 20])
+
+    if not content_text:
+        body = soup.find('body')
+        if body:
+            content_text = body.get_text(separator=' ', strip=True)
+    return content_text
+
+
+def shared_extractor(html):
+    return extract_article_body(html)['text']
+
+
+EXTRACTORS = [('shared', shared_extractor), ('legacy url_parser', legacy_url_parser),
+              ('legacy daily_extractor', legacy_daily_extractor)]
+
+
+def squash(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def score(text, expected):
+    """(expected paragraphs found, share of the returned characters that are not expected body text)"""
+    text = squash(text)
+    found = [paragraph for paragraph in expected if paragraph in text]
+    body_chars = sum(len(paragraph) for paragraph in found)
+    noise = 1 - body_chars / len(text) if text else 0.0
+    return len(found), max(noise, 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark article body extractors on the fixtures')
+    parser.add_argument('--repeat', type=int, default=50, help='Extractions per page and extractor')
+    args = parser.parse_args()
+
+    print(f"{'page':10} {'extractor':24} {'ms/page':>8} {'found':>7} {'noise':>6}")
+    for site in SITES:
+        with open(os.path.join(FIXTURES, f'{site}.html'), 'r', encoding='utf-8') as f:
+            html = f.read()
+        with open(os.path.join(FIXTURES, f'{site}.json'), 'r', encoding='utf-8') as f:
+            expected = json.load(f)['paragraphs']
+
+        for name, extract in EXTRACTORS:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                text = extract(html)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            found, noise = score(text, expected)
+            print(f"{site:10} {name:24} {elapsed * 1000:8.2f} {found:>3}/{len(expected):<3} {noise:6.0%}")
+
+
+if __name__ == "__main__":
+    main()
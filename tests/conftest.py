@@ -0,0 +1,14 @@
+"""
+Test setup: the pipelines are run from their own folders rather than installed,
+so put the repository root (crisis_shared), Gendata (its flat modules) and
+incident-extractor (the extractor package) on sys.path the same way their
+entry points do.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (ROOT, os.path.join(ROOT, 'Gendata'), os.path.join(ROOT, 'incident-extractor')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,56 @@
+"""Accuracy of the shared article body extractor on pages shaped like the main sources"""
+import json
+import os
+
+import pytest
+
+from crisis_shared.article_body import PARAGRAPH_SEPARATOR, extract_article_body
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'article_body')
+SITES = ['aljazeera', 'bbc', 'reuters', 'ap']
+
+
+def load_fixture(site):
+    with open(os.path.join(FIXTURES, f'{site}.html'), 'r', encoding='utf-8') as f:
+        html = f.read()
+    with open(os.path.join(FIXTURES, f'{site}.json'), 'r', encoding='utf-8') as f:
+        expected = json.load(f)['paragraphs']
+    return html, expected
+
+
+@pytest.mark.parametrize('site', SITES)
+def test_extracts_expected_paragraphs(site):
+    html, expected = load_fixture(site)
+    result = extract_article_body(html)
+    assert [paragraph['text'] for paragraph in result['paragraphs']] == expected
+
+
+@pytest.mark.parametrize('site', SITES)
+def test_offsets_index_joined_text(site):
+    html, _ = load_fixture(site)
+    result = extract_article_body(html)
+    assert result['text'] == PARAGRAPH_SEPARATOR.join(paragraph['text'] for paragraph in result['paragraphs'])
+    for paragraph in result['paragraphs']:
+        assert result['text'][paragraph['start']:paragraph['end']] == paragraph['text']
+
+
+def test_navigation_scripts_and_footers_are_ignored():
+    html, _ = load_fixture('aljazeera')
+    text = extract_article_body(html)['text']
+    for boilerplate in ('Middle East', '__APOLLO_STATE__', 'All rights reserved', 'Most read', 'More on Gaza'):
+        assert boilerplate not in text
+
+
+def test_accepts_parsed_soup_without_modifying_it():
+    from bs4 import BeautifulSoup
+
+    html, expected = load_fixture('bbc')
+    soup = BeautifulSoup(html, 'html.parser')
+    before = str(soup)
+    assert [paragraph['text'] for paragraph in extract_article_body(soup)['paragraphs']] == expected
+    assert str(soup) == before
+
+
+def test_falls_back_to_visible_lines_without_paragraphs():
+    html = '<html><body><span>Short</span><br>A single line of text that is long enough to keep</body></html>'
+    assert extract_article_body(html)['text'] == 'A single line of text that is long enough to keep'
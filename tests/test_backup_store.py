@@ -0,0 +1,166 @@
+"""BackupStore: backup/restore round trips, chunk deduplication, integrity checks and pruning"""
+import io
+import os
+import zlib
+
+import pytest
+
+from backup_store import BackupStore, iter_chunks, restore_path
+
+
+def make_csv(rows=4000, edit=None):
+    lines = ['id,title,casualties_killed\n']
+    for index in range(rows):
+        title = f'Incident {index} in Rafah'
+        if index == edit:
+            title += ' (updated)'
+        lines.append(f'gaza-{index:06d},"{title}",{index % 7}\n')
+    return ''.join(lines).encode('utf-8')
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data_files')
+    return tmp_path
+
+
+def object_count(store):
+    return sum(len(files) for _, _, files in os.walk(store.objects_dir))
+
+
+def test_iter_chunks_is_line_aligned_and_lossless():
+    data = make_csv()
+    chunks = list(iter_chunks(io.BytesIO(data), min_size=1024, max_size=8192))
+    assert b''.join(chunks) == data
+    assert len(chunks) > 1
+    assert all(chunk.endswith(b'\n') for chunk in chunks)
+    # A chunk may only overrun max_size by the line that crossed it
+    assert all(len(chunk) <= 8192 + 64 for chunk in chunks)
+
+
+def test_backup_restore_round_trip(workdir):
+    with open('incidents.csv', 'wb') as f:
+        f.write(make_csv())
+    with open('data_files/references.csv', 'wb') as f:
+        f.write(b'id,url\n1,"https://example.com/a,b"\n')
+
+    store = BackupStore('store')
+    snapshot = store.backup(['incidents.csv', 'data_files/references.csv'], label='daily')
+
+    restored = store.restore(snapshot['id'], dest_dir='restored')
+    assert sorted(restored) == sorted([os.path.join('restored', 'incidents.csv'),
+                                       os.path.join('restored', 'data_files', 'references.csv')])
+    for path in ('incidents.csv', 'data_files/references.csv'):
+        with open(path, 'rb') as original, open(os.path.join('restored', path), 'rb') as copy:
+            assert copy.read() == original.read()
+
+
+def test_restore_in_place_and_single_file(workdir):
+    with open('incidents.csv', 'wb') as f:
+        f.write(make_csv(rows=50))
+    with open('other.csv', 'wb') as f:
+        f.write(b'a,b\n')
+    store = BackupStore('store')
+    snapshot = store.backup(['incidents.csv', 'other.csv'])
+
+    with open('incidents.csv', 'wb') as f:
+        f.write(b'overwritten\n')
+    assert store.restore(snapshot['id'], paths=['./incidents.csv']) == ['incidents.csv']
+    with open('incidents.csv', 'rb') as f:
+        assert f.read() == make_csv(rows=50)
+
+
+def test_restore_under_dest_stays_inside_dest(workdir, monkeypatch):
+    with open('incidents.csv', 'wb') as f:
+        f.write(b'backed up\n')
+    absolute = str(workdir / 'data_files' / 'references.csv')
+    with open(absolute, 'wb') as f:
+        f.write(b'id,url\n')
+
+    store = BackupStore(str(workdir / 'store'))
+    os.makedirs('app')
+    monkeypatch.chdir('app')
+    snapshot = store.backup(['../incidents.csv', absolute])
+    assert os.path.join('..', 'incidents.csv') in snapshot['files']
+
+    with open('../incidents.csv', 'wb') as f:
+        f.write(b'live data\n')
+    restored = store.restore(snapshot['id'], dest_dir='restored')
+
+    assert sorted(restored) == sorted([os.path.join('restored', 'incidents.csv'),
+                                       restore_path('restored', absolute)])
+    assert all(os.path.realpath(path).startswith(os.path.realpath('restored') + os.sep) for path in restored)
+    with open('../incidents.csv', 'rb') as f:
+        assert f.read() == b'live data\n'
+    with open(os.path.join('restored', 'incidents.csv'), 'rb') as f:
+        assert f.read() == b'backed up\n'
+
+
+def test_restore_path_drops_anchors_and_parent_components():
+    assert restore_path('out', os.path.join('..', '..', 'a', '.', 'b.csv')) == os.path.join('out', 'a', 'b.csv')
+    assert restore_path('out', os.path.join(os.sep, 'srv', 'b.csv')) == os.path.join('out', 'srv', 'b.csv')
+    with pytest.raises(ValueError):
+        restore_path('out', '..')
+
+
+def test_edit_only_stores_the_changed_chunks(workdir):
+    store = BackupStore('store')
+    with open('incidents.csv', 'wb') as f:
+        f.write(make_csv())
+    first = store.backup(['incidents.csv'])
+    objects = object_count(store)
+
+    with open('incidents.csv', 'wb') as f:
+        f.write(make_csv(edit=2000))
+    os.utime('incidents.csv', ns=(0, os.stat('incidents.csv').st_mtime_ns + 1))
+    second = store.backup(['incidents.csv'])
+
+    old_chunks = first['files']['incidents.csv']['chunks']
+    new_chunks = second['files']['incidents.csv']['chunks']
+    assert new_chunks != old_chunks
+    assert len(set(new_chunks) - set(old_chunks)) <= 2
+    assert object_count(store) - objects == len(set(new_chunks) - set(old_chunks))
+
+
+def test_unchanged_files_are_not_reread(workdir, monkeypatch):
+    store = BackupStore('store')
+    with open('incidents.csv', 'wb') as f:
+        f.write(make_csv(rows=100))
+    first = store.backup(['incidents.csv'])
+
+    monkeypatch.setattr('backup_store.iter_chunks', lambda f: pytest.fail('unchanged file was re-read'))
+    second = store.backup(['incidents.csv', 'missing.csv'])
+    assert second['files'] == first['files']
+
+
+def test_corrupt_object_is_detected(workdir):
+    store = BackupStore('store')
+    with open('incidents.csv', 'wb') as f:
+        f.write(make_csv(rows=100))
+    snapshot = store.backup(['incidents.csv'])
+
+    digest = snapshot['files']['incidents.csv']['chunks'][0]
+    with open(store._object_path(digest), 'wb') as f:
+        f.write(zlib.compress(b'tampered\n'))
+
+    with pytest.raises(ValueError):
+        store.restore(snapshot['id'], dest_dir='restored')
+    assert os.listdir('restored') == []
+
+
+def test_prune_keeps_newest_per_label_and_collects_chunks(workdir):
+    store = BackupStore('store')
+    ids = []
+    for version in range(3):
+        with open('incidents.csv', 'wb') as f:
+            f.write(make_csv(rows=20, edit=version))
+        os.utime('incidents.csv', ns=(0, 10 ** 9 * (version + 1)))
+        ids.append(store.backup(['incidents.csv'], label='daily')['id'])
+    manual = store.backup(['incidents.csv'], label='manual')['id']
+
+    removed, collected = store.prune(keep_last=1, keep_daily=0, keep_weekly=0)
+    assert removed == 2
+    assert collected == 2
+    assert [snapshot['id'] for snapshot in store.list_snapshots()] == [ids[-1], manual]
+    assert store.restore(ids[-1], dest_dir='restored')
@@ -0,0 +1,131 @@
+"""build_bundles: page set discovery, typed sections, content-hashed files and cleanup of old builds"""
+import gzip
+import hashlib
+import json
+import os
+
+import pytest
+
+import build_bundles
+from build_bundles import build_all, build_bundle, discover_pages, infer_type, load_section, write_bundle
+
+
+def write_csv(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def pages(tmp_path):
+    """A small Pages tree: a two-section page, a one-section page and CSVs that aren't page sections"""
+    root = tmp_path / 'Pages'
+    write_csv(root / 'War_Crimes_Stats' / 'stat-schools' / 'stat-schools-main.csv',
+              'title,number,verified\nSchools destroyed,412,true\n')
+    write_csv(root / 'War_Crimes_Stats' / 'stat-schools' / 'stat-schools-timeline.csv',
+              'date,event,count\n2024-01-05,Strike,3\n2024-02-10,Strike,4.5\n')
+    write_csv(root / 'Other' / 'gallery-images.csv', 'url,caption\nimg/1.jpg,First\n')
+    write_csv(root / 'Other' / 'notes.csv', 'a,b\n1,2\n')
+    write_csv(root / 'Other' / 'gallery-extra.csv', 'a\n1\n')
+    return root
+
+
+def test_discover_pages_groups_sections_by_page(pages):
+    found = discover_pages(str(pages))
+    assert list(found) == ['gallery', 'stat-schools']
+    assert set(found['stat-schools']) == {'main', 'timeline'}
+    assert found['gallery'] == {'images': str(pages / 'Other' / 'gallery-images.csv')}
+
+
+def test_extra_bundles_need_all_their_files(pages, monkeypatch):
+    monkeypatch.setattr(build_bundles, 'EXTRA_BUNDLES', {
+        'hunger': {'statistics': 'Hunger/stats.csv', 'quotes': 'Hunger/quotes.csv'}
+    })
+    write_csv(pages / 'Hunger' / 'stats.csv', 'label,value\nFamine,1\n')
+    assert 'hunger' not in discover_pages(str(pages))
+
+    write_csv(pages / 'Hunger' / 'quotes.csv', 'quote\nA\n')
+    assert set(discover_pages(str(pages))['hunger']) == {'statistics', 'quotes'}
+
+
+@pytest.mark.parametrize('values, expected', [
+    (['1', '-20', ''], 'int'),
+    (['1', '2.5'], 'float'),
+    (['007'], 'string'),
+    (['True', 'false'], 'bool'),
+    (['1', 'yes'], 'string'),
+    (['', ''], 'string'),
+])
+def test_infer_type(values, expected):
+    assert infer_type(values) == expected
+
+
+def test_load_section_converts_values_by_column(tmp_path):
+    path = write_csv(tmp_path / 'cases-data.csv',
+                     '\ufeffid, name ,age,score,active,timeline_json\n'
+                     '1,"Doe, J",34,1.5,true,"[{""date"": ""2024-01-01""}]"\n'
+                     '\n'
+                     '2,Roe,,2,false,not json\n'
+                     '3,Short\n')
+    section = load_section(path)
+
+    assert section['columns'] == ['id', 'name', 'age', 'score', 'active', 'timeline_json']
+    assert section['types'] == ['int', 'string', 'int', 'float', 'bool', 'json']
+    assert section['rows'] == [
+        [1, 'Doe, J', 34, 1.5, True, [{'date': '2024-01-01'}]],
+        [2, 'Roe', None, 2.0, False, 'not json'],
+        [3, 'Short', None, None, None, None],
+    ]
+
+
+def test_bundles_are_named_by_content_hash(pages, tmp_path):
+    sources = discover_pages(str(pages))['stat-schools']
+    data = build_bundle('stat-schools', sources)
+    assert data == build_bundle('stat-schools', sources)
+    assert json.loads(data)['sections']['main']['rows'] == [['Schools destroyed', 412, True]]
+
+    output = tmp_path / 'bundles'
+    output.mkdir()
+    entry = write_bundle('stat-schools', data, str(output), use_brotli=False)
+    content_hash = hashlib.sha256(data).hexdigest()[:12]
+    assert entry['file'] == f'stat-schools.{content_hash}.json'
+    assert (output / entry['file']).read_bytes() == data
+
+    gzipped = (output / f"{entry['file']}.gz").read_bytes()
+    assert gzip.decompress(gzipped) == data
+    write_bundle('stat-schools', data, str(output), use_brotli=False)
+    assert (output / f"{entry['file']}.gz").read_bytes() == gzipped
+
+
+def test_rebuild_replaces_old_bundles_of_changed_pages_only(pages, tmp_path):
+    output = tmp_path / 'bundles'
+    first = build_all(str(pages), str(output), use_brotli=False)
+
+    write_csv(pages / 'War_Crimes_Stats' / 'stat-schools' / 'stat-schools-main.csv',
+              'title,number,verified\nSchools destroyed,420,true\n')
+    second = build_all(str(pages), str(output), use_brotli=False)
+
+    old_file = first['pages']['stat-schools']['file']
+    new_file = second['pages']['stat-schools']['file']
+    assert old_file != new_file
+    assert second['pages']['gallery']['file'] == first['pages']['gallery']['file']
+    assert sorted(os.listdir(output)) == sorted([
+        'manifest.json', new_file, f'{new_file}.gz',
+        second['pages']['gallery']['file'], f"{second['pages']['gallery']['file']}.gz",
+    ])
+
+    with open(output / 'manifest.json', encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert manifest['pages']['stat-schools']['sources'] == {
+        'main': 'War_Crimes_Stats/stat-schools/stat-schools-main.csv',
+        'timeline': 'War_Crimes_Stats/stat-schools/stat-schools-timeline.csv',
+    }
+
+
+def test_a_broken_page_does_not_stop_the_build(pages, tmp_path, monkeypatch):
+    monkeypatch.setattr(build_bundles, 'EXTRA_BUNDLES', {'broken': {'main': 'Broken/main.csv'}})
+    (pages / 'Broken').mkdir()
+    (pages / 'Broken' / 'main.csv').write_bytes(b'title\n\xff\xfe not utf-8\n')
+
+    manifest = build_all(str(pages), str(tmp_path / 'bundles'), use_brotli=False)
+    assert sorted(manifest['pages']) == ['gallery', 'stat-schools']
@@ -0,0 +1,88 @@
+"""ExtractionJournal: durable per-URL records and resuming after a crash"""
+import json
+
+import pytest
+
+import checkpoint
+from checkpoint import ExtractionJournal, run_key
+
+URLS = ['https://example.com/a', 'https://example.com/b', 'https://example.com/c']
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return ExtractionJournal.for_urls(URLS, str(tmp_path))
+
+
+def test_run_key_depends_on_the_url_list():
+    assert run_key(URLS) == run_key(list(URLS))
+    assert run_key(URLS) != run_key(URLS[::-1])
+
+
+def test_completed_holds_done_urls_only(journal):
+    journal.record(URLS[0], {'id': 'gaza-1', 'title': 'A'})
+    journal.record(URLS[1], None)
+
+    assert journal.completed() == {URLS[0]: {'id': 'gaza-1', 'title': 'A'}}
+    assert [entry['status'] for entry in journal.entries()] == ['done', 'failed']
+
+
+def test_a_later_entry_for_the_same_url_wins(journal):
+    journal.record(URLS[0], None)
+    journal.record(URLS[0], {'id': 'gaza-1'})
+    assert journal.completed() == {URLS[0]: {'id': 'gaza-1'}}
+
+
+def test_resume_after_a_torn_last_line(journal):
+    journal.record(URLS[0], {'id': 'gaza-1'})
+    # Crash in the middle of writing the second entry
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"at": "2024-03-12T10:00:00+00:00", "url": "https://example.com/b", "status": "do')
+
+    resumed = ExtractionJournal(journal.path)
+    assert resumed.completed() == {URLS[0]: {'id': 'gaza-1'}}
+
+    resumed.record(URLS[1], {'id': 'gaza-2'})
+    resumed.record(URLS[2], {'id': 'gaza-3'})
+    assert list(resumed.completed()) == URLS
+    with open(journal.path, encoding='utf-8') as f:
+        assert all(json.loads(line) for line in f)
+
+
+def test_unreadable_lines_are_skipped_not_fatal(journal):
+    journal.record(URLS[0], {'id': 'gaza-1'})
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"url": "https://example.com/b", "sta{"at": "glued"}\n')
+        f.write('[1, 2]\n')
+    journal.record(URLS[2], {'id': 'gaza-3'})
+
+    assert list(journal.completed()) == [URLS[0], URLS[2]]
+
+
+def test_repair_scans_back_across_blocks(journal, monkeypatch):
+    monkeypatch.setattr(checkpoint, 'TAIL_BLOCK_SIZE', 8)
+    journal.record(URLS[0], {'id': 'gaza-1'})
+    with open(journal.path, 'rb') as f:
+        complete = f.read()
+    torn = b'{"url": "https://example.com/b", "record": {"title": "long torn tail'
+    with open(journal.path, 'ab') as f:
+        f.write(torn)
+
+    assert journal.repair() == len(torn)
+    with open(journal.path, 'rb') as f:
+        assert f.read() == complete
+
+
+def test_repair_of_a_file_with_no_complete_line(journal):
+    with open(journal.path, 'w', encoding='utf-8') as f:
+        f.write('{"url": "torn')
+    journal.repair()
+    with open(journal.path, 'rb') as f:
+        assert f.read() == b''
+    assert journal.entries() == []
+
+
+def test_clear(journal):
+    journal.record(URLS[0], {'id': 'gaza-1'})
+    journal.clear()
+    assert journal.entries() == [] and journal.repair() == 0
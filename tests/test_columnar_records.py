@@ -0,0 +1,99 @@
+"""columnar_records: building a store from CSV, rebuild on change, and the vectorised aggregations"""
+import os
+
+import numpy as np
+import pytest
+
+from columnar_records import MISSING, ColumnarRecords, build_store
+
+CSV = (
+    'id,name,age,sex,age_group,date\n'
+    '1,A,7,m,child,2024-01-05\n'
+    '2,B,34,f,adult,2024-01-20T10:00:00\n'
+    '3,C,,f,adult,2024-02-02\n'
+    '4,D,-5,m,unknown,\n'
+    '5,E,70000,f,elderly,not a date\n'
+    '6,F,81,m,elderly,2024-02-28\n'
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'individual-records.csv'
+    path.write_text(CSV, encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def records(csv_path, tmp_path):
+    return ColumnarRecords.from_csv(csv_path, str(tmp_path / 'store'))
+
+
+def test_build_store_encodes_columns(csv_path, tmp_path):
+    meta = build_store(csv_path, str(tmp_path / 'store'))
+    assert meta['rows'] == 6
+    assert {name: column['kind'] for name, column in meta['columns'].items()} == {
+        'id': 'int', 'name': 'dict', 'age': 'int', 'sex': 'dict', 'age_group': 'dict', 'date': 'date'}
+    assert meta['columns']['sex']['dictionary'] == ['f', 'm']
+
+    records = ColumnarRecords(str(tmp_path / 'store'))
+    assert records.column('id').tolist() == [1, 2, 3, 4, 5, 6]
+    # Blank, negative and out-of-range (int16 overflow) ages are all missing
+    assert records.column('age').tolist() == [7, 34, MISSING, MISSING, MISSING, 81]
+    assert records.column('date')[[3, 4]].tolist() == [MISSING, MISSING]
+    with pytest.raises(KeyError):
+        records.column('nope')
+
+
+def test_from_csv_reuses_the_store_until_the_csv_changes(csv_path, tmp_path):
+    store_dir = str(tmp_path / 'store')
+    ColumnarRecords.from_csv(csv_path, store_dir)
+    meta_path = os.path.join(store_dir, 'meta.json')
+    built_at = os.stat(meta_path).st_mtime_ns
+
+    assert ColumnarRecords.from_csv(csv_path, store_dir).rows == 6
+    assert os.stat(meta_path).st_mtime_ns == built_at
+
+    with open(csv_path, 'a', encoding='utf-8') as f:
+        f.write('7,G,12,f,child,2024-03-01\n')
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert ColumnarRecords.from_csv(csv_path, store_dir).rows == 7
+
+
+def test_mask(records):
+    assert records.mask(sex='f').tolist() == [False, True, True, False, True, False]
+    assert records.mask(sex='f', age_group='adult').sum() == 2
+    assert records.mask(id=6).tolist() == [False] * 5 + [True]
+    assert not records.mask(sex='x').any()
+
+
+def test_count_by_and_crosstab(records):
+    assert records.count_by('age_group') == {'adult': 2, 'child': 1, 'elderly': 2, 'unknown': 1}
+    assert records.count_by('age_group', mask=records.mask(sex='m')) == {'child': 1, 'elderly': 1, 'unknown': 1}
+    assert records.crosstab('age_group', 'sex') == {
+        'adult': {'f': 2}, 'child': {'m': 1}, 'elderly': {'f': 1, 'm': 1}, 'unknown': {'m': 1}}
+
+
+def test_count_by_date(records):
+    assert records.count_by_date() == {'2024-01-05': 1, '2024-01-20': 1, '2024-02-02': 1, '2024-02-28': 1}
+    assert records.count_by_date('month') == {'2024-01': 2, '2024-02': 2}
+    assert records.count_by_date('month', mask=records.mask(sex='f')) == {'2024-01': 1, '2024-02': 1}
+
+
+def test_age_histogram(records):
+    histogram = records.age_histogram(bin_width=10, max_age=80)
+    assert list(histogram)[0] == '0-9' and list(histogram)[-1] == '80+'
+    assert histogram['0-9'] == 1 and histogram['30-39'] == 1 and histogram['80+'] == 1
+    assert sum(histogram.values()) == 3
+
+
+def test_summary(records):
+    summary = records.summary()
+    assert summary['total'] == 6
+    assert summary['by_sex'] == {'f': 3, 'm': 3}
+    assert summary['by_age_group_and_sex']['elderly'] == {'f': 1, 'm': 1}
+    assert summary['age_known'] == 3
+    assert summary['mean_age'] == pytest.approx(np.mean([7, 34, 81]), abs=0.05)
+    assert summary['by_month'] == {'2024-01': 2, '2024-02': 2}
+    assert sum(summary['age_histogram'].values()) == 3
@@ -0,0 +1,102 @@
+"""csv_summary: quote-aware row counting, one-pass summaries and the mtime-keyed cache"""
+import csv
+import os
+
+import pytest
+
+import csv_summary
+from csv_summary import CsvSummaryCache, count_rows, summarize_csv
+
+ROWS = [
+    {'id': 'gaza-1', 'date': '2024-03-12', 'description': 'Two lines\nin one "quoted" field',
+     'casualties_killed': '4', 'casualties_injured': ''},
+    {'id': 'gaza-2', 'date': '2024-01-05T10:00:00', 'description': '',
+     'casualties_killed': '2.5', 'casualties_injured': '7'},
+    {'id': 'gaza-3', 'date': 'unknown', 'description': 'Ends with a newline\n',
+     'casualties_killed': 'n/a', 'casualties_injured': '3'},
+]
+
+
+def write_csv(path, rows=ROWS):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64, csv_summary.CHUNK_SIZE])
+def test_count_rows_ignores_newlines_inside_quotes(tmp_path, chunk_size):
+    path = write_csv(tmp_path / 'incidents.csv')
+    assert count_rows(path, chunk_size=chunk_size) == len(ROWS)
+    assert count_rows(path, header=False, chunk_size=chunk_size) == len(ROWS) + 1
+
+
+def test_count_rows_without_trailing_newline(tmp_path):
+    path = tmp_path / 'incidents.csv'
+    path.write_bytes(b'id,title\n1,"a\nb"\n2,c')
+    assert count_rows(str(path)) == 2
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 5, 64])
+def test_count_rows_skips_blank_lines_like_the_csv_module(tmp_path, chunk_size):
+    path = tmp_path / 'incidents.csv'
+    path.write_bytes(b'id,title\r\n\r\n1,"a\n\nb"\n\n\n2,""\n"3",c\r\n\r\n')
+    with open(path, newline='', encoding='utf-8') as f:
+        expected = sum(1 for _ in csv.DictReader(f))
+    assert expected == 3
+    assert count_rows(str(path), chunk_size=chunk_size) == expected
+
+
+def test_count_rows_header_only_and_empty(tmp_path):
+    header_only = tmp_path / 'header.csv'
+    header_only.write_text('id,title\n')
+    empty = tmp_path / 'empty.csv'
+    empty.write_text('')
+    assert count_rows(str(header_only)) == 0
+    assert count_rows(str(empty)) == 0
+
+
+def test_summarize_csv(tmp_path):
+    summary = summarize_csv(write_csv(tmp_path / 'incidents.csv'))
+    assert summary['rows'] == 3
+    assert summary['columns'] == list(ROWS[0])
+    assert summary['null_rates']['description'] == round(1 / 3, 4)
+    assert summary['null_rates']['id'] == 0.0
+    assert summary['date_ranges'] == {'date': {'min': '2024-01-05', 'max': '2024-03-12'}}
+    assert summary['casualty_totals'] == {'casualties_killed': 6.5, 'casualties_injured': 10}
+
+
+def test_cache_reuses_counts_until_the_file_changes(tmp_path, monkeypatch):
+    path = write_csv(tmp_path / 'incidents.csv')
+    cache_file = str(tmp_path / 'cache.json')
+    calls = []
+    real_count_rows = csv_summary.count_rows
+    monkeypatch.setattr(csv_summary, 'count_rows', lambda p: calls.append(p) or real_count_rows(p))
+
+    cache = CsvSummaryCache(cache_file)
+    assert cache.row_count(path) == 3
+    assert cache.row_count(path) == 3
+    # A new cache instance reads the saved entry instead of recounting
+    assert CsvSummaryCache(cache_file).row_count(path) == 3
+    assert len(calls) == 1
+
+    write_csv(path, ROWS[:2])
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1))
+    assert cache.row_count(path) == 2
+    assert len(calls) == 2
+
+
+def test_cached_summary_also_fills_the_row_count(tmp_path, monkeypatch):
+    path = write_csv(tmp_path / 'incidents.csv')
+    cache = CsvSummaryCache(str(tmp_path / 'cache.json'))
+    assert cache.summary(path)['rows'] == 3
+
+    monkeypatch.setattr(csv_summary, 'count_rows', lambda p: pytest.fail('row count should be cached'))
+    assert cache.row_count(path) == 3
+
+
+def test_unreadable_cache_file_starts_empty(tmp_path):
+    cache_file = tmp_path / 'cache.json'
+    cache_file.write_text('{not json')
+    assert CsvSummaryCache(str(cache_file)).entries == {}
@@ -0,0 +1,78 @@
+"""Gazetteer: name matching, nearest-place search and proximity clustering"""
+import pytest
+
+from crisis_shared.gazetteer import Gazetteer, Place, cluster_points, distance_km, get_gazetteer, tokenize
+
+
+@pytest.fixture(scope='module')
+def gazetteer():
+    return get_gazetteer()
+
+
+def test_tokenize_drops_apostrophes_and_case():
+    assert tokenize("Shuja'iyya") == tokenize('SHUJAIYYA') == ['shujaiyya']
+
+
+def test_lookup_accepts_aliases_and_spelling_variants(gazetteer):
+    assert gazetteer.lookup('Khan Yunis').name == 'Khan Younis'
+    assert gazetteer.lookup('deir el-balah').name == 'Deir al-Balah'
+    assert gazetteer.lookup('Shejaiya').name == "Shuja'iyya"
+    assert gazetteer.lookup('Atlantis') is None
+
+
+def test_longest_name_wins(gazetteer):
+    assert [place.name for place in gazetteer.find_all('Strikes in Gaza City and Jabalia refugee camp')] == \
+        ['Gaza City', 'Jabalia Camp']
+
+
+def test_resolve_prefers_the_most_specific_place(gazetteer):
+    assert gazetteer.resolve('Southern Gaza, near Rafah and the Tel al-Sultan area').name == 'Tel al-Sultan'
+    assert gazetteer.resolve('Rafah, then Khan Younis').name == 'Rafah'
+
+
+def test_resolve_falls_back_to_the_whole_strip(gazetteer):
+    assert gazetteer.resolve('no place here').name == 'Gaza Strip'
+    assert gazetteer.resolve(None).name == 'Gaza Strip'
+    assert gazetteer.resolve('no place here', default=False) is None
+
+
+def test_nearest_matches_a_linear_scan(gazetteer):
+    for lat, lng in [(31.30, 34.25), (31.50, 34.46), (31.42, 34.36), (31.55, 34.52)]:
+        expected = min(gazetteer.places, key=lambda place: distance_km(lat, lng, place.lat, place.lng))
+        assert gazetteer.nearest(lat, lng) == expected
+
+
+def test_nearest_far_outside_the_grid(gazetteer):
+    expected = min(gazetteer.places, key=lambda place: distance_km(40.0, 10.0, place.lat, place.lng))
+    assert gazetteer.nearest(40.0, 10.0) == expected
+    assert gazetteer.nearest(40.0, 10.0, max_km=50) is None
+
+
+def test_within_is_sorted_by_distance(gazetteer):
+    rafah = gazetteer.lookup('Rafah')
+    nearby = gazetteer.within(rafah.lat, rafah.lng, 2)
+    assert nearby[0] == rafah
+    assert all(distance_km(rafah.lat, rafah.lng, place.lat, place.lng) <= 2 for place in nearby)
+
+
+def test_custom_places():
+    gazetteer = Gazetteer([Place('Gaza Strip', 'region', 31.4, 34.3, ()), Place('Somewhere', 'town', 31.0, 34.0, ())])
+    assert gazetteer.resolve('in somewhere today').name == 'Somewhere'
+
+
+def test_cluster_points_joins_chains_within_the_radius():
+    # 0-1 and 1-2 are each ~0.9 km apart; 3 is far away
+    points = [(31.300, 34.240), (31.308, 34.240), (31.316, 34.240), (31.500, 34.460)]
+    clusters = sorted(sorted(cluster) for cluster in cluster_points(points, radius_km=1.0))
+    assert clusters == [[0, 1, 2], [3]]
+
+
+def test_cluster_points_joins_east_west_neighbours():
+    # ~0.96 km apart east-west but more than one radius apart in degrees of longitude
+    points = [(31.300, 34.24358), (31.300, 34.25368)]
+    assert distance_km(*points[0], *points[1]) < 1.0
+    assert cluster_points(points, radius_km=1.0) == [[0, 1]]
+
+
+def test_cluster_points_empty():
+    assert cluster_points([], radius_km=1.0) == []
@@ -0,0 +1,129 @@
+"""RollingFileHandler age-based rotation, and which process writes which log file"""
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from crisis_shared import log_pipeline
+from crisis_shared.log_pipeline import RollingFileHandler
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS)
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def make_logger(handler):
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger = logging.getLogger(f'test_log_pipeline.{id(handler)}')
+    logger.propagate = False
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_writes_do_not_postpone_age_rotation(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(log_pipeline.time, 'time', clock.time)
+    path = str(tmp_path / 'run.log')
+
+    handler = RollingFileHandler(path, rotate_seconds=60, backup_count=3)
+    logger = make_logger(handler)
+    for _ in range(5):
+        logger.info('tick')
+        clock.now += 20
+    handler.close()
+
+    assert os.path.exists(f'{path}.1')
+
+
+def test_file_age_carries_over_between_runs(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(log_pipeline.time, 'time', clock.time)
+    path = str(tmp_path / 'run.log')
+
+    handler = RollingFileHandler(path, rotate_seconds=60)
+    logger = make_logger(handler)
+    logger.info('first run')
+    handler.close()
+
+    clock.now += 45
+    # The next run starts with the file's recorded age, not a fresh timer
+    handler = RollingFileHandler(path, rotate_seconds=60)
+    assert handler._opened_at == 1000.0
+    logger = make_logger(handler)
+    clock.now += 20
+    logger.info('second run')
+    handler.close()
+
+    assert os.path.exists(f'{path}.1')
+    with open(f'{path}.opened') as f:
+        assert float(f.read()) == clock.now
+
+
+def file_handlers():
+    """Files the current process's log listener writes to (run inside pool workers)"""
+    listener = log_pipeline._listener
+    return [handler.baseFilename for handler in (listener.handlers if listener else ())
+            if isinstance(handler, logging.FileHandler)]
+
+
+def setup_in_child(log_file):
+    log_pipeline.setup_logging(log_file=log_file, console=False)
+    try:
+        return file_handlers()
+    finally:
+        log_pipeline.stop_logging()
+
+
+def test_spawned_children_leave_the_log_file_to_the_parent(tmp_path):
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        assert pool.submit(setup_in_child, str(tmp_path / 'run.log')).result(timeout=60) == []
+
+
+def test_per_process_log_files(tmp_path):
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    try:
+        log_pipeline.setup_logging(log_file=str(tmp_path / 'server.log'), console=False, per_process=True)
+        assert file_handlers() == [str(tmp_path / f'server.{os.getpid()}.log')]
+    finally:
+        log_pipeline.stop_logging()
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+
+def test_extractor_pool_workers_do_not_open_the_log_file(tmp_path):
+    pytest.importorskip('spacy')
+    pytest.importorskip('nltk')
+    log_file = str(tmp_path / 'extractor.log')
+    script = (
+        'import json\n'
+        'from extractor import text_parser\n'
+        'from test_log_pipeline import file_handlers\n'
+        'pool = text_parser.get_process_pool()\n'
+        'print(json.dumps([file_handlers(), [pool.submit(file_handlers).result(timeout=120) for _ in range(4)]]))\n'
+        'text_parser.shutdown_process_pool()\n'
+    )
+    env = dict(os.environ, EXTRACTOR_LOG_FILE=log_file, EXTRACTOR_PARALLEL_WORKERS='2',
+               PYTHONPATH=os.pathsep.join([TESTS, os.path.join(ROOT, 'incident-extractor'), ROOT,
+                                           os.environ.get('PYTHONPATH', '')]))
+    env.pop('EXTRACTOR_WORKERS', None)
+    output = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True,
+                            timeout=300, check=True).stdout
+
+    parent, workers = json.loads(output.strip().splitlines()[-1])
+    assert parent == [log_file]
+    assert workers == [[]] * 4
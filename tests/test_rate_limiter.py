@@ -0,0 +1,119 @@
+"""AdaptiveRateLimiter: AIMD transitions, Retry-After, clamping, token reservation and saved state"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from crisis_shared import rate_limiter
+from crisis_shared.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+URL = 'https://example.com/news/1'
+
+
+@pytest.fixture
+def limiter():
+    return AdaptiveRateLimiter(delay=2.0, min_delay=0.5, max_delay=60.0, increase=0.05, respect_robots=False)
+
+
+def test_fast_success_increases_the_rate_additively(limiter):
+    limiter.record(URL, status=200, latency=0.1)
+    assert limiter.delay(URL) == pytest.approx(1 / 0.55)
+    limiter.record(URL, status=204, latency=0.1)
+    assert limiter.delay(URL) == pytest.approx(1 / 0.6)
+
+
+@pytest.mark.parametrize('status', [301, 304, 400, 404, 410, None])
+def test_other_responses_leave_the_rate_alone(limiter, status):
+    limiter.record(URL, status=status, latency=0.1)
+    assert limiter.delay(URL) == pytest.approx(2.0)
+
+
+@pytest.mark.parametrize('status', [403, 429, 500, 502, 503, 504])
+def test_throttling_and_server_errors_halve_the_rate(limiter, status):
+    limiter.record(URL, status=status, latency=0.1)
+    assert limiter.delay(URL) == pytest.approx(4.0)
+
+
+def test_connection_errors_halve_the_rate(limiter):
+    limiter.record(URL, error=True)
+    assert limiter.delay(URL) == pytest.approx(4.0)
+
+
+def test_retry_after_pauses_the_host_and_caps_its_rate(limiter, monkeypatch):
+    limiter.record(URL, status=503, retry_after='10')
+    assert limiter.delay(URL) == pytest.approx(10.0)
+
+    slept = []
+    monkeypatch.setattr(rate_limiter.time, 'sleep', slept.append)
+    limiter.wait(URL)
+    assert 9.0 < slept[0] <= 10.0
+
+
+def test_retry_after_on_a_success_is_ignored(limiter):
+    limiter.record(URL, status=200, latency=0.1, retry_after='30')
+    assert limiter.delay(URL) < 2.0
+
+
+def test_slow_responses_cut_the_rate_by_a_fifth(limiter):
+    limiter.record(URL, status=200, latency=0.1)
+    rate = 1 / limiter.delay(URL)
+    # The latency average jumps well past twice the 0.1s baseline
+    limiter.record(URL, status=200, latency=2.0)
+    assert 1 / limiter.delay(URL) == pytest.approx(rate * 0.8)
+
+
+def test_recovery_after_back_off(limiter):
+    limiter.record(URL, status=429)
+    for _ in range(20):
+        limiter.record(URL, status=200, latency=0.1)
+    assert limiter.delay(URL) == pytest.approx(1 / (0.25 + 20 * 0.05))
+
+
+def test_delay_stays_within_bounds_and_above_crawl_delay(limiter):
+    for _ in range(100):
+        limiter.record(URL, status=200, latency=0.1)
+    assert limiter.delay(URL) == pytest.approx(0.5)
+    for _ in range(20):
+        limiter.record(URL, status=500)
+    assert limiter.delay(URL) == pytest.approx(60.0)
+
+    limiter.hosts['example.com'].crawl_delay = 5.0
+    for _ in range(100):
+        limiter.record(URL, status=200, latency=0.1)
+    assert limiter.delay(URL) == pytest.approx(5.0)
+
+
+def test_hosts_adapt_independently(limiter):
+    limiter.record(URL, status=429)
+    assert limiter.delay('https://other.example.org/') == pytest.approx(2.0)
+
+
+def test_wait_reserves_consecutive_slots(limiter, monkeypatch):
+    slept = []
+    monkeypatch.setattr(rate_limiter.time, 'sleep', slept.append)
+    limiter.wait(URL)
+    limiter.wait(URL)
+    limiter.wait(URL)
+    assert len(slept) == 2
+    assert slept[0] == pytest.approx(2.0, abs=0.05)
+    assert slept[1] == pytest.approx(4.0, abs=0.05)
+
+
+def test_learned_rates_survive_a_restart(tmp_path):
+    state_file = str(tmp_path / 'rates.json')
+    limiter = AdaptiveRateLimiter(delay=2.0, state_file=state_file, respect_robots=False)
+    limiter.record(URL, status=429, latency=0.3)
+    limiter.save()
+
+    restarted = AdaptiveRateLimiter(delay=2.0, state_file=state_file, respect_robots=False)
+    assert restarted.delay(URL) == pytest.approx(4.0)
+    assert restarted.hosts['example.com'].latency == pytest.approx(0.3)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('-5') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    later = datetime.now(timezone.utc) + timedelta(seconds=90)
+    assert 80 < parse_retry_after(format_datetime(later, usegmt=True)) <= 90
@@ -0,0 +1,154 @@
+"""record_diff: upsert matching, missing-value handling, id adoption and the changelog"""
+import json
+
+import pytest
+
+from daily_extractor import GazaCrisisExtractor
+from record_diff import ChangeLog, diff_rows, field_changes, merge_record, normalize, upsert
+
+
+def stored():
+    return [
+        {'id': 'gaza-2024-03-12-a1b2c3', 'title': 'Strike on school', 'casualties_deaths': '12',
+         'casualties_injured': '30', 'description': 'Initial report', 'last_updated': '2024-03-12T10:00:00'},
+        {'id': 'gaza-f00d42', 'title': 'Aid convoy stopped', 'casualties_deaths': '0', 'description': '',
+         'last_updated': '2024-03-12T11:00:00'},
+    ]
+
+
+def index_of(rows):
+    return {row['id']: position for position, row in enumerate(rows)}
+
+
+def test_normalize_compares_numbers_and_strings():
+    assert normalize(28) == normalize('28') == normalize('28.0')
+    assert normalize(None) == ''
+    assert normalize(' text ') == 'text'
+    assert normalize('nan') == 'nan'
+
+
+def test_merge_keeps_stored_values_the_new_row_is_missing():
+    old = {'casualties_deaths': '12', 'description': 'Initial', 'tags': 'a'}
+    new = {'casualties_deaths': 0, 'description': '', 'tags': 'b', 'verified': 'verified'}
+    assert merge_record(old, new) == {'casualties_deaths': '12', 'description': 'Initial', 'tags': 'b',
+                                      'verified': 'verified'}
+    assert merge_record(old, new, keep_missing=False)['casualties_deaths'] == 0
+
+
+def test_last_updated_alone_is_not_a_change():
+    assert field_changes({'last_updated': 'a', 'x': '1'}, {'last_updated': 'b', 'x': 1.0}) == {}
+
+
+def test_upsert_matches_by_id():
+    rows = stored()
+    index = index_of(rows)
+    new = [
+        {'id': 'gaza-2024-03-12-a1b2c3', 'title': 'Strike on school', 'casualties_deaths': 15,
+         'casualties_injured': 0, 'description': '', 'last_updated': '2024-03-13T09:00:00'},
+        {'id': 'gaza-f00d42', 'title': 'Aid convoy stopped', 'casualties_deaths': 0, 'description': '',
+         'last_updated': '2024-03-13T09:00:00'},
+        {'id': 'gaza-2024-03-13-bbbbbb', 'title': 'New incident'},
+    ]
+    diff = upsert(rows, index, new)
+
+    assert diff.summary() == {'added': 1, 'changed': 1, 'unchanged': 1, 'renamed': 0}
+    old, merged, changes = diff.changed[0]
+    assert changes == {'casualties_deaths': ('12', 15)}
+    assert merged['casualties_injured'] == '30' and merged['description'] == 'Initial report'
+    assert rows[0] is merged and rows[2]['id'] == 'gaza-2024-03-13-bbbbbb'
+    assert index['gaza-2024-03-13-bbbbbb'] == 2
+
+
+def test_duplicate_ids_within_one_batch_are_merged():
+    rows = []
+    diff = upsert(rows, {}, [{'id': 'gaza-abcdef', 'title': 'x', 'casualties_deaths': 1},
+                             {'id': 'gaza-abcdef', 'title': 'x', 'casualties_deaths': 2}])
+    assert len(rows) == 1 and rows[0]['casualties_deaths'] == 2
+    assert diff.summary()['added'] == 1 and diff.summary()['changed'] == 1
+
+
+def test_diff_rows_leaves_inputs_untouched():
+    rows = stored()
+    diff = diff_rows(rows, [dict(rows[0], casualties_deaths='20')])
+    assert len(diff.changed) == 1
+    assert rows == stored()
+
+
+def test_legacy_three_digit_id_is_adopted_by_title():
+    rows = [{'id': 'gaza-2025-2024-18-427', 'title': 'Strike on  School ', 'casualties_deaths': '12'}]
+    index = index_of(rows)
+    diff = upsert(rows, index, [{'id': 'gaza-3f9a01', 'title': 'Strike on school', 'casualties_deaths': 14}])
+
+    assert diff.renamed == [('gaza-2025-2024-18-427', 'gaza-3f9a01')]
+    assert diff.added == []
+    assert [row['id'] for row in rows] == ['gaza-3f9a01']
+    assert rows[0]['casualties_deaths'] == 14
+    assert index == {'gaza-3f9a01': 0}
+
+
+def test_extraction_dated_id_is_adopted_by_url_hash_and_title():
+    rows = [{'id': 'gaza-2026-10-18-3f9a01', 'title': 'Strike on school'},
+            {'id': 'gaza-2024-01-01-3f9a01', 'title': 'Different article, same 24-bit hash'}]
+    diff = upsert(rows, index_of(rows), [{'id': 'gaza-3f9a01', 'title': 'Strike on school'},
+                                         {'id': 'gaza-777777', 'title': 'Different article, same 24-bit hash'}])
+
+    assert diff.renamed == [('gaza-2026-10-18-3f9a01', 'gaza-3f9a01')]
+    assert [row['id'] for row in rows] == ['gaza-3f9a01', 'gaza-2024-01-01-3f9a01', 'gaza-777777']
+
+
+def test_current_ids_are_never_adopted_by_title_alone():
+    rows = [{'id': 'gaza-2024-03-12-a1b2c3', 'title': 'Daily update'}]
+    diff = upsert(rows, index_of(rows), [{'id': 'gaza-2024-03-13-d4e5f6', 'title': 'Daily update'}])
+    assert diff.renamed == [] and len(diff.added) == 1
+
+
+def test_a_legacy_row_is_adopted_only_once():
+    rows = [{'id': 'gaza-2024-03-12-005', 'title': 'Strike on school'}]
+    diff = upsert(rows, index_of(rows), [{'id': 'gaza-aaaaaa', 'title': 'Strike on school'},
+                                         {'id': 'gaza-bbbbbb', 'title': 'Strike on school'}])
+    assert diff.renamed == [('gaza-2024-03-12-005', 'gaza-aaaaaa')]
+    assert [row['id'] for row in rows] == ['gaza-aaaaaa', 'gaza-bbbbbb']
+
+
+def test_changelog_records_additions_updates_and_renames(tmp_path):
+    rows = stored() + [{'id': 'gaza-2024-03-12-005', 'title': 'Old scheme'}]
+    diff = upsert(rows, index_of(rows), [
+        dict(stored()[0], casualties_deaths='15'),
+        {'id': 'gaza-c0ffee', 'title': 'Old scheme'},
+        {'id': 'gaza-2024-03-14-123456', 'title': 'Brand new'},
+    ])
+
+    changelog = ChangeLog(str(tmp_path / 'changes.jsonl'))
+    assert changelog.append(diff, source='test') == 3
+    with open(changelog.path) as f:
+        assert {json.loads(line)['change'] for line in f} == {'added', 'updated', 'renamed'}
+
+    assert changelog.history('gaza-c0ffee')[0]['previous_id'] == 'gaza-2024-03-12-005'
+    assert changelog.history('gaza-2024-03-12-005')[0]['id'] == 'gaza-c0ffee'
+    history = changelog.history('gaza-2024-03-12-a1b2c3')
+    assert history[0]['fields'] == {'casualties_deaths': {'old': '12', 'new': '15'}}
+    assert changelog.append(diff_rows(rows, [])) == 0
+
+
+@pytest.fixture
+def extractor():
+    # generate_incident_id doesn't touch config, logging or the network
+    return object.__new__(GazaCrisisExtractor)
+
+
+def test_incident_ids_are_stable_and_ignore_tracking_parameters(extractor):
+    url = 'https://www.aljazeera.com/news/2024/3/12/israeli-strikes-kill-dozens'
+    incident_id = extractor.generate_incident_id(url)
+    assert incident_id.startswith('gaza-2024-03-12-') and len(incident_id) == len('gaza-2024-03-12-') + 6
+    assert extractor.generate_incident_id(url + '?utm_source=x#top') == incident_id
+    assert extractor.generate_incident_id(url.replace('www.aljazeera', 'WWW.ALJAZEERA')) == incident_id
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.aljazeera.com/news/liveblog/2024/3/12/live-israel-gaza',
+    'https://www.aljazeera.com/features/longform/2024/gaza-hospitals',
+    'https://www.aljazeera.com/news/gaza-update',
+])
+def test_incident_ids_without_a_date_in_the_path_are_undated(extractor, url):
+    incident_id = extractor.generate_incident_id(url)
+    assert incident_id.count('-') == 1 and len(incident_id) == len('gaza-') + 6
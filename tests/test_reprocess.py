@@ -0,0 +1,31 @@
+"""reprocess: only the fields the rules derive are written back"""
+from concurrent.futures import ThreadPoolExecutor
+
+from daily_extractor import INCIDENT_TYPE_KEYWORDS, TAG_KEYWORDS
+from reprocess import DERIVED_FIELDS, KeywordMatcher, fields_to_write, process_batch
+
+
+def test_process_batch_emits_only_derived_fields():
+    rows = [{'id': 'gaza-abc123', 'title': '5 killed in strike', 'description': '', 'casualties_critical': '3'}]
+    with ThreadPoolExecutor(1) as pool:
+        results = process_batch(rows, KeywordMatcher(INCIDENT_TYPE_KEYWORDS), KeywordMatcher(TAG_KEYWORDS), pool, 1)
+
+    assert set(results[0]) == {'id'} | set(DERIVED_FIELDS)
+    assert 'casualties_critical' not in results[0]
+    assert results[0]['casualties_deaths'] == 5
+
+
+def test_extracted_rows_take_every_recomputed_field():
+    result = {'id': 'gaza-abc123', 'type': 'airstrike', 'tags': 'school', 'casualties_deaths': 0,
+              'casualties_critical': 0}
+    stored = {'id': 'gaza-abc123', 'type': 'other', 'casualties_deaths': '4', 'casualties_critical': '3'}
+    assert fields_to_write(result, stored) == {'id': 'gaza-abc123', 'type': 'airstrike', 'tags': 'school',
+                                               'casualties_deaths': 0}
+
+
+def test_hand_curated_rows_only_get_their_gaps_filled():
+    result = {'id': 'manual-1', 'type': 'airstrike', 'tags': 'school', 'casualties_deaths': 12,
+              'casualties_injured': 30, 'casualties_hospitalized': 0}
+    stored = {'id': 'manual-1', 'type': 'shelling', 'tags': '', 'casualties_deaths': '14',
+              'casualties_injured': '', 'casualties_hospitalized': ''}
+    assert fields_to_write(result, stored) == {'id': 'manual-1', 'tags': 'school', 'casualties_injured': 30}
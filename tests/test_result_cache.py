@@ -0,0 +1,80 @@
+"""ResultCache: TTL entries and single-flight computation"""
+import threading
+import time
+
+import pytest
+
+from extractor.result_cache import ResultCache, normalize_url
+
+
+def test_normalize_url_ignores_case_of_host_and_fragment():
+    assert normalize_url(' HTTPS://Example.COM/a?b=1#top ') == 'https://example.com/a?b=1'
+    assert normalize_url('http://example.com') == 'http://example.com/'
+
+
+def test_miss_then_hit():
+    cache = ResultCache(ttl=60)
+    assert cache.get_or_compute('k', lambda: 1)[::2] == (1, 'MISS')
+    assert cache.get_or_compute('k', lambda: 2)[::2] == (1, 'HIT')
+
+
+def test_expired_entries_are_recomputed():
+    cache = ResultCache(ttl=0.01)
+    cache.get_or_compute('k', lambda: 1)
+    time.sleep(0.02)
+    assert cache.get_or_compute('k', lambda: 2)[::2] == (2, 'MISS')
+
+
+def test_uncacheable_values_are_returned_but_not_stored():
+    cache = ResultCache(ttl=60)
+    assert cache.get_or_compute('k', lambda: 'bad', cacheable=lambda value: False) == ('bad', 0, 'MISS')
+    assert cache.get('k') is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(ttl=60, max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None and cache.get('a') is not None
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResultCache(ttl=60)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+                 for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(status for _, _, status in results) == ['COALESCED'] * 3 + ['MISS']
+
+
+def test_failed_computation_raises_and_is_not_cached():
+    cache = ResultCache(ttl=60)
+
+    def fail():
+        raise RuntimeError('fetch failed')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('k', fail)
+    assert cache.get_or_compute('k', lambda: 'ok')[::2] == ('ok', 'MISS')
@@ -0,0 +1,146 @@
+"""RollupStore: daily cubes, period totals, filters, group-by and incremental updates"""
+import os
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from csv_summary import to_number
+from rollups import RollupStore, period_label, record_day, record_tags
+
+ROWS = [
+    {'date': '2024-03-04', 'type': 'Airstrike', 'location_name': 'Rafah', 'tags': 'airstrike|residential',
+     'casualties_deaths': '5', 'casualties_injured': '12'},
+    {'date': '2024-03-06', 'type': 'airstrike', 'location_name': 'Khan Younis', 'tags': 'airstrike',
+     'casualties_deaths': '2', 'casualties_injured': ''},
+    {'date': '', 'last_updated': '2024-03-11T09:30:00', 'type': 'medical', 'location_name': 'Rafah',
+     'tags': 'hospital', 'casualties_deaths': '1'},
+    {'date': '2024-02-28', 'type': '', 'location_name': '', 'tags': '', 'casualties_deaths': 'n/a'},
+    {'date': 'unknown', 'last_updated': '', 'type': 'medical'},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RollupStore(str(tmp_path / 'rollups'))
+    store.rebuild(ROWS)
+    return store
+
+
+def brute_force(rows, measure_column, granularity, keep=lambda row: True):
+    totals = Counter()
+    for row in rows:
+        day = record_day(row)
+        if day is None or not keep(row):
+            continue
+        value = 1 if measure_column is None else int(to_number(row.get(measure_column)) or 0)
+        totals[period_label(day, granularity)] += value
+    return {period: value for period, value in sorted(totals.items())}
+
+
+def test_record_day_falls_back_to_last_updated():
+    assert record_day(ROWS[2]) == date(2024, 3, 11)
+    assert record_day(ROWS[4]) is None
+
+
+def test_record_tags():
+    assert record_tags({'tags': 'B|a, b'}) == ['a', 'b']
+    assert record_tags({}) == ['unknown']
+
+
+def test_period_labels():
+    assert period_label(date(2024, 3, 6), 'week') == '2024-03-04'
+    assert period_label(date(2024, 3, 6), 'month') == '2024-03'
+
+
+@pytest.mark.parametrize('granularity', ['day', 'week', 'month'])
+@pytest.mark.parametrize('measure, column', [('incidents', None), ('deaths', 'casualties_deaths'),
+                                             ('injured', 'casualties_injured')])
+def test_totals_match_a_brute_force_count(store, granularity, measure, column):
+    expected = brute_force(ROWS, column, granularity)
+    result = store.query(measure, granularity)
+    # Periods with no rows inside the populated range are reported as 0
+    assert {period: value for period, value in result.items() if value} == \
+        {period: value for period, value in expected.items() if value}
+
+
+def test_undated_rows_are_counted_separately(store):
+    assert store.undated == 1
+    assert sum(store.query('incidents').values()) == 4
+
+
+def test_range_and_filters(store):
+    assert store.query('deaths', date_from='2024-03-05', date_to='2024-03-10') == \
+        {'2024-03-05': 0, '2024-03-06': 2, '2024-03-07': 0, '2024-03-08': 0, '2024-03-09': 0, '2024-03-10': 0}
+    assert sum(store.query('incidents', type='airstrike').values()) == 2
+    assert sum(store.query('deaths', location='Rafah').values()) == 6
+    assert sum(store.query('incidents', tag='airstrike', location='Rafah').values()) == 1
+    assert store.query('incidents', type='never seen') == {}
+    # Filters are matched the way types and tags are stored
+    assert store.query('incidents', type=' Airstrike') == store.query('incidents', type='airstrike')
+    assert store.query('incidents', tag='AIRSTRIKE', location='Rafah ') == \
+        store.query('incidents', tag='airstrike', location='Rafah')
+    assert store.query('incidents', 'month', group_by='type', type='Medical') == {'medical': {'2024-03': 1}}
+    assert store.query('incidents', date_from='2025-01-01') == {}
+
+
+def test_group_by(store):
+    assert store.query('deaths', 'month', group_by='location') == {
+        'Rafah': {'2024-03': 6}, 'Khan Younis': {'2024-03': 2}}
+    assert store.query('incidents', 'month', group_by='tag') == {
+        'airstrike': {'2024-03': 2}, 'residential': {'2024-03': 1}, 'hospital': {'2024-03': 1},
+        'unknown': {'2024-02': 1}}
+    assert store.query('incidents', 'month', group_by='type', location='Rafah') == {
+        'airstrike': {'2024-03': 1}, 'medical': {'2024-03': 1}}
+
+
+def test_invalid_queries(store):
+    with pytest.raises(ValueError):
+        store.query('rainfall')
+    with pytest.raises(ValueError):
+        store.query(granularity='year')
+    with pytest.raises(ValueError):
+        store.query(tag='airstrike', type='airstrike')
+
+
+def test_update_as_remove_then_add_matches_a_rebuild(tmp_path, store):
+    old = ROWS[0]
+    new = dict(old, date='2024-01-15', location_name='Gaza City', casualties_deaths='7')
+    store.add_record(old, sign=-1)
+    store.add_record(new)
+    store.add_record({'date': '2024-04-02', 'type': 'aid', 'location_name': 'Rafah'})
+
+    rows = [new] + ROWS[1:] + [{'date': '2024-04-02', 'type': 'aid', 'location_name': 'Rafah'}]
+    rebuilt = RollupStore(str(tmp_path / 'rebuilt'))
+    rebuilt.rebuild(rows)
+
+    for measure in ('incidents', 'deaths', 'injured'):
+        for group_by in (None, 'location', 'tag'):
+            assert store.query(measure, 'week', group_by=group_by) == rebuilt.query(measure, 'week', group_by=group_by)
+    assert store.describe()['start'] == '2024-01-15'
+
+
+def test_saved_store_is_reloaded_by_other_instances(tmp_path, store):
+    reader = RollupStore(store.store_dir)
+    assert reader.query('deaths', 'month') == store.query('deaths', 'month')
+
+    store.add_record({'date': '2024-03-20', 'casualties_deaths': '3'})
+    store.save()
+    # Make sure the reader sees a new mtime even on coarse-grained filesystems
+    stat = os.stat(store.meta_path)
+    os.utime(store.meta_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert reader.query('deaths', 'month') == {'2024-02': 0, '2024-03': 11}
+
+
+def test_describe(store):
+    description = store.describe()
+    assert description['start'] == '2024-02-28'
+    assert description['end'] == '2024-03-11'
+    assert description['undated'] == 1
+    assert set(description['locations']) == {'Rafah', 'Khan Younis', 'unknown'}
+
+
+def test_empty_store(tmp_path):
+    store = RollupStore(str(tmp_path / 'empty'))
+    assert store.query() == {}
+    assert store.describe()['start'] is None
@@ -0,0 +1,121 @@
+"""SearchIndex: query building, upserts by incident id, filters, ranking and directory sync"""
+import csv
+import os
+
+import pytest
+
+from search_index import SearchIndex, build_match_query, split_tags
+
+FIELDS = ['id', 'title', 'description', 'location_name', 'tags', 'type', 'date']
+
+ROWS = [
+    {'id': 'gaza-1', 'title': 'Strike on Al-Shifa field hospital', 'description': 'Patients evacuated from the hospital.',
+     'location_name': 'Gaza City', 'tags': 'hospital|airstrike', 'type': 'Medical', 'date': '2024-03-10'},
+    {'id': 'gaza-2', 'title': 'Aid convoy reaches Rafah', 'description': 'Trucks carried flour and a field kitchen.',
+     'location_name': 'Rafah', 'tags': 'aid', 'type': 'humanitarian', 'date': '2024-03-12T08:00:00'},
+    {'id': 'gaza-3', 'title': 'Water plant damaged', 'description': 'Residents near the hospital lost water <b>again</b>.',
+     'location_name': 'Khan Younis', 'tags': 'water,infrastructure', 'type': 'infrastructure', 'date': '2024-02-01'},
+]
+
+
+def write_report(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / 'index.db'))
+    index.index_rows(ROWS, str(tmp_path / 'report.csv'))
+    return index
+
+
+def ids(result):
+    return [row['id'] for row in result['results']]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('al-shifa hospital', '"al-shifa" "hospital"'),
+    ('"field hospital" OR rafa*', '"field hospital" OR "rafa"*'),
+    ('OR hospital NOT', '"hospital"'),
+    ('say "hi', '"say" "hi"'),
+    ('', ''),
+])
+def test_build_match_query(query, expected):
+    assert build_match_query(query) == expected
+
+
+def test_split_tags_accepts_both_separators():
+    assert split_tags('Hospital| aid ,water') == ['hospital', 'aid', 'water']
+    assert split_tags(None) == []
+
+
+def test_title_matches_rank_first(index, tmp_path):
+    # BM25 needs the term to be in under half the documents for a positive IDF
+    filler = [{'id': f'other-{n}', 'title': 'Shelter update', 'description': 'Families displaced.'} for n in range(4)]
+    index.index_rows(filler, str(tmp_path / 'filler.csv'))
+
+    result = index.search('hospital')
+    assert result['total'] == 2
+    assert ids(result) == ['gaza-1', 'gaza-3']
+    assert result['results'][0]['score'] > result['results'][1]['score']
+
+
+def test_phrase_and_prefix_queries(index):
+    assert ids(index.search('"field hospital"')) == ['gaza-1']
+    assert ids(index.search('raf*')) == ['gaza-2']
+
+
+def test_filters(index):
+    assert ids(index.search(type='MEDICAL')) == ['gaza-1']
+    assert ids(index.search(tags='water,infrastructure')) == ['gaza-3']
+    assert ids(index.search(tags=['aid', 'water'])) == []
+    assert ids(index.search(location='younis')) == ['gaza-3']
+    assert ids(index.search(date_from='2024-03-01', date_to='2024-03-11')) == ['gaza-1']
+
+
+def test_listing_without_a_query_is_newest_first_and_paginated(index):
+    assert ids(index.search()) == ['gaza-2', 'gaza-1', 'gaza-3']
+    page = index.search(page=2, per_page=2)
+    assert page['total'] == 3 and ids(page) == ['gaza-3']
+
+
+def test_snippets_escape_html_around_highlights(index):
+    snippet = index.search('again')['results'][0]['snippet']
+    assert '<mark>again</mark>' in snippet
+    assert '&lt;b&gt;' in snippet and '<b>' not in snippet
+
+
+def test_same_incident_is_indexed_once(index, tmp_path):
+    updated = dict(ROWS[1], title='Aid convoy turned back at Rafah')
+    index.index_rows([updated, {'id': '', 'title': 'no id'}], str(tmp_path / 'later.csv'))
+
+    result = index.search('convoy')
+    assert ids(result) == ['gaza-2']
+    assert result['results'][0]['title'] == 'Aid convoy turned back at Rafah'
+    assert result['results'][0]['source_file'] == 'later.csv'
+    assert index.search()['total'] == 3
+
+
+def test_sync_directory_indexes_changes_and_forgets_deleted_reports(tmp_path):
+    reports = tmp_path / 'reports'
+    reports.mkdir()
+    index = SearchIndex(str(tmp_path / 'index.db'))
+
+    first = write_report(reports / 'a.csv', ROWS[:2])
+    write_report(reports / 'b.csv', ROWS[2:])
+    (reports / 'notes.txt').write_text('ignored')
+    assert index.sync_directory(str(reports)) == 2
+    assert index.sync_directory(str(reports)) == 0
+
+    write_report(first, [dict(ROWS[0], title='Strike on Al-Shifa complex')])
+    os.utime(first, ns=(0, os.stat(first).st_mtime_ns + 1))
+    assert index.sync_directory(str(reports)) == 1
+    assert index.search('complex')['total'] == 1
+
+    os.remove(reports / 'b.csv')
+    assert index.sync_directory(str(reports)) == 0
+    assert index.search('water')['total'] == 0
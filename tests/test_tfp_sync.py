@@ -0,0 +1,167 @@
+"""tfp_sync: conditional sync against a local stand-in server, deltas, pruning and published slices"""
+import functools
+import json
+import os
+import threading
+from datetime import date
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tfp_sync import TfpMirror, age_figures, age_from_dob, compute_delta, parse_age
+
+KILLED = [
+    {'id': 'a1', 'name': 'A', 'age': '7', 'sex': 'm'},
+    {'id': 'a2', 'name': 'B', 'age': '34', 'sex': 'f'},
+    {'id': 'a3', 'name': 'C', 'age': '', 'dob': '1950-02-03', 'sex': 'm'},
+    {'id': 'a4', 'name': 'D', 'age': 'unknown', 'sex': 'f'},
+    {'id': 'a5', 'name': 'E', 'age': '0', 'sex': 'f'},
+]
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """Directory served over HTTP the way the upstream API serves its files"""
+    root = tmp_path / 'upstream'
+    root.mkdir()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield root, f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def publish_upstream(root, filename, data, mtime):
+    path = root / filename
+    path.write_text(json.dumps(data), encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+def make_mirror(tmp_path, base_url, **kwargs):
+    return TfpMirror(base_url, str(tmp_path / 'mirror'), str(tmp_path / 'publish'), **kwargs)
+
+
+def test_sync_is_conditional(tmp_path, upstream):
+    root, base_url = upstream
+    publish_upstream(root, 'killed-in-gaza.min.json', KILLED, 1700000000)
+
+    mirror = make_mirror(tmp_path, base_url)
+    assert mirror.sync(['killed-in-gaza']) == {'killed-in-gaza': 'new'}
+    assert mirror.load_version('killed-in-gaza') == KILLED
+
+    # The server answers If-Modified-Since with 304
+    mirror = make_mirror(tmp_path, base_url)
+    assert mirror.sync(['killed-in-gaza']) == {'killed-in-gaza': 'unchanged'}
+
+    # Re-uploaded with the same bytes: a full response, but no new version
+    publish_upstream(root, 'killed-in-gaza.min.json', KILLED, 1700000100)
+    assert mirror.sync(['killed-in-gaza']) == {'killed-in-gaza': 'same-content'}
+    assert len(mirror.state['killed-in-gaza']['versions']) == 1
+
+
+def test_new_content_writes_a_delta_and_republishes(tmp_path, upstream):
+    root, base_url = upstream
+    publish_upstream(root, 'killed-in-gaza.min.json', KILLED, 1700000000)
+    mirror = make_mirror(tmp_path, base_url)
+    mirror.sync(['killed-in-gaza'])
+
+    updated = KILLED[1:] + [{'id': 'a6', 'name': 'F', 'age': '61', 'sex': 'm'}]
+    updated[0] = dict(updated[0], age='35')
+    publish_upstream(root, 'killed-in-gaza.min.json', updated, 1700000100)
+    assert mirror.sync(['killed-in-gaza']) == {'killed-in-gaza': 'new'}
+
+    delta_dir = tmp_path / 'mirror' / 'deltas' / 'killed-in-gaza'
+    [delta_file] = os.listdir(delta_dir)
+    delta = json.loads((delta_dir / delta_file).read_text(encoding='utf-8'))
+    assert [row['id'] for row in delta['added']] == ['a6']
+    assert delta['removed'] == ['a1']
+    assert [row['id'] for row in delta['changed']] == ['a2']
+
+    with open(tmp_path / 'publish' / 'killed-in-gaza-summary.json', encoding='utf-8') as f:
+        assert json.load(f)['total_records'] == len(updated)
+
+
+def test_failed_dataset_does_not_stop_the_others(tmp_path, upstream):
+    root, base_url = upstream
+    publish_upstream(root, 'summary.json', {'killed': {'total': 10}}, 1700000000)
+
+    results = make_mirror(tmp_path, base_url).sync(['killed-in-gaza', 'summary'])
+    assert results['killed-in-gaza'].startswith('error:')
+    assert results['summary'] == 'new'
+    with open(tmp_path / 'publish' / 'summary.json', encoding='utf-8') as f:
+        assert json.load(f) == {'killed': {'total': 10}}
+
+
+def test_compute_delta():
+    old = [{'id': 1, 'v': 'a'}, {'id': 2, 'v': 'b'}, {'id': 3, 'v': 'c'}]
+    new = [{'id': 2, 'v': 'b'}, {'id': 3, 'v': 'C'}, {'id': 4, 'v': 'd'}, 'not a row']
+    assert compute_delta(old, new, 'id') == {
+        'key': 'id',
+        'added': [{'id': 4, 'v': 'd'}],
+        'removed': [1],
+        'changed': [{'id': 3, 'v': 'C'}]
+    }
+
+
+def test_prune_keeps_the_newest_versions_and_their_deltas(tmp_path, upstream):
+    root, base_url = upstream
+    mirror = make_mirror(tmp_path, base_url, keep_versions=2)
+    for step in range(4):
+        publish_upstream(root, 'killed-in-gaza.min.json', KILLED[:step + 1], 1700000000 + 100 * step)
+        mirror.sync(['killed-in-gaza'])
+
+    kept = [entry['version'] for entry in mirror.state['killed-in-gaza']['versions']]
+    assert len(kept) == 2 and kept[-1] == mirror.state['killed-in-gaza']['current']
+    stored = sorted(name[:-len('.json.gz')] for name in os.listdir(tmp_path / 'mirror' / 'versions' / 'killed-in-gaza'))
+    assert stored == sorted(kept)
+    # Only the delta between the two kept versions remains
+    assert os.listdir(tmp_path / 'mirror' / 'deltas' / 'killed-in-gaza') == [f'{kept[0]}__{kept[1]}.json']
+
+
+def test_published_slices(tmp_path, upstream):
+    root, base_url = upstream
+    publish_upstream(root, 'killed-in-gaza.min.json', KILLED, 1700000000)
+    publish_upstream(root, 'press_killed_in_gaza.min.json', [{'id': 'p1'}], 1700000000)
+    mirror = make_mirror(tmp_path, base_url)
+    mirror.sync(['killed-in-gaza', 'press-killed-in-gaza'])
+
+    publish_dir = tmp_path / 'publish'
+    with open(publish_dir / 'children-killed.min.json', encoding='utf-8') as f:
+        assert [row['id'] for row in json.load(f)] == ['a1', 'a5']
+    with open(publish_dir / 'killed-in-gaza-summary.json', encoding='utf-8') as f:
+        figures = json.load(f)
+    assert figures == dict(age_figures(KILLED), version=mirror.state['killed-in-gaza']['current'])
+    with open(publish_dir / 'journalists-killed.min.json', encoding='utf-8') as f:
+        assert json.load(f) == [{'id': 'p1'}]
+    with open(publish_dir / 'index.json', encoding='utf-8') as f:
+        index = json.load(f)
+    assert set(index['files']) == {'children-killed.min.json', 'killed-in-gaza-summary.json',
+                                   'journalists-killed.min.json'}
+
+
+def test_age_figures_match_the_casualties_page():
+    today = date(2024, 6, 1)
+    records = [
+        {'age': '34'},
+        {'age': '3 months'},                        # parseInt -> 3
+        {'age': 'n/a', 'dob': '1950-02-03'},        # 74 from the date of birth
+        {'age': '', 'dob': '05/07/1964'},           # day/month/year -> 59
+        {'age': None, 'dob': 'not a date'},
+        {'age': 60},
+        {},
+    ]
+    assert age_figures(records, today) == {'total_records': 7, 'elderly_killed': 2, 'unknown_age_count': 2,
+                                           'avg_age': 46.0}
+
+
+def test_age_parsing_edge_cases():
+    assert parse_age('+5') == 5 and parse_age(' 12 years') == 12 and parse_age('unknown') is None
+    assert age_from_dob('2024-06-02', date(2024, 6, 1)) is None
+    assert age_from_dob('1900-01-01', date(2024, 6, 1)) is None
+    assert age_from_dob('31/02/2000') is None
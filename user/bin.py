@@ -6,228 +6,96 @@ Focus: Food security, water access, and population health data
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 import json
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import csv
-from urllib.parse import urljoin, urlparse
+import os
+import sys
 import logging
+from collections import deque
+from exporters import CSV_FIELDNAMES, JsonLinesExporter, StreamingCsvExporter, flatten_for_csv
+from sources import (CursorStore, NewsListingAdapter, OchaFlashUpdateAdapter, WfpCountryPageAdapter,
+                     WhoHealthReportAdapter, resolve_adapters)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('scraper.log'),
-        logging.StreamHandler()
-    ]
-)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crisis_shared.gazetteer import get_gazetteer
+from crisis_shared.log_pipeline import setup_logging
+from crisis_shared.profiling import add_profile_arguments, profile_from_args
+from crisis_shared.rate_limiter import AdaptiveRateLimiter
+
+# Configure logging (queued so the concurrent source scrapers never wait on disk I/O)
+setup_logging(log_file='scraper.log')
+
+
+# Recent titles checked for near-duplicates in streaming mode
+STREAM_DEDUP_WINDOW = 5000
 
 
 class GazaCrisisScraper:
-    def __init__(self, delay=2.0):
+    def __init__(self, delay=2.0, timeout=30, sources=None, state_file='scraper_state.json', incremental=True,
+                 exporters=None, rate_state_file='scraper_rate_limits.json'):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
-        self.delay = delay  # Respectful delay between requests
+        # Pooled connections shared by the concurrently running source scrapers
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.delay = delay  # Starting delay between requests to the same host, adapted per host from there
+        self.timeout = timeout
+        self.rate_limiter = AdaptiveRateLimiter(delay, state_file=rate_state_file,
+                                                user_agent=self.session.headers['User-Agent'])
         self.incidents = []
-
-    def wait(self):
-        """Respectful delay between requests"""
-        time.sleep(self.delay)
-
-    def scrape_un_ocha(self, days_back=30) -> List[Dict]:
-        """Scrape UN OCHA humanitarian updates"""
-        incidents = []
-        base_url = "https://www.ochaopt.org"
-
+        self.collected_count = 0  # Incidents found by the last batch run, before merging with earlier exports
+
+        # Source adapters and their saved cursors (see sources.py)
+        self.adapter_classes = resolve_adapters(sources)
+        self.state_file = state_file
+        self.incremental = incremental  # False re-scrapes everything the sources list
+
+        # Streaming mode: incidents go straight to these exporters instead of self.incidents
+        self.exporters = exporters or []
+        self.streamed_counts = {}
+        self._recent_titles = deque(maxlen=STREAM_DEDUP_WINDOW)
+        self._stream_lock = threading.Lock()
+
+    def fetch(self, url):
+        """GET a URL through the shared session, at the rate the host currently allows"""
+        self.rate_limiter.wait(url)
         try:
-            # Get recent situation reports
-            response = self.session.get(f"{base_url}/content/hostilities-gaza-strip-and-israel-flash-updates")
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Find flash update links
-            update_links = soup.find_all('a', href=re.compile(r'/content/.*flash.*update'))
-
-            for link in update_links[:10]:  # Limit to recent updates
-                self.wait()
-                update_url = urljoin(base_url, link['href'])
-
-                try:
-                    update_response = self.session.get(update_url)
-                    update_soup = BeautifulSoup(update_response.content, 'html.parser')
-
-                    # Extract key information
-                    title = update_soup.find('h1')
-                    content = update_soup.find('div', class_='field-item')
-
-                    if title and content:
-                        text = content.get_text()
-
-                        # Look for hunger/food security keywords
-                        food_keywords = ['hunger', 'starvation', 'malnutrition', 'food security',
-                                         'famine', 'food distribution', 'aid distribution']
-
-                        if any(keyword.lower() in text.lower() for keyword in food_keywords):
-                            incident = {
-                                'id': f"ocha_{len(incidents)}",
-                                'source': 'UN OCHA',
-                                'title': title.get_text().strip(),
-                                'description': self.extract_relevant_paragraphs(text, food_keywords),
-                                'url': update_url,
-                                'date': self.extract_date_from_text(text),
-                                'location': 'Gaza Strip',
-                                'category': 'Food Security',
-                                'verified': True,
-                                'evidence_type': 'Report'
-                            }
-                            incidents.append(incident)
-
-                except Exception as e:
-                    logging.error(f"Error scraping {update_url}: {e}")
-
-        except Exception as e:
-            logging.error(f"Error accessing UN OCHA: {e}")
+            response = self.session.get(url, timeout=self.timeout)
+        except (requests.Timeout, requests.ConnectionError):
+            self.rate_limiter.record(url, error=True)
+            raise
+        self.rate_limiter.record(url, status=response.status_code, latency=response.elapsed.total_seconds(),
+                                 retry_after=response.headers.get('Retry-After'))
+        return response
 
-        return incidents
+    def scrape_un_ocha(self, days_back=30) -> List[Dict]:
+        """Scrape UN OCHA humanitarian updates (ignoring the saved cursor)"""
+        return OchaFlashUpdateAdapter(self).collect()
 
     def scrape_who_health_data(self) -> List[Dict]:
-        """Scrape WHO health situation reports"""
-        incidents = []
-        base_url = "https://www.who.int"
-
-        try:
-            # WHO emergencies page for Gaza
-            response = self.session.get(f"{base_url}/emergencies/disease-outbreak-news")
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Find Gaza-related health reports
-            gaza_links = soup.find_all('a', string=re.compile(r'Gaza|Palestine', re.I))
-
-            for link in gaza_links[:5]:
-                self.wait()
-                report_url = urljoin(base_url, link['href'])
-
-                try:
-                    report_response = self.session.get(report_url)
-                    report_soup = BeautifulSoup(report_response.content, 'html.parser')
-
-                    content = report_soup.find('div', class_='sf-content-block')
-                    if content:
-                        text = content.get_text()
-
-                        # Look for malnutrition and health indicators
-                        health_keywords = ['malnutrition', 'undernutrition', 'mortality',
-                                           'health system', 'medical supplies', 'children']
-
-                        if any(keyword.lower() in text.lower() for keyword in health_keywords):
-                            incident = {
-                                'id': f"who_{len(incidents)}",
-                                'source': 'WHO',
-                                'title': report_soup.find('h1').get_text().strip(),
-                                'description': self.extract_relevant_paragraphs(text, health_keywords),
-                                'url': report_url,
-                                'date': self.extract_date_from_text(text),
-                                'location': 'Gaza Strip',
-                                'category': 'Health',
-                                'verified': True,
-                                'evidence_type': 'Health Report'
-                            }
-                            incidents.append(incident)
-
-                except Exception as e:
-                    logging.error(f"Error scraping WHO report {report_url}: {e}")
-
-        except Exception as e:
-            logging.error(f"Error accessing WHO data: {e}")
-
-        return incidents
+        """Scrape WHO health situation reports (ignoring the saved cursor)"""
+        return WhoHealthReportAdapter(self).collect()
 
     def scrape_wfp_food_security(self) -> List[Dict]:
-        """Scrape World Food Programme reports"""
-        incidents = []
-
-        try:
-            # WFP situation reports
-            wfp_url = "https://www.wfp.org/countries/state-palestine"
-            response = self.session.get(wfp_url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Find relevant content sections
-            content_sections = soup.find_all('div', class_=['content', 'field-item'])
-
-            for section in content_sections:
-                text = section.get_text()
-                food_security_keywords = ['food security', 'hunger', 'malnutrition',
-                                          'food assistance', 'nutrition']
-
-                if any(keyword.lower() in text.lower() for keyword in food_security_keywords):
-                    incident = {
-                        'id': f"wfp_{len(incidents)}",
-                        'source': 'WFP',
-                        'title': 'Gaza Food Security Update',
-                        'description': self.extract_relevant_paragraphs(text, food_security_keywords),
-                        'url': wfp_url,
-                        'date': datetime.now().strftime('%Y-%m-%d'),
-                        'location': 'Gaza Strip',
-                        'category': 'Food Security',
-                        'verified': True,
-                        'evidence_type': 'Assessment'
-                    }
-                    incidents.append(incident)
-
-        except Exception as e:
-            logging.error(f"Error scraping WFP data: {e}")
-
-        return incidents
+        """Scrape World Food Programme reports (ignoring the saved cursor)"""
+        return WfpCountryPageAdapter(self).collect()
 
     def scrape_news_sources(self, sources: List[str]) -> List[Dict]:
-        """Scrape news sources for Gaza crisis coverage"""
-        incidents = []
-
-        for source_url in sources:
-            self.wait()
-            try:
-                response = self.session.get(source_url)
-                soup = BeautifulSoup(response.content, 'html.parser')
-
-                # Generic article extraction
-                articles = soup.find_all(['article', 'div'], class_=re.compile(r'article|story|news'))
-
-                for article in articles[:5]:
-                    title_elem = article.find(['h1', 'h2', 'h3'])
-                    content_elem = article.find(['p', 'div'], class_=re.compile(r'content|summary|excerpt'))
-
-                    if title_elem and content_elem:
-                        title = title_elem.get_text().strip()
-                        content = content_elem.get_text().strip()
-
-                        # Check for crisis-related keywords
-                        crisis_keywords = ['gaza', 'hunger', 'starvation', 'aid', 'humanitarian']
-
-                        if any(keyword.lower() in (title + content).lower() for keyword in crisis_keywords):
-                            incident = {
-                                'id': f"news_{len(incidents)}",
-                                'source': urlparse(source_url).netloc,
-                                'title': title,
-                                'description': content[:500] + '...' if len(content) > 500 else content,
-                                'url': source_url,
-                                'date': datetime.now().strftime('%Y-%m-%d'),
-                                'location': 'Gaza Strip',
-                                'category': 'News Report',
-                                'verified': False,  # News requires verification
-                                'evidence_type': 'Media Report'
-                            }
-                            incidents.append(incident)
-
-            except Exception as e:
-                logging.error(f"Error scraping {source_url}: {e}")
-
-        return incidents
+        """Scrape news sources for Gaza crisis coverage (ignoring the saved cursor)"""
+        adapter = NewsListingAdapter(self)
+        adapter.listing_urls = sources
+        return adapter.collect()
 
     def extract_relevant_paragraphs(self, text: str, keywords: List[str], max_chars=800) -> str:
         """Extract paragraphs containing relevant keywords"""
@@ -259,22 +127,9 @@ class GazaCrisisScraper:
         return datetime.now().strftime('%Y-%m-%d')
 
     def generate_coordinates(self, location: str) -> tuple:
-        """Generate approximate coordinates for Gaza locations"""
-        gaza_locations = {
-            'gaza city': (31.5017, 34.4668),
-            'khan younis': (31.3490, 34.3088),
-            'rafah': (31.2996, 34.2392),
-            'jabalia': (31.5317, 34.4833),
-            'beit lahia': (31.5453, 34.5042),
-            'gaza strip': (31.4167, 34.3333)  # Central Gaza
-        }
-
-        location_lower = location.lower()
-        for key, coords in gaza_locations.items():
-            if key in location_lower:
-                return coords
-
-        return (31.4167, 34.3333)  # Default to central Gaza
+        """Approximate coordinates for a Gaza location (central Gaza if unknown)"""
+        place = get_gazetteer().resolve(location)
+        return (place.lat, place.lng)
 
     def export_to_json(self, filename='incidents.json'):
         """Export collected data to JSON format for your platform"""
@@ -293,59 +148,138 @@ class GazaCrisisScraper:
         logging.info(f"Exported {len(self.incidents)} incidents to {filename}")
 
     def export_to_csv(self, filename='incidents.csv'):
-        """Export to CSV format"""
-        if not self.incidents:
-            return
-
-        fieldnames = ['id', 'source', 'title', 'description', 'url', 'date',
-                      'location', 'category', 'verified', 'evidence_type', 'coordinates']
-
+        """Export to CSV format (header only when there are no incidents, so it always matches the JSON)"""
         with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
             writer.writeheader()
-
-            for incident in self.incidents:
-                # Flatten coordinates for CSV
-                row = incident.copy()
-                if 'coordinates' in row:
-                    row['coordinates'] = f"{row['coordinates']['lat']},{row['coordinates']['lng']}"
-                writer.writerow(row)
+            writer.writerows(flatten_for_csv(incident) for incident in self.incidents)
 
         logging.info(f"Exported {len(self.incidents)} incidents to {filename}")
 
-    def run_full_scrape(self):
-        """Execute full scraping process"""
-        logging.info("Starting Gaza Crisis data collection...")
-
-        # Collect from various sources
-        logging.info("Collecting UN OCHA reports...")
-        self.incidents.extend(self.scrape_un_ocha())
+    def load_existing_incidents(self, filename='incidents.json') -> List[Dict]:
+        """Incidents from a previous batch export, so incremental runs add to them instead of replacing them"""
+        if not os.path.exists(filename):
+            return []
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                return json.load(f).get('incidents', [])
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"Could not read existing {filename}, refusing to overwrite it: {e}")
+
+    def merge_with_existing(self, new_incidents, filename='incidents.json') -> List[Dict]:
+        """Existing incidents plus the new ones; a new incident replaces one with the same id,
+        and one whose title duplicates an existing incident is dropped"""
+        merged = self.load_existing_incidents(filename)
+        positions = {incident.get('id'): index for index, incident in enumerate(merged)}
+        seen_word_sets = [frozenset(incident['title'].lower().split()) for incident in merged]
+
+        added = 0
+        for incident in new_incidents:
+            index = positions.get(incident.get('id'))
+            if index is not None:
+                merged[index] = incident
+                continue
+            title_words = frozenset(incident['title'].lower().split())
+            if self.is_duplicate_title(title_words, seen_word_sets):
+                continue
+            positions[incident.get('id')] = len(merged)
+            seen_word_sets.append(title_words)
+            merged.append(incident)
+            added += 1
+
+        logging.info(f"Merged {added} new incidents into {len(merged) - added} from {filename}")
+        return merged
+
+    def stream_incident(self, incident, source_label):
+        """Deduplicate an incident as it arrives and write it to every exporter"""
+        title_words = frozenset(incident['title'].lower().split())
+
+        with self._stream_lock:
+            if self.is_duplicate_title(title_words, self._recent_titles):
+                return
+            self._recent_titles.append(title_words)
 
-        logging.info("Collecting WHO health data...")
-        self.incidents.extend(self.scrape_who_health_data())
+            lat, lng = self.generate_coordinates(incident.get('location', 'Gaza Strip'))
+            incident['coordinates'] = {'lat': lat, 'lng': lng}
 
-        logging.info("Collecting WFP food security data...")
-        self.incidents.extend(self.scrape_wfp_food_security())
+            for exporter in self.exporters:
+                exporter.write(incident)
+            self.streamed_counts[source_label] = self.streamed_counts.get(source_label, 0) + 1
 
-        # Add reputable news sources
-        news_sources = [
-            "https://www.reuters.com/world/middle-east/",
-            "https://apnews.com/hub/israel-palestinians",
-            "https://www.bbc.com/news/topics/c207p54m4wpt/israel-gaza"
-        ]
+    def _timed_scrape(self, name, scrape, *args):
+        """Run one source scraper, returning (incidents, seconds taken)"""
+        logging.info(f"Collecting {name}...")
+        start = time.perf_counter()
+        try:
+            incidents = scrape(*args)
+        except Exception as e:
+            logging.error(f"Error collecting {name}: {e}")
+            incidents = []
+        elapsed = time.perf_counter() - start
+        count = len(incidents) or self.streamed_counts.get(name, 0)
+        logging.info(f"Finished {name}: {count} incidents in {elapsed:.1f}s")
+        return incidents, elapsed
 
-        logging.info("Collecting news reports...")
-        self.incidents.extend(self.scrape_news_sources(news_sources))
+    def run_full_scrape(self):
+        """Execute full scraping process"""
+        logging.info("Starting Gaza Crisis data collection...")
+        start = time.perf_counter()
+
+        cursors = CursorStore(self.state_file)
+        adapters = [adapter_class(self, cursors.get(adapter_class.name) if self.incremental else None)
+                    for adapter_class in self.adapter_classes]
+
+        # Sources hit different hosts, so they are collected concurrently
+        with ThreadPoolExecutor(max_workers=max(1, len(adapters))) as pool:
+            futures = []
+            for adapter in adapters:
+                emit = None
+                if self.exporters:
+                    emit = lambda incident, label=adapter.label: self.stream_incident(incident, label)
+                futures.append((adapter, pool.submit(self._timed_scrape, adapter.label, adapter.collect, emit)))
+
+            # Merge in source order so output is stable between runs
+            timings = []
+            for adapter, future in futures:
+                incidents, elapsed = future.result()
+                self.incidents.extend(incidents)
+                timings.append(f"{adapter.label} {elapsed:.1f}s")
+
+                # Streamed items are already flushed to disk once the source finishes, so its cursor
+                # is saved straight away and a crash later in the run doesn't re-scrape them
+                if self.incremental and self.exporters:
+                    cursors.save([adapter.name])
+
+        logging.info(f"Per-source timing: {', '.join(timings)}; "
+                     f"total {time.perf_counter() - start:.1f}s")
+        self.rate_limiter.save()
+
+        if self.exporters:
+            for exporter in self.exporters:
+                exporter.close()
+            logging.info(f"Collection complete. Streamed {sum(self.streamed_counts.values())} incidents to "
+                         f"{', '.join(exporter.filename for exporter in self.exporters)}")
+            return
 
         # Remove duplicates based on title similarity
         self.incidents = self.remove_duplicates()
+        self.collected_count = len(self.incidents)
+
+        # Cursors skip items already exported, so an incremental run only has the new ones to add
+        if self.incremental:
+            self.incidents = self.merge_with_existing(self.incidents)
 
-        logging.info(f"Collection complete. Total incidents: {len(self.incidents)}")
+        logging.info(f"Collection complete. New incidents: {self.collected_count}, "
+                     f"total incidents: {len(self.incidents)}")
 
         # Export data
         self.export_to_json()
         self.export_to_csv()
 
+        # Only once the export succeeded, so a failed run collects the same items again next time
+        if self.incremental:
+            cursors.save()
+
     def remove_duplicates(self) -> List[Dict]:
         """Remove duplicate incidents based on title similarity"""
         unique_incidents = []
@@ -353,38 +287,67 @@ class GazaCrisisScraper:
 
         for incident in self.incidents:
             title_words = set(incident['title'].lower().split())
-            is_duplicate = False
 
-            for seen_title in seen_titles:
-                seen_words = set(seen_title.split())
-                # If 70% of words overlap, consider it duplicate
-                if len(title_words & seen_words) / len(title_words | seen_words) > 0.7:
-                    is_duplicate = True
-                    break
-
-            if not is_duplicate:
+            if not self.is_duplicate_title(title_words, (set(seen.split()) for seen in seen_titles)):
                 unique_incidents.append(incident)
                 seen_titles.add(incident['title'].lower())
 
         return unique_incidents
 
+    @staticmethod
+    def is_duplicate_title(title_words, seen_word_sets) -> bool:
+        """True if 70% of the title's words overlap with any previously seen title"""
+        for seen_words in seen_word_sets:
+            union = title_words | seen_words
+            if union and len(title_words & seen_words) / len(union) > 0.7:
+                return True
+        return False
+
 
 def main():
     """Main execution function"""
-    scraper = GazaCrisisScraper(delay=2.0)
-
-    try:
-        scraper.run_full_scrape()
-        print(f"\nData collection completed successfully!")
-        print(f"Total incidents collected: {len(scraper.incidents)}")
-        print(f"Files generated: incidents.json, incidents.csv")
-        print(f"Log file: scraper.log")
-
-    except KeyboardInterrupt:
-        print("\nScraping interrupted by user")
-    except Exception as e:
-        logging.error(f"Fatal error: {e}")
-        print(f"Error occurred: {e}")
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Gaza Crisis Documentation Scraper')
+    parser.add_argument('--sources', help='Comma-separated source adapters (names or module:ClassName)')
+    parser.add_argument('--state-file', default='scraper_state.json', help='Where source cursors are saved')
+    parser.add_argument('--full', action='store_true', help='Ignore saved cursors and re-scrape everything')
+    parser.add_argument('--rate-state-file', default='scraper_rate_limits.json',
+                        help='Where per-host request rates learned between runs are saved')
+    parser.add_argument('--stream', action='store_true',
+                        help='Append incidents to incidents.jsonl/incidents.csv as they are collected')
+    add_profile_arguments(parser, default_dir='.')
+
+    args = parser.parse_args()
+
+    with profile_from_args(args, 'scraper'):
+        exporters = [JsonLinesExporter('incidents.jsonl'), StreamingCsvExporter('incidents.csv')] if args.stream else None
+
+        scraper = GazaCrisisScraper(
+            delay=2.0,
+            sources=args.sources.split(',') if args.sources else None,
+            state_file=args.state_file,
+            incremental=not args.full,
+            exporters=exporters,
+            rate_state_file=args.rate_state_file
+        )
+
+        try:
+            scraper.run_full_scrape()
+            print(f"\nData collection completed successfully!")
+            if args.stream:
+                print(f"Total incidents collected: {sum(scraper.streamed_counts.values())}")
+                print(f"Files updated: incidents.jsonl, incidents.csv")
+            else:
+                print(f"Total incidents collected: {scraper.collected_count}")
+                print(f"Files generated: incidents.json, incidents.csv")
+            print(f"Log file: scraper.log")
+
+        except KeyboardInterrupt:
+            print("\nScraping interrupted by user")
+        except Exception as e:
+            logging.error(f"Fatal error: {e}")
+            print(f"Error occurred: {e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+"""
+Streaming exporters for GazaCrisisScraper.
+
+Each incident is written and flushed as soon as it is collected, so memory
+stays flat during long backfills and everything written before a crash is
+kept. Files are appended to, which suits incremental (cursor-based) runs.
+"""
+
+import csv
+import json
+import os
+
+CSV_FIELDNAMES = ['id', 'source', 'title', 'description', 'url', 'date',
+                  'location', 'category', 'verified', 'evidence_type', 'coordinates']
+
+
+def flatten_for_csv(incident):
+    """CSV row for an incident, with coordinates as 'lat,lng'"""
+    coordinates = incident.get('coordinates')
+    if not coordinates:
+        return incident
+    return dict(incident, coordinates=f"{coordinates['lat']},{coordinates['lng']}")
+
+
+class JsonLinesExporter:
+    """Appends one JSON object per line"""
+
+    def __init__(self, filename='incidents.jsonl'):
+        self.filename = filename
+        self.count = 0
+        self.file = open(filename, 'a', encoding='utf-8')
+
+    def write(self, incident):
+        self.file.write(json.dumps(incident, ensure_ascii=False) + '\n')
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+class StreamingCsvExporter:
+    """Appends CSV rows, writing the header only when the file is new"""
+
+    def __init__(self, filename='incidents.csv', fieldnames=CSV_FIELDNAMES):
+        self.filename = filename
+        self.count = 0
+        is_new = not os.path.exists(filename) or os.path.getsize(filename) == 0
+
+        self.file = open(filename, 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames, extrasaction='ignore')
+        if is_new:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def write(self, incident):
+        self.writer.writerow(flatten_for_csv(incident))
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        self.file.close()